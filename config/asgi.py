@@ -1,7 +1,15 @@
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+# Without queue workers this process runs background uploads itself, and
+# picks up those a restarted process left behind
+if not settings.TIKI_ASYNC_ENRICH:
+    from tiki.services.batch import start_recovery
+
+    start_recovery()
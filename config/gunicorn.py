@@ -0,0 +1,33 @@
+"""Gunicorn settings for the web container.
+
+    gunicorn config.wsgi:application -c config/gunicorn.py
+
+Every worker process records Prometheus samples in PROMETHEUS_MULTIPROC_DIR,
+and /metrics/ in any worker reports the sum over all of them.
+"""
+
+import glob
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8106")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+timeout = 120
+
+# Must be set before prometheus_client is imported, i.e. before the app loads
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/tiki-metrics")
+
+
+def on_starting(server):
+    # Samples left by a previous master would be counted again
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
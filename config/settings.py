@@ -122,10 +122,178 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Apache Tika
 TIKA_SERVER_URL = os.environ.get("TIKA_SERVER_URL", "http://localhost:9998")
+TIKA_CONNECT_TIMEOUT = float(os.environ.get("TIKA_CONNECT_TIMEOUT", "5"))
+TIKA_READ_TIMEOUT = float(os.environ.get("TIKA_READ_TIMEOUT", "110"))
+TIKA_RETRIES = int(os.environ.get("TIKA_RETRIES", "2"))
+TIKA_RETRY_BACKOFF = float(os.environ.get("TIKA_RETRY_BACKOFF", "0.5"))
+# Keep-alive connections kept open to the Tika server per process
+TIKA_POOL_MAXSIZE = int(os.environ.get("TIKA_POOL_MAXSIZE", "10"))
 
 # Anthropic
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 CLAUDE_MODEL = os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-20250514")
+# "sync" calls Claude per upload; "batch" queues uploads for the Message
+# Batches API, driven by `manage.py claude_batches`
+CLAUDE_ENRICHMENT_MODE = os.environ.get("CLAUDE_ENRICHMENT_MODE", "sync")
+CLAUDE_BATCH_MAX_REQUESTS = int(os.environ.get("CLAUDE_BATCH_MAX_REQUESTS", "10000"))
+# Point at a local stand-in for testing; empty uses the SDK default
+ANTHROPIC_BASE_URL = os.environ.get("ANTHROPIC_BASE_URL", "")
+# Per-process limits; the API's rate-limit headers tighten them further.
+# Set a per-minute limit to 0 to rely on the headers alone.
+CLAUDE_MAX_CONCURRENCY = int(os.environ.get("CLAUDE_MAX_CONCURRENCY", "4"))
+CLAUDE_REQUESTS_PER_MINUTE = int(os.environ.get("CLAUDE_REQUESTS_PER_MINUTE", "50"))
+CLAUDE_TOKENS_PER_MINUTE = int(os.environ.get("CLAUDE_TOKENS_PER_MINUTE", "30000"))
+CLAUDE_MAX_RETRIES = int(os.environ.get("CLAUDE_MAX_RETRIES", "5"))
+CLAUDE_RETRY_BACKOFF = float(os.environ.get("CLAUDE_RETRY_BACKOFF", "1.0"))
+CLAUDE_RETRY_BACKOFF_MAX = float(os.environ.get("CLAUDE_RETRY_BACKOFF_MAX", "60"))
+
+# Deduplication: uploads with the same SHA-256 as a completed upload younger
+# than TIKI_DEDUP_TTL seconds reuse its Tika and Claude results (0 disables).
+TIKI_DEDUP_TTL = int(os.environ.get("TIKI_DEDUP_TTL", str(30 * 24 * 3600)))
+
+# Stream inline uploads to Tika while they are being received instead of
+# re-reading them from disk afterwards
+TIKI_UPLOAD_TEE_TIKA = os.environ.get("TIKI_UPLOAD_TEE_TIKA", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# Extracted full text is stored compressed ("zstd" needs the zstandard
+# package, "gzip" or "none") and capped at this many characters
+TIKI_FULL_TEXT_CODEC = os.environ.get("TIKI_FULL_TEXT_CODEC", "gzip")
+TIKI_FULL_TEXT_MAX_CHARS = int(os.environ.get("TIKI_FULL_TEXT_MAX_CHARS", "10000000"))
+
+# Background processing
+# When enabled, /api/enrich/ stores the upload and returns 202; the pipeline is
+# run by `manage.py tiki_worker` processes polling the uploads table.
+TIKI_ASYNC_ENRICH = os.environ.get("TIKI_ASYNC_ENRICH", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+TIKI_WORKER_CONCURRENCY = int(os.environ.get("TIKI_WORKER_CONCURRENCY", "4"))
+TIKI_WORKER_POLL_INTERVAL = float(os.environ.get("TIKI_WORKER_POLL_INTERVAL", "1.0"))
+# Uploads in extracting/enriching for longer than this, without a heartbeat
+# from the process working on them, are assumed orphaned
+TIKI_WORKER_STALE_AFTER = int(os.environ.get("TIKI_WORKER_STALE_AFTER", "1800"))
+# "threads" runs whole uploads per thread; "staged" runs each pipeline stage on
+# its own thread pool (see TIKI_STAGE_CONCURRENCY)
+TIKI_WORKER_MODE = os.environ.get("TIKI_WORKER_MODE", "threads")
+# Threads per stage in staged mode; override as e.g. "extract=8,enrich=16"
+TIKI_STAGE_CONCURRENCY = {
+    "extract": 4,
+    "persist_extraction": 2,
+    "enrich": 4,
+    "build": 2,
+    "persist_output": 2,
+    **{
+        name.strip(): int(count)
+        for name, count in (
+            pair.split("=", 1)
+            for pair in os.environ.get("TIKI_STAGE_CONCURRENCY", "").split(",")
+            if pair.strip()
+        )
+    },
+}
+# Seconds between per-stage statistics log lines in staged mode
+TIKI_STAGE_STATS_INTERVAL = float(os.environ.get("TIKI_STAGE_STATS_INTERVAL", "60"))
+# Port on which tiki_worker serves Prometheus metrics (0 disables); the web
+# processes serve theirs on /metrics/
+TIKI_WORKER_METRICS_PORT = int(os.environ.get("TIKI_WORKER_METRICS_PORT", "0"))
+
+# Batch uploads (/api/batch/); without TIKI_ASYNC_ENRICH each web process runs
+# batch files on a thread pool of this size, and every TIKI_WORKER_STALE_AFTER / 2
+# seconds resubmits uploads a restarted process left behind
+TIKI_BATCH_CONCURRENCY = int(os.environ.get("TIKI_BATCH_CONCURRENCY", "4"))
+TIKI_BATCH_MAX_FILES = int(os.environ.get("TIKI_BATCH_MAX_FILES", "5000"))
+DATA_UPLOAD_MAX_NUMBER_FILES = TIKI_BATCH_MAX_FILES
+# Total bytes a batch may store, zip members counted as decompressed (0 for no
+# limit); stops zip bombs from filling the media volume
+TIKI_BATCH_MAX_BYTES = int(
+    os.environ.get("TIKI_BATCH_MAX_BYTES", str(2 * 1024 * 1024 * 1024))
+)
+# Batch results are buffered and written in one transaction per this many files
+TIKI_BULK_FLUSH_SIZE = int(os.environ.get("TIKI_BULK_FLUSH_SIZE", "100"))
+
+# Rendered DCAT-AP records (JSON-LD, Turtle, ...) are cached in this cache
+# alias until edited, or for at most this many seconds
+TIKI_RENDER_CACHE = os.environ.get("TIKI_RENDER_CACHE", "default")
+TIKI_RENDER_CACHE_TIMEOUT = int(os.environ.get("TIKI_RENDER_CACHE_TIMEOUT", "86400"))
+# Records per database round-trip when streaming /api/export/
+TIKI_EXPORT_CHUNK_SIZE = int(os.environ.get("TIKI_EXPORT_CHUNK_SIZE", "500"))
+
+# Retention of original uploads (manage.py apply_retention). Files of finished
+# uploads are deleted this many days after processing (0 keeps them), or as
+# soon as the upload is "completed" or its DCAT record "finalized"
+TIKI_RETENTION_DELETE_AFTER_DAYS = int(
+    os.environ.get("TIKI_RETENTION_DELETE_AFTER_DAYS", "0")
+)
+TIKI_RETENTION_DELETE_ON = os.environ.get("TIKI_RETENTION_DELETE_ON", "")
+# Files still kept are gzipped after this many days (0 never compresses)
+TIKI_RETENTION_COMPRESS_AFTER_DAYS = int(
+    os.environ.get("TIKI_RETENTION_COMPRESS_AFTER_DAYS", "0")
+)
+TIKI_RETENTION_BATCH_SIZE = int(os.environ.get("TIKI_RETENTION_BATCH_SIZE", "200"))
+
+# Serve /api/enrich/, /api/result/ and /api/result/<id>/edit/ with async views;
+# enable when running under ASGI (see docker-compose.asgi.yml)
+TIKI_ASYNC_VIEWS = os.environ.get("TIKI_ASYNC_VIEWS", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# Admin changelists on Postgres show the planner's row estimate instead of an
+# exact COUNT(*) when it is above this many rows
+TIKI_ADMIN_EXACT_COUNT_LIMIT = int(
+    os.environ.get("TIKI_ADMIN_EXACT_COUNT_LIMIT", "10000")
+)
+# Characters of large JSON and prompt fields shown inline in the admin
+TIKI_ADMIN_PREVIEW_CHARS = int(os.environ.get("TIKI_ADMIN_PREVIEW_CHARS", "500"))
+
+# Circuit breakers around Tika and Claude (state shared through the database).
+# A breaker opens after this many consecutive outage errors (0 disables) and
+# lets one trial call through after TIKI_BREAKER_RESET_AFTER seconds. Each
+# process re-reads the shared state every TIKI_BREAKER_REFRESH seconds.
+TIKI_BREAKER_FAILURES = int(os.environ.get("TIKI_BREAKER_FAILURES", "5"))
+TIKI_BREAKER_RESET_AFTER = float(os.environ.get("TIKI_BREAKER_RESET_AFTER", "30"))
+TIKI_BREAKER_REFRESH = float(os.environ.get("TIKI_BREAKER_REFRESH", "2"))
+# While Claude is unavailable, "degrade" completes uploads with Tika metadata
+# only and flags them for re-enrichment; "fail" fails them
+TIKI_CLAUDE_OUTAGE = os.environ.get("TIKI_CLAUDE_OUTAGE", "degrade")
+
+# manage.py reenrich: uploads read (and checkpointed) per batch, uploads
+# enriched in parallel, and Claude requests per minute (0: only
+# CLAUDE_REQUESTS_PER_MINUTE and CLAUDE_TOKENS_PER_MINUTE apply)
+TIKI_REENRICH_BATCH_SIZE = int(os.environ.get("TIKI_REENRICH_BATCH_SIZE", "100"))
+TIKI_REENRICH_WORKERS = int(os.environ.get("TIKI_REENRICH_WORKERS", "4"))
+TIKI_REENRICH_RATE = float(os.environ.get("TIKI_REENRICH_RATE", "0"))
+
+# Readiness (/ready/): dependency checks are cached per process for this many
+# seconds and time out after TIKI_READY_TIMEOUT
+TIKI_READY_CACHE_TTL = float(os.environ.get("TIKI_READY_CACHE_TTL", "5"))
+TIKI_READY_TIMEOUT = float(os.environ.get("TIKI_READY_TIMEOUT", "2"))
+# Report not ready without a usable ANTHROPIC_API_KEY instead of serving
+# Tika-only results
+TIKI_READY_REQUIRE_CLAUDE = os.environ.get(
+    "TIKI_READY_REQUIRE_CLAUDE", "False"
+).lower() in ("true", "1", "yes")
+# Report not ready at this many queued uploads, or pipelines running in the
+# process (0 disables), so the orchestrator sheds load before requests time out
+TIKI_READY_MAX_QUEUE_DEPTH = int(os.environ.get("TIKI_READY_MAX_QUEUE_DEPTH", "0"))
+TIKI_READY_MAX_IN_FLIGHT = int(os.environ.get("TIKI_READY_MAX_IN_FLIGHT", "0"))
+
+# Progress stream (/api/result/<id>/events/); fed by Postgres LISTEN/NOTIFY
+TIKI_EVENTS_KEEPALIVE = float(os.environ.get("TIKI_EVENTS_KEEPALIVE", "15"))
+# Streams are closed after this many seconds; EventSource clients reconnect
+TIKI_EVENTS_TIMEOUT = float(os.environ.get("TIKI_EVENTS_TIMEOUT", "300"))
+# Under WSGI every stream holds a worker thread for up to TIKI_EVENTS_TIMEOUT,
+# so each process serves at most this many (503 beyond; 0 serves none). The
+# upload page only streams under ASGI (TIKI_ASYNC_VIEWS) and polls otherwise
+TIKI_EVENTS_MAX_SYNC_STREAMS = int(
+    os.environ.get("TIKI_EVENTS_MAX_SYNC_STREAMS", "4")
+)
 
 # ---------------------------------------------------------------------------
 # derilinx-labs Wrapper
@@ -171,4 +339,4 @@ LABS_TOUR_STEPS = [
 GATE_URL = os.environ.get("GATE_URL", "")
 GATE_API_KEY = os.environ.get("GATE_API_KEY", "")
 GATE_SUBDOMAIN = "tiki.derilinx-labs.com"
-GATE_EXCLUDED_PATHS = ["/health/"]
+GATE_EXCLUDED_PATHS = ["/health/", "/ready/"]
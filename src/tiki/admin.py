@@ -1,30 +1,211 @@
+import json
+
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, TextField
+from django.db.models.functions import Cast, Left
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
-from .models import ClaudeEnrichment, DCATOutput, TikaMetadata, UploadedFile
+from .models import (
+    CircuitBreaker,
+    ClaudeBatch,
+    ClaudeEnrichment,
+    DCATOutput,
+    ReenrichmentRun,
+    TikaMetadata,
+    UploadBatch,
+    UploadedFile,
+)
 
 
-class TikaMetadataInline(admin.StackedInline):
-    model = TikaMetadata
+class EstimatedCountPaginator(Paginator):
+    """Use the Postgres planner's row estimate instead of COUNT(*) on big lists."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor != "postgresql":
+            return super().count
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate < settings.TIKI_ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+
+class PreviewInline(admin.StackedInline):
+    """Inline showing the start of large fields, loaded by the database.
+
+    Full values are fetched on demand from the upload's field view.
+    """
+
     extra = 0
-    readonly_fields = ["raw_metadata"]
+    preview_fields = []
+
+    def get_queryset(self, request):
+        limit = settings.TIKI_ADMIN_PREVIEW_CHARS
+        return (
+            super()
+            .get_queryset(request)
+            .defer(*self.preview_fields)
+            .annotate(
+                **{
+                    f"{name}_preview": Left(Cast(F(name), TextField()), limit + 1)
+                    for name in self.preview_fields
+                }
+            )
+        )
+
+    def preview(self, obj, name):
+        if not obj.pk:
+            return "-"
+        text = getattr(obj, f"{name}_preview", None) or ""
+        if len(text) <= settings.TIKI_ADMIN_PREVIEW_CHARS:
+            return format_html("<pre>{}</pre>", text)
+        return format_html(
+            '<pre>{}…</pre><a href="{}" target="_blank">Show all</a>',
+            text[: settings.TIKI_ADMIN_PREVIEW_CHARS],
+            reverse("admin:tiki_uploadedfile_field", args=[obj.upload_id, name]),
+        )
 
 
-class ClaudeEnrichmentInline(admin.StackedInline):
+class TikaMetadataInline(PreviewInline):
+    model = TikaMetadata
+    preview_fields = ["raw_metadata"]
+    exclude = ["raw_metadata"]
+    readonly_fields = ["raw_metadata_preview", "full_text_link"]
+
+    @admin.display(description="Raw metadata")
+    def raw_metadata_preview(self, obj):
+        return self.preview(obj, "raw_metadata")
+
+    @admin.display(description="Full text")
+    def full_text_link(self, obj):
+        # Link instead of inlining the text, which can be book-length
+        if not obj.pk:
+            return "-"
+        return format_html(
+            '<a href="{}">Download extracted text</a>',
+            reverse("api-full-text", args=[obj.upload_id]),
+        )
+
+
+class ClaudeEnrichmentInline(PreviewInline):
     model = ClaudeEnrichment
-    extra = 0
-    readonly_fields = ["raw_response", "prompt_used"]
+    preview_fields = ["raw_response", "prompt_used"]
+    exclude = ["raw_response", "prompt_used"]
+    readonly_fields = ["raw_response_preview", "prompt_used_preview"]
+
+    @admin.display(description="Raw response")
+    def raw_response_preview(self, obj):
+        return self.preview(obj, "raw_response")
+
+    @admin.display(description="Prompt used")
+    def prompt_used_preview(self, obj):
+        return self.preview(obj, "prompt_used")
 
 
-class DCATOutputInline(admin.StackedInline):
+class DCATOutputInline(PreviewInline):
     model = DCATOutput
-    extra = 0
-    readonly_fields = ["jsonld"]
+    preview_fields = ["jsonld", "merged_jsonld"]
+    exclude = ["jsonld", "merged_jsonld"]
+    readonly_fields = [
+        "jsonld_preview",
+        "merged_jsonld_preview",
+        "version",
+        "updated_at",
+    ]
+
+    @admin.display(description="JSON-LD")
+    def jsonld_preview(self, obj):
+        return self.preview(obj, "jsonld")
+
+    @admin.display(description="Merged JSON-LD")
+    def merged_jsonld_preview(self, obj):
+        return self.preview(obj, "merged_jsonld")
 
 
 @admin.register(UploadedFile)
 class UploadedFileAdmin(admin.ModelAdmin):
     list_display = ["original_filename", "status", "file_size", "created_at"]
-    list_filter = ["status"]
+    list_filter = ["status", "file_state", "needs_enrichment"]
+    raw_id_fields = ["batch"]
     search_fields = ["original_filename"]
-    readonly_fields = ["id", "created_at", "updated_at"]
+    readonly_fields = ["id", "file_state", "created_at", "updated_at"]
     inlines = [TikaMetadataInline, ClaudeEnrichmentInline, DCATOutputInline]
+    # Postgres serves the filename search from a trigram index (migration 0010)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_urls(self):
+        return [
+            path(
+                "<uuid:object_id>/field/<str:name>/",
+                self.admin_site.admin_view(self.field_view),
+                name="tiki_uploadedfile_field",
+            ),
+            *super().get_urls(),
+        ]
+
+    def field_view(self, request, object_id, name):
+        """Full value of a field previewed in one of the inlines."""
+        inline = next((i for i in self.inlines if name in i.preview_fields), None)
+        if inline is None or not self.has_view_permission(request):
+            raise Http404
+        value = (
+            inline.model.objects.filter(upload_id=object_id)
+            .values_list(name, flat=True)
+            .first()
+        )
+        if value is None:
+            raise Http404
+        if isinstance(value, str):
+            return HttpResponse(value, content_type="text/plain; charset=utf-8")
+        return JsonResponse(value, safe=False, json_dumps_params={"indent": 2})
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is DCATOutput:
+            # Invalidate cached renderings of edited records
+            for dcat_form in formset.forms:
+                if dcat_form.instance.pk and dcat_form.has_changed():
+                    if "user_edits" in dcat_form.changed_data:
+                        dcat_form.instance.rebuild_merged_jsonld()
+                    dcat_form.instance.version += 1
+        super().save_formset(request, form, formset, change)
+
+
+@admin.register(UploadBatch)
+class UploadBatchAdmin(admin.ModelAdmin):
+    list_display = ["id", "total_files", "created_at"]
+    readonly_fields = ["id", "total_files", "created_at"]
+
+
+@admin.register(ClaudeBatch)
+class ClaudeBatchAdmin(admin.ModelAdmin):
+    list_display = ["batch_id", "status", "request_count", "created_at"]
+    list_filter = ["status"]
+    readonly_fields = ["batch_id", "request_count", "created_at", "updated_at"]
+
+
+@admin.register(CircuitBreaker)
+class CircuitBreakerAdmin(admin.ModelAdmin):
+    list_display = ["name", "state", "failures", "opened_at", "updated_at"]
+    readonly_fields = ["name", "updated_at"]
+
+
+@admin.register(ReenrichmentRun)
+class ReenrichmentRunAdmin(admin.ModelAdmin):
+    list_display = [
+        "name",
+        "processed",
+        "skipped",
+        "failed",
+        "finished_at",
+        "updated_at",
+    ]
+    readonly_fields = ["created_at", "updated_at"]
@@ -0,0 +1,153 @@
+"""Synthetic PDF, DOCX and CSV documents for benchmarks.
+
+The files are valid (a real Tika server can parse them) and generated from a
+seed, so every run sees the same corpus.
+"""
+
+import io
+import random
+import zipfile
+from pathlib import Path
+
+from .fakes import WORDS
+
+KINDS = ("pdf", "docx", "csv")
+
+
+def generate(
+    directory: Path, count: int, sizes: list[int], seed: int = 0
+) -> list[Path]:
+    """Write ``count`` documents to ``directory``, cycling kinds and sizes.
+
+    Sizes are approximate, in bytes of document text.
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        kind = KINDS[i % len(KINDS)]
+        size = sizes[i % len(sizes)]
+        path = directory / f"doc-{i:05d}-{size}.{kind}"
+        path.write_bytes(BUILDERS[kind](_paragraphs(rng, size)))
+        paths.append(path)
+    return paths
+
+
+def pdf(paragraphs: list[str]) -> bytes:
+    lines = [line for paragraph in paragraphs for line in _wrap(paragraph, 90)]
+    # One page per 60 lines
+    pages = [lines[i : i + 60] for i in range(0, len(lines), 60)] or [[]]
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % pid for pid in page_ids), len(pages)),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id, page in zip(page_ids, pages):
+        text = b"".join(
+            b"(%s) Tj T*\n" % _pdf_escape(line).encode("latin-1", "replace")
+            for line in page
+        )
+        stream = b"BT /F1 10 Tf 12 TL 40 800 Td\n" + text + b"ET"
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (page_id + 1)
+        )
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n%s\nendstream" % (
+            len(stream),
+            stream,
+        )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, objects[number]))
+    xref = out.tell()
+    size = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+    for number in range(1, size):
+        out.write(b"%010d 00000 n \n" % offsets[number])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\n" % size)
+    out.write(b"startxref\n%d\n%%%%EOF\n" % xref)
+    return out.getvalue()
+
+
+def docx(paragraphs: list[str]) -> bytes:
+    body = "".join(
+        f"<w:p><w:r><w:t>{_xml_escape(paragraph)}</w:t></w:r></w:p>"
+        for paragraph in paragraphs
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'content-types">'
+            '<Default Extension="rels" ContentType="application/'
+            'vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            "</Types>",
+        )
+        archive.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+            '2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+            'officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/>'
+            "</Relationships>",
+        )
+        archive.writestr(
+            "word/document.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+            f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>',
+        )
+    return out.getvalue()
+
+
+def csv(paragraphs: list[str]) -> bytes:
+    rows = ["station,year,nitrate,phosphate,notes"]
+    for i, paragraph in enumerate(paragraphs):
+        note = paragraph[:60].replace(",", " ")
+        rows.append(f"S{i % 97:03d},{2000 + i % 25},{i % 50}.{i % 10},{i % 7}.5,{note}")
+    return ("\n".join(rows) + "\n").encode()
+
+
+BUILDERS = {"pdf": pdf, "docx": docx, "csv": csv}
+
+
+def _paragraphs(rng: random.Random, size: int) -> list[str]:
+    paragraphs, length = [], 0
+    while length < size:
+        paragraph = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))
+        paragraphs.append(paragraph.capitalize() + ".")
+        length += len(paragraph) + 2
+    return paragraphs
+
+
+def _wrap(text: str, width: int) -> list[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    return [*lines, line] if line else lines
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
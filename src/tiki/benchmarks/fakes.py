@@ -0,0 +1,197 @@
+"""Local stand-ins for the Tika server and the Anthropic Messages API.
+
+Both answer in the real wire format with a configurable delay, so the
+pipeline's HTTP clients, connection pools and rate limiting run unchanged.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": (
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    ),
+    ".csv": "text/csv; charset=UTF-8",
+}
+WORDS = (
+    "water quality monitoring river basin survey annual report station "
+    "sample nitrate phosphate catchment county council environment data"
+).split()
+
+
+class FakeServer:
+    """HTTP server on a free local port, served from a daemon thread."""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name=type(self).__name__, daemon=True
+        )
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method: str, path: str, headers, body: bytes):
+        """Return ``(status, headers, body)`` for a request."""
+        raise NotImplementedError
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._respond()
+
+            def do_PUT(self):
+                self._respond()
+
+            def do_POST(self):
+                self._respond()
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self):
+                with fake._lock:
+                    fake.requests += 1
+                status, headers, body = fake.handle(
+                    self.command, self.path, self.headers, self._body()
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    while size := int(self.rfile.readline().split(b";")[0], 16):
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        return Handler
+
+
+class FakeTika(FakeServer):
+    """Answers /rmeta/text and /version like Tika, without parsing anything.
+
+    Takes ``latency`` seconds plus ``latency_per_mb`` per megabyte sent and
+    returns ``text_chars`` characters of text (default: half the body size).
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_per_mb: float = 0.0,
+        text_chars: int | None = None,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.latency_per_mb = latency_per_mb
+        self.text_chars = text_chars
+
+    def handle(self, method, path, headers, body):
+        if method == "GET" and path == "/version":
+            return 200, {"Content-Type": "text/plain"}, b"Apache Tika 2.9.2 (fake)"
+        if method != "PUT" or path != "/rmeta/text":
+            return 404, {}, b"Not found"
+
+        time.sleep(self.latency + self.latency_per_mb * len(body) / 1024**2)
+        match = re.search(r'filename="([^"]*)"', headers.get("Content-Disposition", ""))
+        filename = match.group(1) if match else ""
+        chars = self.text_chars if self.text_chars is not None else len(body) // 2
+        document = {
+            "Content-Type": MIME_TYPES.get(
+                os.path.splitext(filename)[1].lower(), "application/octet-stream"
+            ),
+            "dc:title": os.path.splitext(filename)[0],
+            "dc:creator": "Benchmark",
+            "dcterms:created": "2024-01-02T03:04:05Z",
+            "language": "en",
+            "X-TIKA:content": filler_text(chars),
+        }
+        return (
+            200,
+            {"Content-Type": "application/json"},
+            json.dumps([document]).encode(),
+        )
+
+
+class FakeAnthropic(FakeServer):
+    """Answers POST /v1/messages with a valid enrichment after ``latency`` s.
+
+    The reply is about ``output_tokens`` tokens long; usage reports the
+    system prompt as a cache read, as the real API does after the first call.
+    """
+
+    def __init__(self, latency: float = 0.0, output_tokens: int = 300):
+        super().__init__()
+        self.latency = latency
+        self.output_tokens = output_tokens
+
+    def handle(self, method, path, headers, body):
+        if method != "POST" or not path.startswith("/v1/messages"):
+            return 404, {}, b"Not found"
+
+        time.sleep(self.latency)
+        request = json.loads(body)
+        system = sum(len(block["text"]) for block in request.get("system", []))
+        prompt = sum(len(message["content"]) for message in request.get("messages", []))
+        content = json.dumps(
+            {
+                "description": filler_text(self.output_tokens * 4),
+                "keywords": WORDS[:5],
+                "themes": ["ENVI", "REGI"],
+            }
+        )
+        message = {
+            "id": "msg_benchmark",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "claude-benchmark"),
+            "content": [{"type": "text", "text": content}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": prompt // 4 + 1,
+                "output_tokens": self.output_tokens,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": system // 4,
+            },
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(message).encode()
+
+
+def filler_text(chars: int) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = WORDS[len(words) % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
@@ -0,0 +1,283 @@
+"""Run benchmark scenarios against the fake Tika and Anthropic servers."""
+
+import json
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from tiki.models import UploadedFile
+from tiki.services import claude
+from tiki.services.claude import ClaudeResult
+from tiki.services.dcat_builder import DCATBuilder
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.tika import TikaResult
+
+from . import corpus
+from .fakes import FakeAnthropic, FakeTika, filler_text
+
+DEFAULT_BASELINE = Path(__file__).with_name("baselines.json")
+# (metric, True if higher is worse)
+COMPARED_METRICS = [
+    ("throughput", False),
+    ("p95_ms", True),
+    ("queries_per_op", True),
+    ("peak_rss_mb", True),
+]
+
+
+@dataclass
+class BenchmarkConfig:
+    uploads: int = 30
+    concurrency: int = 4
+    # Approximate bytes of text per document, cycled through the corpus
+    sizes: list[int] = field(default_factory=lambda: [10_000, 200_000, 2_000_000])
+    tika_latency: float = 0.05
+    tika_latency_per_mb: float = 0.2
+    text_chars: int | None = None
+    claude_latency: float = 0.5
+    output_tokens: int = 300
+    build_iterations: int = 2000
+    seed: int = 0
+
+    def parameters(self) -> dict:
+        return {**asdict(self), "database": connection.vendor}
+
+
+@dataclass
+class ScenarioResult:
+    seconds: float
+    latencies: list[float]
+    queries: int
+
+    def summary(self) -> dict:
+        operations = len(self.latencies)
+        if operations > 1:
+            percentiles = statistics.quantiles(
+                self.latencies, n=100, method="inclusive"
+            )
+        else:
+            percentiles = self.latencies * 99
+        return {
+            "operations": operations,
+            "seconds": round(self.seconds, 3),
+            "throughput": round(operations / self.seconds, 2) if self.seconds else 0,
+            "p50_ms": round(percentiles[49] * 1000, 4),
+            "p95_ms": round(percentiles[94] * 1000, 4),
+            "p99_ms": round(percentiles[98] * 1000, 4),
+            "queries_per_op": round(self.queries / operations, 2) if operations else 0,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+
+def run(config: BenchmarkConfig, scenarios: Iterable[str]) -> dict[str, dict]:
+    """Run ``scenarios`` and return their summaries by name."""
+    results = {}
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        FakeTika(
+            latency=config.tika_latency,
+            latency_per_mb=config.tika_latency_per_mb,
+            text_chars=config.text_chars,
+        ) as tika,
+        FakeAnthropic(
+            latency=config.claude_latency, output_tokens=config.output_tokens
+        ) as anthropic,
+        override_settings(
+            MEDIA_ROOT=Path(tmp) / "media",
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            TIKA_SERVER_URL=tika.url,
+            ANTHROPIC_BASE_URL=anthropic.url,
+            ANTHROPIC_API_KEY="sk-ant-benchmark-" + "0" * 32,
+            CLAUDE_ENRICHMENT_MODE="sync",
+            TIKI_ASYNC_ENRICH=False,
+            TIKI_DEDUP_TTL=0,
+            # Breaker state is re-read on a timer; keep query counts independent
+            # of how long the run takes
+            TIKI_BREAKER_REFRESH=3600,
+        ),
+        _unthrottled_claude(config.concurrency),
+    ):
+        paths = corpus.generate(
+            Path(tmp) / "corpus", config.uploads, config.sizes, config.seed
+        )
+        for name in scenarios:
+            results[name] = SCENARIOS[name](config, paths).summary()
+    return results
+
+
+def run_build(config: BenchmarkConfig, paths: list[Path]) -> ScenarioResult:
+    """DCATBuilder.build on its own, with a typical Tika and Claude result."""
+    builder = DCATBuilder()
+    tika_result = TikaResult(
+        mime_type="application/pdf",
+        title="Benchmark report",
+        author="Benchmark",
+        language="en",
+        full_text=filler_text(50_000),
+        raw_metadata={"X-Parsed-By": ["org.apache.tika.parser.pdf.PDFParser"]},
+    )
+    claude_result = ClaudeResult(
+        suggested_themes=[claude.THEME_BASE_URI + "ENVI"],
+        generated_description=filler_text(1200),
+        suggested_keywords=["water", "quality", "monitoring"],
+    )
+
+    def build(_):
+        builder.build(
+            tika_result=tika_result,
+            claude_result=claude_result,
+            filename="report.pdf",
+            file_size=123_456,
+        )
+
+    # No database access, so skip counting queries: it would dominate the timing
+    return _timed(build, range(config.build_iterations), 1, count_queries=False)
+
+
+def run_pipeline(config: BenchmarkConfig, paths: list[Path]) -> ScenarioResult:
+    """EnrichmentPipeline.run over stored uploads, ``concurrency`` at a time."""
+    uploads = [_create_upload(path) for path in paths]
+    pipeline = EnrichmentPipeline()
+    try:
+        return _timed(pipeline.run, uploads, config.concurrency)
+    finally:
+        UploadedFile.objects.filter(id__in=[u.id for u in uploads]).delete()
+
+
+def run_api(config: BenchmarkConfig, paths: list[Path]) -> ScenarioResult:
+    """POST each document to /api/enrich/, ``concurrency`` requests at a time."""
+    ids = []
+
+    def post(path):
+        with open(path, "rb") as f:
+            response = Client().post("/api/enrich/", {"file": f})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/enrich/ returned {response.status_code}")
+        ids.append(response.json()["id"])
+
+    try:
+        return _timed(post, paths, config.concurrency)
+    finally:
+        UploadedFile.objects.filter(id__in=ids).delete()
+
+
+SCENARIOS: dict[str, Callable[[BenchmarkConfig, list[Path]], ScenarioResult]] = {
+    "build": run_build,
+    "pipeline": run_pipeline,
+    "api": run_api,
+}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Describe every metric that is worse than ``baseline`` by more than
+    ``tolerance`` (a fraction). Query counts get no tolerance.
+    """
+    regressions = []
+    for name, summary in results.items():
+        expected = baseline.get("results", {}).get(name)
+        if expected is None:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS:
+            value, reference = summary[metric], expected[metric]
+            allowed = 0.01 if metric == "queries_per_op" else reference * tolerance
+            if higher_is_worse and value > reference + allowed:
+                regressions.append(f"{name}: {metric} {value} > {reference}")
+            elif not higher_is_worse and value < reference - allowed:
+                regressions.append(f"{name}: {metric} {value} < {reference}")
+    return regressions
+
+
+def load_baseline(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: Path, config: BenchmarkConfig, results: dict) -> None:
+    baseline = load_baseline(path) or {}
+    if baseline.get("parameters") != config.parameters():
+        baseline = {}
+    baseline = {
+        "parameters": config.parameters(),
+        "results": {**baseline.get("results", {}), **results},
+    }
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _timed(
+    operation: Callable,
+    items: Iterable,
+    concurrency: int,
+    count_queries: bool = True,
+) -> ScenarioResult:
+    def measure(item):
+        if not count_queries:
+            started = time.perf_counter()
+            operation(item)
+            return time.perf_counter() - started, 0
+        # Each thread has its own connection, so count queries per call
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            operation(item)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries)
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency, thread_name_prefix="bench") as pool:
+            measured = list(pool.map(measure, items))
+    else:
+        measured = [measure(item) for item in items]
+    seconds = time.perf_counter() - started
+    return ScenarioResult(
+        seconds=seconds,
+        latencies=[elapsed for elapsed, _ in measured],
+        queries=sum(count for _, count in measured),
+    )
+
+
+def _create_upload(path: Path) -> UploadedFile:
+    with open(path, "rb") as f:
+        return UploadedFile.objects.create(
+            file=File(f, name=path.name),
+            original_filename=path.name,
+            file_size=path.stat().st_size,
+        )
+
+
+@contextmanager
+def _unthrottled_claude(concurrency: int):
+    # The fake server has no rate limits; only cap the requests in flight
+    previous = claude._scheduler
+    claude._scheduler = claude.ClaudeScheduler(
+        budget=claude.RateLimitBudget(requests_per_minute=0, tokens_per_minute=0),
+        max_concurrency=concurrency,
+        max_retries=0,
+        backoff=0,
+        backoff_max=0,
+    )
+    try:
+        yield
+    finally:
+        claude._scheduler = previous
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tiki.services.retention import RetentionPolicy, apply_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete or compress original uploads according to the retention "
+        "settings (TIKI_RETENTION_*)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Uploads per batch (default: TIKI_RETENTION_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop each pass after this many batches.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many files are due.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            policy = RetentionPolicy.from_settings()
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"{policy.deletable().count()} files to delete, "
+                f"{policy.compressible().count()} to compress"
+            )
+            return
+
+        report = apply_retention(
+            policy,
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(
+            f"Deleted {report.deleted}, compressed {report.compressed}, "
+            f"failed {report.failed} files"
+        )
@@ -0,0 +1,117 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tiki.benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the enrichment pipeline and /api/enrich/ against local fake "
+        "Tika and Anthropic servers, and compare with the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        defaults = runner.BenchmarkConfig()
+        parser.add_argument(
+            "--scenarios",
+            nargs="+",
+            choices=list(runner.SCENARIOS),
+            default=list(runner.SCENARIOS),
+        )
+        parser.add_argument("--uploads", type=int, default=defaults.uploads)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=defaults.concurrency,
+            help="Uploads (or requests) in flight at once.",
+        )
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=defaults.sizes,
+            help="Comma-separated document sizes in bytes of text.",
+        )
+        parser.add_argument("--tika-latency", type=float, default=defaults.tika_latency)
+        parser.add_argument(
+            "--tika-latency-per-mb", type=float, default=defaults.tika_latency_per_mb
+        )
+        parser.add_argument(
+            "--text-chars",
+            type=int,
+            default=defaults.text_chars,
+            help="Characters of text Tika returns (default: half the file size).",
+        )
+        parser.add_argument(
+            "--claude-latency", type=float, default=defaults.claude_latency
+        )
+        parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens)
+        parser.add_argument(
+            "--build-iterations", type=int, default=defaults.build_iterations
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=runner.DEFAULT_BASELINE,
+            help="Baseline file to compare with (or to update).",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store these results as the new baseline.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed slowdown before a metric counts as a regression.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the results as JSON."
+        )
+
+    def handle(self, *args, **options):
+        config = runner.BenchmarkConfig(
+            uploads=options["uploads"],
+            concurrency=options["concurrency"],
+            sizes=options["sizes"],
+            tika_latency=options["tika_latency"],
+            tika_latency_per_mb=options["tika_latency_per_mb"],
+            text_chars=options["text_chars"],
+            claude_latency=options["claude_latency"],
+            output_tokens=options["output_tokens"],
+            build_iterations=options["build_iterations"],
+        )
+        results = runner.run(config, options["scenarios"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for name, summary in results.items():
+                self.stdout.write(
+                    f"{name:<9} {summary['throughput']:>9.2f}/s  "
+                    f"p50 {summary['p50_ms']:>9.3f} ms  "
+                    f"p95 {summary['p95_ms']:>9.3f} ms  "
+                    f"p99 {summary['p99_ms']:>9.3f} ms  "
+                    f"{summary['queries_per_op']:>6.2f} queries/op  "
+                    f"peak RSS {summary['peak_rss_mb']:.0f} MB"
+                )
+
+        if options["update_baseline"]:
+            runner.save_baseline(options["baseline"], config, results)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        baseline = runner.load_baseline(options["baseline"])
+        if baseline is None:
+            return
+        if baseline["parameters"] != config.parameters():
+            self.stdout.write(
+                "Baseline was recorded with other parameters; not comparing"
+            )
+            return
+        regressions = runner.compare(results, baseline, options["tolerance"])
+        if regressions:
+            raise CommandError("Regressions:\n" + "\n".join(regressions))
+        self.stdout.write("No regressions against the baseline")
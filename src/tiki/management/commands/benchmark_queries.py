@@ -0,0 +1,152 @@
+import time
+from datetime import timedelta
+
+from django.contrib.admin.sites import site
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tiki.models import DCATOutput, UploadedFile
+from tiki.services.jobs import IN_PROGRESS_STATUSES
+
+STATUS_MIX = [
+    # Mostly finished work, a thin slice still in flight, like production
+    (UploadedFile.Status.COMPLETED, 90),
+    (UploadedFile.Status.FAILED, 5),
+    (UploadedFile.Status.PENDING, 3),
+    (UploadedFile.Status.EXTRACTING, 1),
+    (UploadedFile.Status.ENRICHING, 1),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot upload queries against a synthetic table and print "
+        "query counts and plans. All rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100_000,
+            help="Number of synthetic uploads to create.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Runs per query; the median is reported.",
+        )
+        parser.add_argument(
+            "--explain", action="store_true", help="Print the query plans."
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._populate(options["rows"])
+            for name, run, queryset in self._cases():
+                self._measure(name, run, queryset, options)
+            transaction.set_rollback(True)
+
+    def _populate(self, rows):
+        now = timezone.now()
+        statuses = [status for status, share in STATUS_MIX for _ in range(share)]
+        uploads = [
+            UploadedFile(
+                file=f"uploads/bench/{i}.txt",
+                original_filename=f"{i}.txt",
+                file_size=12,
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(rows)
+        ]
+        created = UploadedFile.objects.bulk_create(uploads, batch_size=5000)
+        # Spread timestamps over a year so time-range filters are selective
+        for start in range(0, rows, 5000):
+            chunk = created[start : start + 5000]
+            for i, upload in enumerate(chunk, start):
+                upload.created_at = upload.updated_at = now - timedelta(minutes=i * 5)
+            UploadedFile.objects.bulk_update(chunk, ["created_at", "updated_at"])
+        DCATOutput.objects.bulk_create(
+            [
+                DCATOutput(upload=upload, jsonld={"@graph": []})
+                for upload in created
+                if upload.status == UploadedFile.Status.COMPLETED
+            ],
+            batch_size=5000,
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE tiki_uploadedfile")
+                cursor.execute("ANALYZE tiki_dcatoutput")
+        self.stdout.write(f"Created {rows} uploads")
+
+    def _cases(self):
+        now = timezone.now()
+        completed = (
+            UploadedFile.objects.filter(status=UploadedFile.Status.COMPLETED)
+            .values_list("id", flat=True)
+            .first()
+        )
+        pending = UploadedFile.objects.filter(
+            status=UploadedFile.Status.PENDING
+        ).order_by("created_at")
+        stale = UploadedFile.objects.filter(
+            status__in=IN_PROGRESS_STATUSES,
+            updated_at__lt=now - timedelta(minutes=30),
+        ).order_by()
+        recent_failures = UploadedFile.objects.filter(
+            status=UploadedFile.Status.FAILED,
+            created_at__gte=now - timedelta(days=7),
+        )
+        latest = UploadedFile.objects.all()
+        result = UploadedFile.objects.select_related("dcat_output").filter(
+            id=completed
+        )
+        changelist = RequestFactory().get(
+            "/admin/tiki/uploadedfile/", {"status__exact": "failed"}
+        )
+        changelist.user = _Superuser()
+        admin = site._registry[UploadedFile]
+
+        return [
+            ("oldest pending", lambda: pending.first(), pending[:1]),
+            ("stale in progress", lambda: list(stale.values("id")), stale),
+            ("recent failures", lambda: recent_failures.count(), recent_failures),
+            ("latest page", lambda: list(latest[:50]), latest[:50]),
+            ("result", lambda: result.get().dcat_output, result),
+            (
+                "admin failed filter",
+                lambda: admin.changelist_view(changelist).render(),
+                None,
+            ),
+        ]
+
+    def _measure(self, name, run, queryset, options):
+        timings = []
+        for _ in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+        timings.sort()
+        median = timings[len(timings) // 2] * 1000
+        self.stdout.write(f"{name:<22} {len(queries):>3} queries {median:>9.2f} ms")
+        if options["explain"] and queryset is not None:
+            self.stdout.write(queryset.explain())
+
+
+class _Superuser:
+    """Just enough of a user for the admin changelist."""
+
+    is_active = is_staff = is_superuser = True
+    pk = id = None
+
+    def has_perm(self, perm, obj=None):
+        return True
+
+    def has_module_perms(self, app_label):
+        return True
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tiki.services.claude_batches import ClaudeBatchRunner
+
+
+class Command(BaseCommand):
+    help = (
+        "Submit uploads queued for Claude enrichment as Message Batches and "
+        "collect the results of ended batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep submitting and collecting instead of running once.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Seconds between rounds with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            runner = ClaudeBatchRunner()
+        except RuntimeError as e:
+            raise CommandError(str(e)) from e
+
+        while True:
+            # Collect first so requeued (expired) requests join the next batch
+            collected = runner.collect()
+            submitted = 0
+            while batch := runner.submit():
+                submitted += batch.request_count
+            self.stdout.write(
+                f"Collected {collected} batches, submitted {submitted} requests"
+            )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
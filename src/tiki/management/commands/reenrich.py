@@ -0,0 +1,154 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from tiki.models import ReenrichmentRun, UploadedFile
+from tiki.services.reenrich import Reenricher, ReenrichError, ReenrichFilter
+
+
+def _moment(value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"not a date or datetime: {value}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run Claude enrichment and the DCAT build over stored uploads "
+        "(e.g. after changing CLAUDE_MODEL), resuming from the run's checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--run",
+            help="Name of the run to start or resume (default: a new timestamped run).",
+        )
+        parser.add_argument(
+            "--status",
+            nargs="+",
+            choices=UploadedFile.Status.values,
+            default=[UploadedFile.Status.COMPLETED.value],
+        )
+        parser.add_argument(
+            "--model",
+            nargs="+",
+            default=[],
+            help="Only uploads enriched by one of these models.",
+        )
+        parser.add_argument(
+            "--outdated",
+            action="store_true",
+            help="Only uploads not yet enriched by the current CLAUDE_MODEL.",
+        )
+        parser.add_argument(
+            "--needs-enrichment",
+            action="store_true",
+            help="Only uploads completed without Claude during an outage.",
+        )
+        parser.add_argument(
+            "--since", type=_moment, help="Uploaded at or after (ISO date/time)."
+        )
+        parser.add_argument(
+            "--until", type=_moment, help="Uploaded before (ISO date/time)."
+        )
+        parser.add_argument(
+            "--include-finalized",
+            action="store_true",
+            help="Also regenerate finalized records (user edits are kept).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Uploads enriched in parallel (default: TIKI_REENRICH_WORKERS).",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Claude requests per minute (default: TIKI_REENRICH_RATE).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Uploads per checkpoint (default: TIKI_REENRICH_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Start the named run over, with these filters.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many uploads match.",
+        )
+
+    def handle(self, *args, **options):
+        upload_filter = ReenrichFilter(
+            statuses=options["status"],
+            models=options["model"],
+            outdated=options["outdated"],
+            needs_enrichment=options["needs_enrichment"],
+            since=options["since"],
+            until=options["until"],
+            include_finalized=options["include_finalized"],
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{upload_filter.queryset().count()} uploads match")
+            return
+
+        try:
+            reenricher = Reenricher(
+                workers=options["workers"],
+                rate=options["rate"],
+                batch_size=options["batch_size"],
+            )
+        except ReenrichError as e:
+            raise CommandError(str(e)) from e
+
+        name = options["run"] or timezone.now().strftime("reenrich-%Y%m%d-%H%M%S")
+        run, created = ReenrichmentRun.objects.get_or_create(
+            name=name, defaults={"filters": upload_filter.as_dict()}
+        )
+        if not created:
+            if options["restart"]:
+                run.filters = upload_filter.as_dict()
+                run.last_upload_id = None
+                run.processed = run.skipped = run.failed = 0
+                run.finished_at = None
+                run.save()
+            elif run.filters != upload_filter.as_dict():
+                raise CommandError(
+                    f"Run {name} was started with other filters "
+                    f"({run.filters}); use --restart to start it over"
+                )
+            elif run.finished_at is not None:
+                self.stdout.write(f"Run {name} already finished")
+                return
+        self.stdout.write(
+            f"{'Starting' if created else 'Resuming'} run {name} "
+            f"({upload_filter.queryset().count()} uploads match)"
+        )
+
+        try:
+            report = reenricher.run(run, upload_filter, options["max_batches"])
+        except ReenrichError as e:
+            raise CommandError(f"{e}; rerun with --run {name} to resume") from e
+        self.stdout.write(
+            f"Re-enriched {report.processed}, skipped {report.skipped}, "
+            f"failed {report.failed} uploads"
+        )
+        if run.finished_at is None:
+            self.stdout.write(f"Not finished; rerun with --run {name} to continue")
@@ -0,0 +1,130 @@
+import logging
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tiki.services import metrics
+from tiki.services.jobs import (
+    StagedWorker,
+    Worker,
+    requeue_stale,
+    start_heartbeat,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run background workers that process pending uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.TIKI_WORKER_CONCURRENCY,
+            help="Number of worker threads in this process (threads mode).",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=["threads", "staged"],
+            default=settings.TIKI_WORKER_MODE,
+            help=(
+                "threads: each thread runs whole uploads; staged: each pipeline "
+                "stage has its own threads (TIKI_STAGE_CONCURRENCY)."
+            ),
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=settings.TIKI_WORKER_METRICS_PORT,
+            help="Serve Prometheus metrics on this port (0 disables).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        if options["metrics_port"]:
+            if not metrics.enabled():
+                raise CommandError("--metrics-port needs prometheus_client")
+            metrics.start_server(options["metrics_port"])
+        requeue_stale(timedelta(seconds=settings.TIKI_WORKER_STALE_AFTER))
+        start_heartbeat()
+        staged = options["mode"] == "staged"
+
+        if options["once"]:
+            if staged:
+                worker = StagedWorker()
+                processed = worker.run_once()
+                self._log_stats(worker)
+            else:
+                worker = Worker()
+                processed = 0
+                while worker.run_once():
+                    processed += 1
+            self.stdout.write(f"Processed {processed} uploads")
+            return
+
+        stop_event = threading.Event()
+
+        def _stop(signum, frame):
+            self.stdout.write("Stopping workers after current uploads...")
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        if staged:
+            worker = StagedWorker()
+            threads = [
+                threading.Thread(
+                    target=worker.run_forever, args=(stop_event,), name="tiki-feeder"
+                )
+            ]
+        else:
+            worker = None
+            threads = [
+                threading.Thread(
+                    target=Worker().run_forever,
+                    args=(stop_event,),
+                    name=f"tiki-worker-{i}",
+                )
+                for i in range(options["concurrency"])
+            ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {options['mode']} workers")
+
+        stale_after = timedelta(seconds=settings.TIKI_WORKER_STALE_AFTER)
+        requeue_every = stale_after.total_seconds() / 2
+        stats_every = settings.TIKI_STAGE_STATS_INTERVAL
+        tick = min(requeue_every, stats_every) if staged else requeue_every
+        last_requeue = last_stats = time.monotonic()
+        while not stop_event.wait(tick):
+            now = time.monotonic()
+            if now - last_requeue >= requeue_every:
+                requeue_stale(stale_after)
+                last_requeue = now
+            if staged and now - last_stats >= stats_every:
+                self._log_stats(worker)
+                last_stats = now
+
+        for thread in threads:
+            thread.join()
+        if staged:
+            self._log_stats(worker)
+
+    def _log_stats(self, worker):
+        for stage in worker.staged.stats():
+            logger.info(
+                "Stage %(stage)s: queue %(queue_depth)d/%(queue_size)d, "
+                "%(processed)d processed, %(failed)d failed, "
+                "%(throughput).2f/s",
+                stage,
+            )
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:30
+
+import gzip
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_full_text(apps, schema_editor):
+    TikaMetadata = apps.get_model("tiki", "TikaMetadata")
+    ExtractedText = apps.get_model("tiki", "ExtractedText")
+    rows = TikaMetadata.objects.exclude(full_text="").values_list(
+        "upload_id", "full_text"
+    )
+    for upload_id, text in rows.iterator(chunk_size=100):
+        ExtractedText.objects.create(
+            upload_id=upload_id,
+            codec="gzip",
+            data=gzip.compress(text.encode("utf-8")),
+            length=len(text),
+            original_length=len(text),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0003_upload_batch'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tikametadata',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codec', models.CharField(choices=[('none', 'None'), ('gzip', 'gzip'), ('zstd', 'Zstandard')], default='none', max_length=10)),
+                ('data', models.BinaryField(default=b'')),
+                ('length', models.PositiveBigIntegerField(default=0)),
+                ('original_length', models.PositiveBigIntegerField(default=0)),
+                ('upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='extracted_text', to='tiki.uploadedfile')),
+            ],
+        ),
+        migrations.RunPython(move_full_text, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='tikametadata',
+            name='full_text',
+        ),
+    ]
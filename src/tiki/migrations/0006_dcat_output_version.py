@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0005_claude_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dcatoutput',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
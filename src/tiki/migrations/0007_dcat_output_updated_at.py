@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0006_dcat_output_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dcatoutput',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='dcatoutput',
+            index=models.Index(condition=models.Q(('is_finalized', True)), fields=['updated_at', 'id'], name='tiki_dcat_finalized_keyset'),
+        ),
+    ]
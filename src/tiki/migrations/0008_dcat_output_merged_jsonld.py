@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:00
+
+import copy
+
+from django.db import migrations, models
+
+
+def materialize_merged_jsonld(apps, schema_editor):
+    DCATOutput = apps.get_model("tiki", "DCATOutput")
+    # Edits so far only set top-level fields of the dataset node
+    for output in DCATOutput.objects.exclude(user_edits={}).iterator(chunk_size=100):
+        merged = copy.deepcopy(output.jsonld)
+        dataset = merged.get("@graph", [{}])[0] if "@graph" in merged else merged
+        dataset.update(output.user_edits)
+        output.merged_jsonld = merged
+        output.save(update_fields=["merged_jsonld"])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0007_dcat_output_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dcatoutput',
+            name='merged_jsonld',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(materialize_merged_jsonld, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0008_dcat_output_merged_jsonld'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['-created_at'], name='tiki_upload_created'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['status', 'created_at'], name='tiki_upload_status'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'extracting', 'enriching'])), fields=['updated_at'], name='tiki_upload_active'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    # Admin search runs UPPER(original_filename::text) LIKE UPPER('%...%'),
+    # which only a trigram index on the same expression can serve
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("tiki", "UploadedFile")._meta.db_table
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS tiki_upload_filename_trgm ON {table} "
+        "USING gin (UPPER(original_filename::text) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS tiki_upload_filename_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0009_upload_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
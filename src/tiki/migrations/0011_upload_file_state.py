@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0010_upload_filename_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='file_state',
+            field=models.CharField(choices=[('present', 'Present'), ('compressed', 'Compressed'), ('deleted', 'Deleted')], default='present', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(condition=models.Q(('file_state', 'deleted'), _negated=True), fields=['updated_at'], name='tiki_upload_retained'),
+        ),
+    ]
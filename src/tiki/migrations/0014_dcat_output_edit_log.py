@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+def edits_to_log(apps, schema_editor):
+    DCATOutput = apps.get_model("tiki", "DCATOutput")
+    # {path: value} dicts become logs, read the way the dicts were replayed
+    for output in DCATOutput.objects.only("id", "user_edits").iterator(chunk_size=100):
+        if not isinstance(output.user_edits, dict):
+            continue
+        output.user_edits = [
+            {
+                "op": (
+                    "remove"
+                    if value is None
+                    else "add" if path.endswith("/-") else "replace"
+                ),
+                "path": path,
+                "value": value,
+            }
+            for path, value in output.user_edits.items()
+        ]
+        output.save(update_fields=["user_edits"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0013_reenrichment_runs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dcatoutput',
+            name='user_edits',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(edits_to_log, migrations.RunPython.noop),
+    ]
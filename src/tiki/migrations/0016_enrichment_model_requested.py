@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def requested_from_used(apps, schema_editor):
+    ClaudeEnrichment = apps.get_model("tiki", "ClaudeEnrichment")
+    # Best guess for existing rows; they matched on model_used until now
+    ClaudeEnrichment.objects.update(model_requested=F("model_used"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiki', '0015_upload_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claudeenrichment',
+            name='model_requested',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.RunPython(requested_from_used, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,19 @@
+from .batch import UploadBatch
+from .breaker import CircuitBreaker
+from .claude_batch import ClaudeBatch, ClaudeBatchRequest
+from .reenrichment import ReenrichmentRun
+from .text import ExtractedText
 from .upload import ClaudeEnrichment, DCATOutput, TikaMetadata, UploadedFile
 
-__all__ = ["UploadedFile", "TikaMetadata", "ClaudeEnrichment", "DCATOutput"]
+__all__ = [
+    "UploadBatch",
+    "UploadedFile",
+    "TikaMetadata",
+    "ClaudeEnrichment",
+    "DCATOutput",
+    "ExtractedText",
+    "ClaudeBatch",
+    "ClaudeBatchRequest",
+    "CircuitBreaker",
+    "ReenrichmentRun",
+]
@@ -0,0 +1,16 @@
+import uuid
+
+from django.db import models
+
+
+class UploadBatch(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    total_files = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name_plural = "upload batches"
+
+    def __str__(self):
+        return f"Batch {self.id} ({self.total_files} files)"
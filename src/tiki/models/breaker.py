@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class CircuitBreaker(models.Model):
+    """Shared state of a circuit breaker around an external service.
+
+    One row per service, read and updated by every web and worker process
+    (see services.breaker).
+    """
+
+    class State(models.TextChoices):
+        CLOSED = "closed", "Closed"
+        OPEN = "open", "Open"
+        HALF_OPEN = "half_open", "Half-open"
+
+    name = models.CharField(max_length=50, unique=True)
+    state = models.CharField(
+        max_length=20,
+        choices=State.choices,
+        default=State.CLOSED,
+    )
+    # Consecutive failures since the last success
+    failures = models.PositiveIntegerField(default=0)
+    # When the breaker opened, or when the current trial call started
+    opened_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} circuit ({self.state})"
@@ -0,0 +1,52 @@
+from django.db import models
+
+
+class ClaudeBatch(models.Model):
+    """A Message Batches API batch submitted for bulk enrichment."""
+
+    class Status(models.TextChoices):
+        IN_PROGRESS = "in_progress", "In progress"
+        COLLECTED = "collected", "Collected"
+
+    batch_id = models.CharField(max_length=100, unique=True)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.IN_PROGRESS,
+    )
+    request_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name_plural = "Claude batches"
+
+    def __str__(self):
+        return f"Claude batch {self.batch_id} ({self.status})"
+
+
+class ClaudeBatchRequest(models.Model):
+    """An upload waiting for, or included in, a Message Batches API batch.
+
+    Rows without a batch are queued for the next submission.
+    """
+
+    upload = models.OneToOneField(
+        "tiki.UploadedFile",
+        on_delete=models.CASCADE,
+        related_name="claude_batch_request",
+    )
+    batch = models.ForeignKey(
+        ClaudeBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="requests",
+    )
+    prompt = models.TextField(blank=True, default="")
+    params = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Claude batch request for upload {self.upload_id}"
@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class ReenrichmentRun(models.Model):
+    """Progress of a ``manage.py reenrich`` backfill, so it can be resumed.
+
+    Uploads are visited in id order; everything up to ``last_upload_id`` has
+    been handled.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    # The filters the run was started with, as given to ReenrichFilter
+    filters = models.JSONField(default=dict)
+    last_upload_id = models.UUIDField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Re-enrichment run {self.name}"
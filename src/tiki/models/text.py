@@ -0,0 +1,94 @@
+import gzip
+import io
+import logging
+import zlib
+from collections.abc import Iterator
+
+from django.conf import settings
+from django.db import models
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ExtractedText(models.Model):
+    """Full text extracted by Tika, stored apart from TikaMetadata.
+
+    Book-length documents would otherwise be pulled into every query touching
+    the metadata row. The text is compressed and capped at
+    TIKI_FULL_TEXT_MAX_CHARS; read it with ``get_text()`` or stream it with
+    ``iter_bytes()``.
+    """
+
+    class Codec(models.TextChoices):
+        NONE = "none", "None"
+        GZIP = "gzip", "gzip"
+        ZSTD = "zstd", "Zstandard"
+
+    upload = models.OneToOneField(
+        "tiki.UploadedFile",
+        on_delete=models.CASCADE,
+        related_name="extracted_text",
+    )
+    codec = models.CharField(max_length=10, choices=Codec.choices, default=Codec.NONE)
+    data = models.BinaryField(default=b"")
+    length = models.PositiveBigIntegerField(default=0)
+    original_length = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Extracted text for upload {self.upload_id}"
+
+    @property
+    def truncated(self):
+        return self.length < self.original_length
+
+    @classmethod
+    def from_text(cls, text: str, codec: str | None = None, **kwargs):
+        """Build an unsaved instance holding ``text``, capped and compressed."""
+        codec = codec or settings.TIKI_FULL_TEXT_CODEC
+        if codec == cls.Codec.ZSTD and zstandard is None:
+            logger.warning("zstandard is not installed, storing text with gzip")
+            codec = cls.Codec.GZIP
+
+        stored = text[: settings.TIKI_FULL_TEXT_MAX_CHARS]
+        raw = stored.encode("utf-8")
+        if codec == cls.Codec.GZIP:
+            data = gzip.compress(raw, compresslevel=6)
+        elif codec == cls.Codec.ZSTD:
+            data = zstandard.ZstdCompressor(level=3).compress(raw)
+        else:
+            data = raw
+        return cls(
+            codec=codec,
+            data=data,
+            length=len(stored),
+            original_length=len(text),
+            **kwargs,
+        )
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yield the UTF-8 encoded text in chunks, decompressing as it goes."""
+        data = bytes(self.data)
+        if self.codec == self.Codec.ZSTD:
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+            while chunk := reader.read(STREAM_CHUNK_SIZE):
+                yield chunk
+            return
+
+        decompressor = (
+            zlib.decompressobj(wbits=31) if self.codec == self.Codec.GZIP else None
+        )
+        for start in range(0, len(data), STREAM_CHUNK_SIZE):
+            chunk = data[start : start + STREAM_CHUNK_SIZE]
+            yield decompressor.decompress(chunk) if decompressor else chunk
+        if decompressor:
+            yield decompressor.flush()
+
+    def get_text(self) -> str:
+        return b"".join(self.iter_bytes()).decode("utf-8")
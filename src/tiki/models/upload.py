@@ -2,6 +2,9 @@ import copy
 import uuid
 
 from django.db import models
+from django.utils.functional import cached_property
+
+from .text import ExtractedText
 
 
 class UploadedFile(models.Model):
@@ -12,21 +15,74 @@ class UploadedFile(models.Model):
         COMPLETED = "completed", "Completed"
         FAILED = "failed", "Failed"
 
+    class FileState(models.TextChoices):
+        PRESENT = "present", "Present"
+        COMPRESSED = "compressed", "Compressed"
+        DELETED = "deleted", "Deleted"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     file = models.FileField(upload_to="uploads/%Y/%m/")
     original_filename = models.CharField(max_length=512)
     file_size = models.PositiveBigIntegerField()
+    content_hash = models.CharField(
+        max_length=64, blank=True, default="", db_index=True
+    )
+    skip_cache = models.BooleanField(default=False)
+    batch = models.ForeignKey(
+        "tiki.UploadBatch",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="uploads",
+    )
     status = models.CharField(
         max_length=20,
         choices=Status.choices,
         default=Status.PENDING,
     )
     error_message = models.TextField(blank=True, default="")
+    # Whether the original blob is still in storage (see services.retention)
+    file_state = models.CharField(
+        max_length=20,
+        choices=FileState.choices,
+        default=FileState.PRESENT,
+    )
+    # Completed without Claude because it was unavailable; re-enrich later
+    needs_enrichment = models.BooleanField(default=False)
+    # Refreshed while a live process works on the upload (see services.jobs);
+    # stale-job recovery leaves uploads with a recent heartbeat alone
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Default ordering (admin changelist, API listings)
+            models.Index(fields=["-created_at"], name="tiki_upload_created"),
+            # Status filters ordered by age, e.g. the oldest pending upload
+            models.Index(fields=["status", "created_at"], name="tiki_upload_status"),
+            # Stale-job scans only look at the few rows still in progress
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(
+                    status__in=["pending", "extracting", "enriching"]
+                ),
+                name="tiki_upload_active",
+            ),
+            # Retention scans skip the bulk of rows whose blob is already gone
+            models.Index(
+                fields=["updated_at"],
+                condition=~models.Q(file_state="deleted"),
+                name="tiki_upload_retained",
+            ),
+            # Re-enrichment only scans the few uploads completed without Claude
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(needs_enrichment=True),
+                name="tiki_upload_needs_enrichment",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.original_filename} ({self.status})"
@@ -41,7 +97,7 @@ class UploadedFile(models.Model):
 
     def mark_completed(self):
         self.status = self.Status.COMPLETED
-        self.save(update_fields=["status", "updated_at"])
+        self.save(update_fields=["status", "needs_enrichment", "updated_at"])
 
     def mark_failed(self, error):
         self.status = self.Status.FAILED
@@ -49,6 +105,18 @@ class UploadedFile(models.Model):
         self.save(update_fields=["status", "error_message", "updated_at"])
 
 
+class TikaMetadataQuerySet(models.QuerySet):
+    def with_raw_metadata(self):
+        return self.defer(None)
+
+
+class TikaMetadataManager(models.Manager.from_queryset(TikaMetadataQuerySet)):
+    """Defer ``raw_metadata``, which can be huge, unless explicitly requested."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer("raw_metadata")
+
+
 class TikaMetadata(models.Model):
     upload = models.OneToOneField(
         UploadedFile,
@@ -61,12 +129,23 @@ class TikaMetadata(models.Model):
     title = models.CharField(max_length=1024, blank=True, default="")
     created_date = models.DateTimeField(null=True, blank=True)
     modified_date = models.DateTimeField(null=True, blank=True)
-    full_text = models.TextField(blank=True, default="")
     raw_metadata = models.JSONField(default=dict)
 
+    objects = TikaMetadataManager()
+
+    class Meta:
+        # Also used for upload.tika_metadata, so related access defers too
+        base_manager_name = "objects"
+
     def __str__(self):
         return f"Tika metadata for {self.upload.original_filename}"
 
+    @cached_property
+    def full_text(self):
+        """Extracted text, loaded on demand from ExtractedText."""
+        text = ExtractedText.objects.filter(upload_id=self.upload_id).first()
+        return text.get_text() if text else ""
+
 
 class ClaudeEnrichment(models.Model):
     upload = models.OneToOneField(
@@ -80,6 +159,8 @@ class ClaudeEnrichment(models.Model):
     prompt_used = models.TextField(blank=True, default="")
     raw_response = models.JSONField(default=dict)
     model_used = models.CharField(max_length=100, blank=True, default="")
+    # CLAUDE_MODEL at the time, which may be an alias of model_used
+    model_requested = models.CharField(max_length=100, blank=True, default="")
 
     def __str__(self):
         return f"Claude enrichment for {self.upload.original_filename}"
@@ -93,16 +174,172 @@ class DCATOutput(models.Model):
     )
     jsonld = models.JSONField(default=dict)
     empty_fields = models.JSONField(default=list)
-    user_edits = models.JSONField(default=dict)
+    # Ordered log of {"op", "path", "value"} edits, replayed over jsonld.
+    # Older rows hold a {path: value} dict (see edit_log())
+    user_edits = models.JSONField(default=list)
+    # jsonld with user_edits applied, stored when edited; null if never edited
+    merged_jsonld = models.JSONField(null=True, blank=True)
     is_finalized = models.BooleanField(default=False)
+    # Bumped on every edit; keys the cache of rendered documents
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    EDIT_OPS = ("add", "replace", "remove")
+
+    class Meta:
+        indexes = [
+            # Keyset order of the catalogue export
+            models.Index(
+                fields=["updated_at", "id"],
+                condition=models.Q(is_finalized=True),
+                name="tiki_dcat_finalized_keyset",
+            ),
+        ]
 
     def __str__(self):
         return f"DCAT output for {self.upload.original_filename}"
 
     def get_merged_jsonld(self):
-        """Return JSON-LD with user edits applied."""
+        """Return JSON-LD with user edits applied.
+
+        The merged document is stored at edit time, so this doesn't copy;
+        don't modify the result.
+        """
+        if self.merged_jsonld is not None:
+            return self.merged_jsonld
+        if not self.user_edits:
+            return self.jsonld
+        return self._merge()
+
+    def apply_edits(self, edits):
+        """Apply ``(op, path, value)`` edits to the dataset node, JSON Patch style.
+
+        ``op`` is add, replace or remove; ``path`` is a JSON pointer into the
+        dataset (``/dct:publisher/foaf:name``) or a top-level field name.
+        Only the merged document is touched, never rebuilt. Raises
+        ValueError for an invalid op or path.
+        """
+        merged = self.get_merged_jsonld()
+        if merged is self.jsonld:
+            merged = copy.deepcopy(merged)
+        for op, path, value in edits:
+            if op not in self.EDIT_OPS:
+                raise ValueError(f"Unsupported op: {op}")
+            tokens = _pointer_tokens(path)
+            _patch(_dataset(merged), tokens, op, value)
+            self.user_edits = [
+                *self.edit_log(),
+                {"op": op, "path": path, "value": None if op == "remove" else value},
+            ]
+            if op != "remove" and tokens[0] in self.empty_fields:
+                self.empty_fields.remove(tokens[0])
+        self.merged_jsonld = merged
+        self.version += 1
+
+    def regenerate(self, jsonld, empty_fields):
+        """Replace the generated document (e.g. after re-enrichment), keeping
+        user edits; fields the user has filled stay out of ``empty_fields``.
+        """
+        filled = set()
+        for edit in self.edit_log():
+            tokens = _pointer_tokens(edit["path"])
+            if edit["op"] != "remove":
+                filled.add(tokens[0])
+            elif len(tokens) == 1:
+                filled.discard(tokens[0])
+        self.jsonld = jsonld
+        self.empty_fields = [name for name in empty_fields if name not in filled]
+        self.rebuild_merged_jsonld()
+        self.version += 1
+
+    def rebuild_merged_jsonld(self):
+        """Recompute the merged document, e.g. after user_edits was replaced."""
+        self.merged_jsonld = self._merge() if self.user_edits else None
+
+    def edit_log(self):
+        """Return user_edits as a list of ``{"op", "path", "value"}`` edits.
+
+        A ``{path: value}`` dict (older rows, or typed in the admin) is read
+        as before the log existed: None removes, a ``/-`` path appends, and
+        anything else replaces.
+        """
+        if isinstance(self.user_edits, dict):
+            return [
+                _legacy_edit(path, value) for path, value in self.user_edits.items()
+            ]
+        return list(self.user_edits or [])
+
+    def _merge(self):
         merged = copy.deepcopy(self.jsonld)
-        dataset = merged.get("@graph", [{}])[0] if "@graph" in merged else merged
-        for field_path, value in self.user_edits.items():
-            dataset[field_path] = value
+        for edit in self.edit_log():
+            _patch(
+                _dataset(merged),
+                _pointer_tokens(edit["path"]),
+                edit["op"],
+                edit.get("value"),
+            )
         return merged
+
+
+def _legacy_edit(path, value):
+    if value is None:
+        op = "remove"
+    elif path.endswith("/-"):
+        op = "add"
+    else:
+        op = "replace"
+    return {"op": op, "path": path, "value": value}
+
+
+def _dataset(jsonld):
+    return jsonld.get("@graph", [{}])[0] if "@graph" in jsonld else jsonld
+
+
+def _pointer_tokens(path):
+    """Split a JSON pointer (RFC 6901); a bare name is a top-level field."""
+    if not path:
+        raise ValueError("Empty path")
+    if not path.startswith("/"):
+        return [path]
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")
+    ]
+
+
+def _list_index(items, token, allow_end):
+    if not token.isdigit() or int(token) > len(items) - (0 if allow_end else 1):
+        raise ValueError(f"Invalid list index: {token}")
+    return int(token)
+
+
+def _patch(node, tokens, op, value):
+    *parents, last = tokens
+    for token in parents:
+        if isinstance(node, list):
+            node = node[_list_index(node, token, allow_end=False)]
+            continue
+        child = node.get(token)
+        if not isinstance(child, (dict, list)):
+            if op == "remove":
+                raise ValueError(f"Path not found: {token}")
+            # Missing parents (or placeholders such as "") become objects
+            child = node[token] = {}
+        node = child
+
+    if isinstance(node, list):
+        if op == "add" and last == "-":
+            node.append(value)
+            return
+        index = _list_index(node, last, allow_end=op == "add")
+        if op == "add":
+            node.insert(index, value)
+        elif op == "replace":
+            node[index] = value
+        else:
+            del node[index]
+    elif op == "remove":
+        if last not in node:
+            raise ValueError(f"Path not found: {last}")
+        del node[last]
+    else:
+        node[last] = value
@@ -0,0 +1,341 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from tiki.models import UploadBatch, UploadedFile
+from tiki.uploadhandler import StoredUploadedFile
+
+from .bulk import BulkWriter
+from .dedup import compute_content_hash
+from .jobs import claim, claim_batch, requeue_stale, start_heartbeat
+from .pipeline import EnrichmentPipeline, PipelineJob
+
+logger = logging.getLogger(__name__)
+
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pipeline: EnrichmentPipeline | None = None
+_recovery: threading.Thread | None = None
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _is_zip(uploaded_file) -> bool:
+    if not (
+        uploaded_file.name.lower().endswith(".zip")
+        or getattr(uploaded_file, "content_type", "") in ZIP_CONTENT_TYPES
+    ):
+        return False
+    is_zip = zipfile.is_zipfile(uploaded_file)
+    uploaded_file.seek(0)
+    return is_zip
+
+
+class _ByteBudget:
+    """Bytes a batch may still store; exceeding it raises BatchError."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    def charge(self, size: int) -> None:
+        self.used += size
+        if self.limit and self.used > self.limit:
+            raise BatchError(
+                f"A batch may contain at most {self.limit} bytes (uncompressed)"
+            )
+
+
+class _MemberReader:
+    """Read a zip member once, hashing it and charging the bytes actually
+    decompressed to the batch (the sizes in a zip's headers can lie)."""
+
+    def __init__(self, stream, budget: _ByteBudget):
+        self.stream = stream
+        self.budget = budget
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.budget.charge(len(data))
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+    def close(self):
+        self.stream.close()
+
+
+class _ZipMember(StoredUploadedFile):
+    """A zip member written to storage by ``iter_batch_files``."""
+
+
+def _store_member(
+    archive: zipfile.ZipFile, info: zipfile.ZipInfo, name: str, budget: _ByteBudget
+) -> _ZipMember:
+    field = UploadedFile._meta.get_field("file")
+    storage = field.storage
+    reader = _MemberReader(archive.open(info), budget)
+    target = storage.get_available_name(field.generate_filename(None, name))
+    try:
+        storage_name = storage.save(target, File(reader, name=name))
+    except BaseException:
+        # A member cut off by the budget may have been partly written
+        if storage.exists(target):
+            storage.delete(target)
+        raise
+    finally:
+        reader.close()
+    return _ZipMember(
+        file=None,
+        name=name,
+        storage_name=storage_name,
+        content_type=None,
+        size=reader.size,
+        charset=None,
+        content_hash=reader.digest.hexdigest(),
+    )
+
+
+def iter_batch_files(files: Iterable, max_bytes: int | None = None) -> Iterator[File]:
+    """Yield the files of a batch, expanding zip archives into their members.
+
+    Members are decompressed once, straight into storage, and hashed on the
+    way. A batch may hold at most ``max_bytes`` (TIKI_BATCH_MAX_BYTES) in
+    total, counted as the members are read, so a zip bomb is cut off early.
+    """
+    budget = _ByteBudget(
+        settings.TIKI_BATCH_MAX_BYTES if max_bytes is None else max_bytes
+    )
+    for uploaded_file in files:
+        if not _is_zip(uploaded_file):
+            budget.charge(uploaded_file.size)
+            yield uploaded_file
+            continue
+        with zipfile.ZipFile(uploaded_file) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith(".") or (
+                    info.filename.startswith("__MACOSX/")
+                ):
+                    continue
+                yield _store_member(archive, info, name, budget)
+
+
+def create_batch(files: list, skip_cache: bool = False) -> UploadBatch:
+    """Store every file of a batch and create their uploads in one INSERT."""
+    max_files = settings.TIKI_BATCH_MAX_FILES
+    uploads = []
+    stored = []
+    try:
+        for batch_file in iter_batch_files(files):
+            if isinstance(batch_file, _ZipMember):
+                stored.append(batch_file)
+            if len(uploads) >= max_files:
+                raise BatchError(f"A batch may contain at most {max_files} files")
+            uploads.append(
+                UploadedFile(
+                    file=getattr(batch_file, "storage_name", batch_file),
+                    original_filename=batch_file.name,
+                    file_size=batch_file.size,
+                    content_hash=compute_content_hash(batch_file),
+                    skip_cache=skip_cache,
+                )
+            )
+        if not uploads:
+            raise BatchError("No files provided")
+
+        with transaction.atomic():
+            batch = UploadBatch.objects.create(total_files=len(uploads))
+            for upload in uploads:
+                upload.batch = batch
+            UploadedFile.objects.bulk_create(uploads)
+    except BaseException:
+        # Zip members stored before the batch was refused
+        storage = UploadedFile._meta.get_field("file").storage
+        for member in stored:
+            storage.delete(member.storage_name)
+        raise
+
+    # Streamed archives were only kept until their members had been stored
+    for uploaded_file in files:
+        if isinstance(uploaded_file, StoredUploadedFile) and _is_zip(uploaded_file):
+            uploaded_file.delete()
+    return batch
+
+
+def batch_progress(batch: UploadBatch) -> dict:
+    """Summarise per-file status and aggregate progress of a batch."""
+    counts = dict(
+        batch.uploads.order_by()
+        .values_list("status")
+        .annotate(count=Count("id"))
+    )
+    done = counts.get(UploadedFile.Status.COMPLETED, 0) + counts.get(
+        UploadedFile.Status.FAILED, 0
+    )
+    files = [
+        {
+            "id": str(upload["id"]),
+            "original_filename": upload["original_filename"],
+            "status": upload["status"],
+            **({"error": upload["error_message"]} if upload["error_message"] else {}),
+        }
+        for upload in batch.uploads.order_by("created_at", "id").values(
+            "id", "original_filename", "status", "error_message"
+        )
+    ]
+    return {
+        "id": str(batch.id),
+        "total": batch.total_files,
+        "counts": counts,
+        "progress": done / batch.total_files if batch.total_files else 1.0,
+        "done": done == batch.total_files,
+        "files": files,
+    }
+
+
+def _get_pipeline() -> EnrichmentPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = EnrichmentPipeline()
+    return _pipeline
+
+
+def process_upload(upload_id, tika_future: Future | None = None) -> None:
+    """Run the pipeline for one upload unless a queue worker claimed it."""
+    close_old_connections()
+    try:
+        upload = claim(upload_id)
+        if upload is None:
+            return
+        try:
+            _get_pipeline().run(upload, tika_future=tika_future)
+        except Exception:
+            # The pipeline has already logged and marked the upload failed
+            pass
+    finally:
+        connection.close()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TIKI_BATCH_CONCURRENCY,
+                thread_name_prefix="tiki-batch",
+            )
+    return _executor
+
+
+def submit_upload(upload: UploadedFile, tika_future: Future | None = None) -> None:
+    """Process a single pending upload in the background thread pool."""
+    executor = _get_executor()
+    transaction.on_commit(
+        lambda: executor.submit(process_upload, upload.pk, tika_future)
+    )
+
+
+def compute_upload(writer: BulkWriter, job: PipelineJob) -> None:
+    """Run the pipeline for a claimed batch upload and hand the job to
+    ``writer``, which stores it together with the rest of the batch."""
+    close_old_connections()
+    try:
+        try:
+            writer.pipeline.compute(job)
+        except Exception as e:
+            writer.add_failure(job, e)
+        else:
+            writer.add(job)
+    finally:
+        connection.close()
+
+
+def submit_batch(batch: UploadBatch) -> None:
+    """Fan a batch out over the process-wide bounded thread pool.
+
+    The batch's uploads are claimed and looked up in the result cache with
+    one query each, and their results are written in bulk, so a batch costs
+    a few queries per TIKI_BULK_FLUSH_SIZE files rather than several per file.
+    """
+    pipeline = _get_pipeline()
+    uploads = claim_batch(batch.id)
+    if not uploads:
+        return
+    cached = pipeline.result_cache.lookup_many(uploads)
+    writer = BulkWriter(pipeline, expected=len(uploads))
+    executor = _get_executor()
+    for upload in uploads:
+        job = PipelineJob(upload=upload, cached=cached.get(str(upload.id)))
+        executor.submit(compute_upload, writer, job)
+
+
+def recover_uploads() -> int:
+    """Run uploads a previous web process left behind on this one's pool.
+
+    Without TIKI_ASYNC_ENRICH no queue worker picks up uploads lost when a
+    web process restarts: stale in-progress ones are requeued, and any
+    upload pending for longer than TIKI_WORKER_STALE_AFTER is submitted
+    again (claiming keeps a duplicate from running twice).
+    """
+    stale_after = timedelta(seconds=settings.TIKI_WORKER_STALE_AFTER)
+    requeue_stale(stale_after)
+    upload_ids = list(
+        UploadedFile.objects.filter(
+            status=UploadedFile.Status.PENDING,
+            created_at__lt=timezone.now() - stale_after,
+        )
+        .order_by("created_at")
+        .values_list("id", flat=True)
+    )
+    executor = _get_executor()
+    for upload_id in upload_ids:
+        executor.submit(process_upload, upload_id)
+    if upload_ids:
+        logger.warning("Resubmitted %d orphaned uploads", len(upload_ids))
+    return len(upload_ids)
+
+
+def start_recovery() -> None:
+    """Run recover_uploads now and every TIKI_WORKER_STALE_AFTER / 2 seconds
+    on a daemon thread, once per process, and keep this process's claimed
+    uploads from being recovered by others."""
+    global _recovery
+    start_heartbeat()
+    with _executor_lock:
+        if _recovery is None:
+            _recovery = threading.Thread(
+                target=_recover_forever, name="tiki-recovery", daemon=True
+            )
+            _recovery.start()
+
+
+def _recover_forever() -> None:
+    interval = settings.TIKI_WORKER_STALE_AFTER / 2
+    while True:
+        close_old_connections()
+        try:
+            recover_uploads()
+        except Exception:
+            logger.exception("Recovering orphaned uploads failed")
+        finally:
+            connection.close()
+        time.sleep(interval)
@@ -0,0 +1,205 @@
+"""Circuit breakers for the Tika server and the Claude API.
+
+After TIKI_BREAKER_FAILURES consecutive outage errors a breaker opens and
+calls fail immediately with CircuitOpenError instead of waiting out
+timeouts. After TIKI_BREAKER_RESET_AFTER seconds one trial call is let
+through; its success closes the breaker, its failure opens it again.
+
+State is kept in the database (models.CircuitBreaker), so all web and worker
+processes share it. Each process re-reads it at most every
+TIKI_BREAKER_REFRESH seconds and writes only when it changes.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tiki.models import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+State = CircuitBreaker.State
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose breaker is open."""
+
+
+class Breaker:
+    """A named circuit breaker. ``is_failure`` decides which errors count as
+    an outage; others (e.g. a document Tika cannot parse) pass through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        is_failure: Callable[[Exception], bool] = lambda error: True,
+        failure_threshold: int | None = None,
+        reset_after: float | None = None,
+        refresh_interval: float | None = None,
+    ):
+        self.name = name
+        self.is_failure = is_failure
+        self._failure_threshold = failure_threshold
+        self._reset_after = reset_after
+        self._refresh_interval = refresh_interval
+        self._row: CircuitBreaker | None = None
+        self._fetched = 0.0
+
+    @property
+    def failure_threshold(self) -> int:
+        """Consecutive failures that open the breaker; 0 disables it."""
+        if self._failure_threshold is None:
+            return settings.TIKI_BREAKER_FAILURES
+        return self._failure_threshold
+
+    @property
+    def reset_after(self) -> float:
+        if self._reset_after is None:
+            return settings.TIKI_BREAKER_RESET_AFTER
+        return self._reset_after
+
+    @property
+    def refresh_interval(self) -> float:
+        if self._refresh_interval is None:
+            return settings.TIKI_BREAKER_REFRESH
+        return self._refresh_interval
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call ``func`` unless the breaker is open, and record the outcome."""
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func: Callable[..., Awaitable], *args, **kwargs):
+        """Async variant of ``call``."""
+        if not self.failure_threshold:
+            return await func(*args, **kwargs)
+        await sync_to_async(self.before_call)()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                await sync_to_async(self.record_failure)(e)
+            raise
+        await sync_to_async(self.record_success)()
+        return result
+
+    def available(self) -> bool:
+        """False while the breaker is open and not yet due for a trial call."""
+        if not self.failure_threshold:
+            return True
+        row = self.state()
+        return row.state == State.CLOSED or self._trial_due(row)
+
+    def state(self) -> CircuitBreaker:
+        """The breaker's row, re-read once ``refresh_interval`` has passed."""
+        if self._row is None or time.monotonic() - self._fetched >= (
+            self.refresh_interval
+        ):
+            self._refresh()
+        return self._row
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead."""
+        if not self.failure_threshold:
+            return
+        row = self.state()
+        if row.state == State.CLOSED:
+            return
+        if self._trial_due(row):
+            # Let exactly one caller, across all processes, make the trial call
+            now = timezone.now()
+            trial = CircuitBreaker.objects.filter(
+                name=self.name, state=row.state, opened_at=row.opened_at
+            ).update(state=State.HALF_OPEN, opened_at=now, updated_at=now)
+            self._refresh()
+            if trial:
+                logger.info("%s circuit half-open, trying one call", self.name)
+                return
+        raise CircuitOpenError(
+            f"{self.name} is unavailable (circuit open after "
+            f"{row.failures} consecutive failures)"
+        )
+
+    def record_success(self) -> None:
+        if not self.failure_threshold:
+            return
+        row = self.state()
+        if row.state == State.CLOSED and not row.failures:
+            return
+        closed = (
+            CircuitBreaker.objects.filter(name=self.name)
+            .exclude(state=State.CLOSED, failures=0)
+            .update(
+                state=State.CLOSED,
+                failures=0,
+                opened_at=None,
+                updated_at=timezone.now(),
+            )
+        )
+        if closed and row.state != State.CLOSED:
+            logger.warning("%s circuit closed", self.name)
+        self._refresh()
+
+    def record_failure(self, error: Exception) -> None:
+        if not self.failure_threshold:
+            return
+        now = timezone.now()
+        CircuitBreaker.objects.filter(name=self.name).update(
+            failures=F("failures") + 1, updated_at=now
+        )
+        # A failed trial call reopens at once
+        opened = (
+            CircuitBreaker.objects.filter(name=self.name)
+            .filter(
+                Q(state=State.HALF_OPEN)
+                | Q(state=State.CLOSED, failures__gte=self.failure_threshold)
+            )
+            .update(state=State.OPEN, opened_at=now, updated_at=now)
+        )
+        if opened:
+            logger.error("%s circuit opened: %s", self.name, error)
+        self._refresh()
+
+    def _trial_due(self, row: CircuitBreaker) -> bool:
+        return row.opened_at is None or timezone.now() - row.opened_at >= timedelta(
+            seconds=self.reset_after
+        )
+
+    def _refresh(self) -> None:
+        self._row, _ = CircuitBreaker.objects.get_or_create(name=self.name)
+        self._fetched = time.monotonic()
+
+
+_breakers: dict[str, Breaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(
+    name: str, is_failure: Callable[[Exception], bool] = lambda error: True
+) -> Breaker:
+    """Return the process-wide breaker called ``name``, creating it once."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = Breaker(name, is_failure)
+        return _breakers[name]
+
+
+def reset() -> None:
+    """Forget the process-wide breakers and their cached state (for tests)."""
+    with _breakers_lock:
+        _breakers.clear()
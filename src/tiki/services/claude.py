@@ -1,26 +1,185 @@
+import asyncio
 import json
 import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Callable
 from dataclasses import dataclass, field
+from datetime import datetime
 
 import anthropic
 from django.conf import settings
 
+from .breaker import Breaker, get_breaker
+from .text_selection import select_text
+
 logger = logging.getLogger(__name__)
 
 TEXT_TRUNCATE_LIMIT = 4000
+MAX_OUTPUT_TOKENS = 1024
+
+# Statuses worth retrying: timeouts, conflicts, rate limits, server errors and
+# Anthropic's 529 "overloaded"
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Limit kinds reported in anthropic-ratelimit-<kind>-remaining/-reset headers
+RATE_LIMIT_KINDS = ["requests", "tokens", "input-tokens", "output-tokens"]
+
+THEME_BASE_URI = "http://publications.europa.eu/resource/authority/data-theme/"
+
+# The EU Publications Office data-theme authority table used by DCAT-AP (all
+# 14 concepts), with scope notes that say what belongs under each theme and
+# which neighbouring theme to prefer for borderline documents
+DATA_THEMES = {
+    "AGRI": (
+        "Agriculture, fisheries, forestry and food",
+        "Farming, crops, livestock, animal health, fisheries, aquaculture, "
+        "forestry and timber, food production and processing, food safety and "
+        "labelling, agricultural subsidies and the Common Agricultural Policy, "
+        "and rural development. Land cover and soil data belong here when the "
+        "purpose is agricultural; otherwise prefer ENVI.",
+    ),
+    "ECON": (
+        "Economy and finance",
+        "Public finance, budgets and spending, taxation, trade and customs, "
+        "businesses and company registers, employment and labour market "
+        "statistics, wages, prices and inflation, markets, banking, insurance "
+        "and macroeconomic indicators such as GDP. Tourism statistics and "
+        "industrial output also belong here. Procurement notices are GOVE.",
+    ),
+    "EDUC": (
+        "Education, culture and sport",
+        "Schools, universities, vocational training, qualifications, student "
+        "and teacher statistics, libraries, archives, museums, cultural "
+        "heritage and monuments, the arts, media and broadcasting, sport, "
+        "recreation and leisure. Research funding and scientific output are "
+        "TECH unless the document is about education itself.",
+    ),
+    "ENER": (
+        "Energy",
+        "Energy production and consumption, supply and security of supply, "
+        "renewables (wind, solar, hydro, biomass), fossil fuels, nuclear "
+        "power, electricity and gas networks, energy prices, energy "
+        "efficiency and the energy performance of buildings. Emissions from "
+        "energy use are ENVI as well when the document focuses on them.",
+    ),
+    "ENVI": (
+        "Environment",
+        "Climate and climate change, weather and meteorology, air quality, "
+        "water quality and water resources, biodiversity, protected areas, "
+        "land use and land cover, soil, waste and recycling, noise, "
+        "pollution, greenhouse gas emissions, natural hazards such as floods "
+        "and natural resources. Environmental monitoring networks and "
+        "environmental impact assessments belong here.",
+    ),
+    "GOVE": (
+        "Government and public sector",
+        "Public administration and its organisation, elections and voting, "
+        "parliamentary work and legislation in progress, public procurement "
+        "and tenders, public services, public sector staff, official "
+        "registers of public bodies, open data portals and government "
+        "transparency such as spending and lobbying registers. Adopted laws "
+        "and court decisions are JUST.",
+    ),
+    "HEAL": (
+        "Health",
+        "Public health, healthcare services and facilities, hospitals, "
+        "diseases and epidemiology, vaccination, medicines and medical "
+        "devices, health insurance, health workforce, mortality and causes of "
+        "death, mental health, nutrition and wellbeing. Food safety is AGRI; "
+        "social care without a medical focus is SOCI.",
+    ),
+    "INTR": (
+        "International issues",
+        "International relations, foreign affairs, diplomacy, development aid "
+        "and cooperation, treaties and international agreements, "
+        "international organisations, humanitarian aid, defence cooperation "
+        "and migration and asylum seen between countries. Domestic "
+        "population statistics on migrants are SOCI.",
+    ),
+    "JUST": (
+        "Justice, legal system and public safety",
+        "Courts and case law, adopted legislation and legal acts, law "
+        "enforcement and policing, crime and criminal justice statistics, "
+        "prisons, legal aid, emergency services, fire services, civil "
+        "protection, road safety enforcement and public safety. Draft "
+        "legislation still being debated is GOVE.",
+    ),
+    "OP_DATPRO": (
+        "Provisional data",
+        "Data published before final validation: preliminary or provisional "
+        "statistics, flash estimates, early releases and figures explicitly "
+        "marked as subject to revision. Use it in addition to the subject "
+        "theme, never on its own, and only when the document says the data "
+        "is provisional.",
+    ),
+    "REGI": (
+        "Regions and cities",
+        "Regional and urban development, local and regional government, "
+        "spatial and urban planning, zoning, addresses and postcodes, "
+        "administrative boundaries, cadastral parcels, place names, regional "
+        "policy and cohesion funds and statistics broken down by region or "
+        "city. Prefer the subject theme when a document only happens to be "
+        "regional in scope.",
+    ),
+    "SOCI": (
+        "Population and society",
+        "Demographics, censuses, births, marriages and households, social "
+        "welfare and social security, pensions, housing, poverty and social "
+        "inclusion, equality and discrimination, gender, religion, languages, "
+        "disability, social care, living conditions and the resident migrant "
+        "population.",
+    ),
+    "TECH": (
+        "Science and technology",
+        "Scientific research and research funding, innovation, information "
+        "and communication technology, telecommunications and broadband, the "
+        "digital economy, artificial intelligence, cybersecurity, space, "
+        "satellite and Earth observation programmes, patents and "
+        "intellectual property and research data infrastructures.",
+    ),
+    "TRAN": (
+        "Transport",
+        "Roads, rail, aviation, shipping, ports and inland waterways, public "
+        "transport and timetables, traffic volumes and congestion, road "
+        "accidents, vehicles and registrations, mobility, cycling and walking, "
+        "freight and logistics and transport infrastructure projects.",
+    ),
+}
 
 SYSTEM_PROMPT = """\
 You are a metadata enrichment assistant. Given document metadata and text, \
 produce a JSON object with these keys:
-- "themes": a list of EU Data Theme URIs from \
-http://publications.europa.eu/resource/authority/data-theme (e.g. \
-"http://publications.europa.eu/resource/authority/data-theme/GOVE")
+- "themes": a list of 1-3 EU Data Theme URIs, chosen only from the vocabulary \
+below (e.g. "http://publications.europa.eu/resource/authority/data-theme/GOVE")
 - "description": a concise description of the document suitable for a \
 DCAT-AP dataset record (2-4 sentences)
 - "keywords": a list of 3-8 relevant keywords as strings
 
 Respond with ONLY valid JSON, no markdown fences or extra text."""
 
+# Identical for every request, so it is sent as a cached system block
+THEME_VOCABULARY = (
+    "EU Data Theme vocabulary (URI: label - scope):\n"
+    + "\n".join(
+        f"- {THEME_BASE_URI}{code}: {label} - {scope}"
+        for code, (label, scope) in DATA_THEMES.items()
+    )
+    + "\n\nChoosing themes: pick the theme the document is mainly about "
+    "first, then at most two others that a person searching a data catalogue "
+    "would also expect. Judge by the subject of the data, not by who "
+    "published it: a ministry's budget is ECON, not GOVE. Add OP_DATPRO only "
+    "alongside a subject theme."
+)
+
+# Anthropic ignores cache_control on a prefix shorter than this many tokens
+# (1024 for Sonnet and Opus models; 2048 for Haiku), so SYSTEM_PROMPT plus
+# THEME_VOCABULARY must stay above it for cache reads to happen
+MIN_CACHEABLE_TOKENS = 1024
+
 
 @dataclass
 class ClaudeResult:
@@ -29,14 +188,307 @@ class ClaudeResult:
     suggested_keywords: list[str] = field(default_factory=list)
     prompt_used: str = ""
     raw_response: dict = field(default_factory=dict)
+    # The model the API reports, e.g. a dated snapshot behind an alias
     model_used: str = ""
+    # The CLAUDE_MODEL that was asked for; what reuse decisions compare
+    model_requested: str = ""
+
+
+def _parse_reset(value: str) -> float | None:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _retry_after(headers) -> float | None:
+    try:
+        return max(float(headers.get("retry-after", "")), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitBudget:
+    """Requests- and tokens-per-minute budget shared by every Claude call.
+
+    Callers reserve capacity before each request. The local sliding-window
+    limits come from settings and are tightened by the rate-limit headers the
+    API returns, so concurrent callers wait instead of provoking 429s.
+    A limit of 0 disables the local window for that dimension.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._log: deque[list] = deque()  # [timestamp, tokens] per request
+        self._remaining: dict[str, tuple[int, float]] = {}
+        self._paused_until = 0.0
+
+    def acquire(self, tokens: int) -> list:
+        """Block until a request of ``tokens`` fits, then reserve it."""
+        while True:
+            reservation, wait = self.try_acquire(tokens)
+            if reservation is not None:
+                return reservation
+            self._sleep(wait)
+
+    async def aacquire(self, tokens: int) -> list:
+        """Async variant of ``acquire``."""
+        while True:
+            reservation, wait = self.try_acquire(tokens)
+            if reservation is not None:
+                return reservation
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, tokens: int) -> tuple[list | None, float]:
+        """Reserve capacity if available, else return how long to wait."""
+        with self._lock:
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                return None, wait
+            entry = [self._clock(), tokens]
+            self._log.append(entry)
+            self._consume_remaining(tokens)
+            return entry, 0.0
+
+    def settle(self, reservation: list, tokens: int) -> None:
+        """Replace a reservation's estimate with the tokens actually used."""
+        with self._lock:
+            reservation[1] = tokens
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller, e.g. for a Retry-After from a 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def update_from_headers(self, headers) -> None:
+        with self._lock:
+            for kind in RATE_LIMIT_KINDS:
+                remaining = headers.get(f"anthropic-ratelimit-{kind}-remaining")
+                reset = _parse_reset(
+                    headers.get(f"anthropic-ratelimit-{kind}-reset") or ""
+                )
+                if remaining is None or reset is None:
+                    continue
+                try:
+                    self._remaining[kind] = (int(remaining), reset)
+                except ValueError:
+                    continue
+
+    def _wait_time(self, tokens: int) -> float:
+        now = self._clock()
+        while self._log and self._log[0][0] <= now - self.WINDOW:
+            self._log.popleft()
+
+        waits = [self._paused_until - now]
+        if self.requests_per_minute and len(self._log) >= self.requests_per_minute:
+            waits.append(self._log[0][0] + self.WINDOW - now)
+        if self.tokens_per_minute:
+            used = sum(entry[1] for entry in self._log)
+            # A single oversized request is let through once the window is empty
+            if used and used + tokens > self.tokens_per_minute:
+                waits.append(self._log[0][0] + self.WINDOW - now)
+        for kind, (remaining, reset) in self._remaining.items():
+            needed = 1 if kind == "requests" else tokens
+            if remaining < needed and reset > now:
+                waits.append(reset - now)
+        return max(waits)
+
+    def _consume_remaining(self, tokens: int) -> None:
+        # Count our own request against the last reported remaining capacity
+        # until fresh headers arrive
+        for kind, (remaining, reset) in self._remaining.items():
+            used = 1 if kind == "requests" else tokens
+            self._remaining[kind] = (remaining - used, reset)
+
+
+class ClaudeScheduler:
+    """Run Claude requests concurrently within the account's rate limits.
+
+    At most ``max_concurrency`` requests are in flight per process. Each
+    request first reserves capacity from the shared RateLimitBudget.
+    Retryable failures are retried with full-jitter exponential backoff, or
+    after the server's Retry-After if one is given.
+    """
+
+    def __init__(
+        self,
+        budget: RateLimitBudget,
+        max_concurrency: int,
+        max_retries: int,
+        backoff: float,
+        backoff_max: float,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.budget = budget
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._sleep = sleep
+
+    def call(self, send: Callable, estimated_tokens: int):
+        """Call ``send`` (returning a raw API response) and parse the message."""
+        attempt = 0
+        while True:
+            reservation = self.budget.acquire(estimated_tokens)
+            try:
+                with self._slots:
+                    raw = send()
+                return self._accept(reservation, raw.headers, raw.parse())
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                delay = self._retry_delay(reservation, e, attempt)
+            attempt += 1
+            self._sleep(delay)
+
+    async def acall(self, send: Callable, estimated_tokens: int):
+        """Async variant of ``call``; ``send`` returns an awaitable raw response.
+
+        Concurrency is limited per event loop, the budget is shared with
+        synchronous callers in the same process.
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.setdefault(
+            loop, asyncio.Semaphore(self.max_concurrency)
+        )
+        attempt = 0
+        while True:
+            reservation = await self.budget.aacquire(estimated_tokens)
+            try:
+                async with slots:
+                    raw = await send()
+                return self._accept(reservation, raw.headers, await raw.parse())
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                delay = self._retry_delay(reservation, e, attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _accept(self, reservation: list, headers, message):
+        self.budget.update_from_headers(headers)
+        # Cache reads don't count towards the input-token limit
+        usage = message.usage
+        self.budget.settle(
+            reservation,
+            usage.input_tokens
+            + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+            + usage.output_tokens,
+        )
+        return message
+
+    def _retry_delay(self, reservation: list, error: Exception, attempt: int) -> float:
+        """Return the delay before retrying ``error``, or re-raise it."""
+        self.budget.settle(reservation, 0)
+        delay = None
+        if isinstance(error, anthropic.APIStatusError):
+            self.budget.update_from_headers(error.response.headers)
+            if error.status_code not in RETRYABLE_STATUS_CODES:
+                raise error
+            if attempt < self.max_retries:
+                delay = _retry_after(error.response.headers)
+                if delay is not None:
+                    self.budget.pause(delay)
+        if attempt >= self.max_retries:
+            raise error
+
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+        logger.warning(
+            "Claude request failed, retry %d/%d in %.1fs",
+            attempt + 1,
+            self.max_retries,
+            delay,
+        )
+        return delay
+
+
+_scheduler: ClaudeScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ClaudeScheduler:
+    """Return the process-wide scheduler so all threads share one budget."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ClaudeScheduler(
+                budget=RateLimitBudget(
+                    requests_per_minute=settings.CLAUDE_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=settings.CLAUDE_TOKENS_PER_MINUTE,
+                ),
+                max_concurrency=settings.CLAUDE_MAX_CONCURRENCY,
+                max_retries=settings.CLAUDE_MAX_RETRIES,
+                backoff=settings.CLAUDE_RETRY_BACKOFF,
+                backoff_max=settings.CLAUDE_RETRY_BACKOFF_MAX,
+            )
+        return _scheduler
+
+
+def is_outage(error: Exception) -> bool:
+    """Whether ``error`` (after the scheduler's retries) means Claude is
+    unavailable, as opposed to a request it rejected.
+    """
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, anthropic.APIConnectionError)
+
+
+def is_configured() -> bool:
+    """Whether ANTHROPIC_API_KEY looks like a usable key."""
+    key = (settings.ANTHROPIC_API_KEY or "").strip()
+    return len(key) > 20 and key.startswith("sk-ant-")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
 
 
 class ClaudeService:
-    def __init__(self, api_key: str | None = None, model: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        base_url: str | None = None,
+        scheduler: ClaudeScheduler | None = None,
+        breaker: Breaker | None = None,
+    ):
         self.api_key = api_key or settings.ANTHROPIC_API_KEY
         self.model = model or settings.CLAUDE_MODEL
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.base_url = base_url or settings.ANTHROPIC_BASE_URL or None
+        # Retries are handled by the scheduler, which knows about rate limits
+        self.client = anthropic.Anthropic(
+            api_key=self.api_key, base_url=self.base_url, max_retries=0
+        )
+        self.scheduler = scheduler or get_scheduler()
+        self.breaker = breaker or get_breaker("claude", is_outage)
+        self._async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, anthropic.AsyncAnthropic
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        """AsyncAnthropic client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = anthropic.AsyncAnthropic(
+                api_key=self.api_key, base_url=self.base_url, max_retries=0
+            )
+        return self._async_clients[loop]
 
     def enrich(
         self,
@@ -46,39 +498,110 @@ class ClaudeService:
         mime_type: str = "",
         language: str = "",
     ) -> ClaudeResult:
-        """Send document metadata to Claude for enrichment."""
-        truncated_text = text[:TEXT_TRUNCATE_LIMIT]
+        """Send document metadata to Claude for enrichment.
 
-        user_prompt = self._build_prompt(
-            truncated_text, title, author, mime_type, language
+        Raises CircuitOpenError without calling Claude while it is down.
+        """
+        user_prompt, params = self.build_request(
+            text, title, author, mime_type, language
         )
 
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_prompt}],
+        message = self.breaker.call(
+            self.scheduler.call,
+            lambda: self.client.messages.with_raw_response.create(**params),
+            estimated_tokens=estimate_tokens(
+                SYSTEM_PROMPT + THEME_VOCABULARY + user_prompt
+            )
+            + MAX_OUTPUT_TOKENS,
         )
 
+        return self.result_from_message(message, user_prompt)
+
+    async def aenrich(
+        self,
+        text: str,
+        title: str = "",
+        author: str = "",
+        mime_type: str = "",
+        language: str = "",
+    ) -> ClaudeResult:
+        """Async variant of ``enrich``."""
+        user_prompt, params = self.build_request(
+            text, title, author, mime_type, language
+        )
+        client = self.async_client
+        message = await self.breaker.acall(
+            self.scheduler.acall,
+            lambda: client.messages.with_raw_response.create(**params),
+            estimated_tokens=estimate_tokens(
+                SYSTEM_PROMPT + THEME_VOCABULARY + user_prompt
+            )
+            + MAX_OUTPUT_TOKENS,
+        )
+        return self.result_from_message(message, user_prompt)
+
+    def build_request(
+        self,
+        text: str,
+        title: str = "",
+        author: str = "",
+        mime_type: str = "",
+        language: str = "",
+    ) -> tuple[str, dict]:
+        """Return the user prompt and Messages API parameters for a document."""
+        truncated_text = select_text(text, TEXT_TRUNCATE_LIMIT)
+
+        user_prompt = self._build_prompt(
+            truncated_text, title, author, mime_type, language
+        )
+        params = {
+            "model": self.model,
+            "max_tokens": MAX_OUTPUT_TOKENS,
+            # The cache breakpoint on the last block caches the whole system
+            # prefix, so repeat requests only pay for the document itself
+            "system": [
+                {"type": "text", "text": SYSTEM_PROMPT},
+                {
+                    "type": "text",
+                    "text": THEME_VOCABULARY,
+                    "cache_control": {"type": "ephemeral"},
+                },
+            ],
+            "messages": [{"role": "user", "content": user_prompt}],
+        }
+        return user_prompt, params
+
+    def result_from_message(self, message, user_prompt: str) -> ClaudeResult:
+        """Turn a Messages API response into a ClaudeResult."""
         response_text = message.content[0].text
+        usage = message.usage
         raw_response = {
             "content": response_text,
             "model": message.model,
             "usage": {
-                "input_tokens": message.usage.input_tokens,
-                "output_tokens": message.usage.output_tokens,
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "cache_creation_input_tokens": getattr(
+                    usage, "cache_creation_input_tokens", None
+                )
+                or 0,
+                "cache_read_input_tokens": getattr(
+                    usage, "cache_read_input_tokens", None
+                )
+                or 0,
             },
         }
 
         parsed = self._parse_response(response_text)
 
         return ClaudeResult(
-            suggested_themes=parsed.get("themes", []),
+            suggested_themes=self._valid_themes(parsed.get("themes", [])),
             generated_description=parsed.get("description", ""),
             suggested_keywords=parsed.get("keywords", []),
             prompt_used=user_prompt,
             raw_response=raw_response,
             model_used=message.model,
+            model_requested=self.model,
         )
 
     def _build_prompt(
@@ -101,6 +624,21 @@ class ClaudeService:
         parts.append(f"\nDocument text:\n{text}")
         return "\n".join(parts)
 
+    def _valid_themes(self, themes) -> list[str]:
+        """Keep known data-theme URIs (or bare codes), dropping anything else."""
+        if not isinstance(themes, list):
+            return []
+        valid = []
+        for theme in themes:
+            code = str(theme).strip().removeprefix(THEME_BASE_URI).upper()
+            if code not in DATA_THEMES:
+                logger.warning("Ignoring unknown data theme from Claude: %s", theme)
+                continue
+            uri = THEME_BASE_URI + code
+            if uri not in valid:
+                valid.append(uri)
+        return valid
+
     def _parse_response(self, text: str) -> dict:
         """Parse JSON from Claude's response, handling markdown fences."""
         cleaned = text.strip()
@@ -0,0 +1,113 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from tiki.models import ClaudeBatch, ClaudeBatchRequest, TikaMetadata, UploadedFile
+
+from .dedup import tika_result_from_metadata
+from .pipeline import EnrichmentPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class ClaudeBatchRunner:
+    """Drive bulk enrichment through Anthropic's Message Batches API.
+
+    ``submit`` sends queued ClaudeBatchRequests as a new batch; ``collect``
+    checks in-progress batches and finishes the uploads of ended ones. All
+    state lives in the database, so either step can be re-run after a
+    restart: uploads that are no longer enriching are skipped.
+    """
+
+    def __init__(self, pipeline: EnrichmentPipeline | None = None, client=None):
+        self.pipeline = pipeline or EnrichmentPipeline()
+        if not hasattr(self.pipeline, "claude_service"):
+            raise RuntimeError("Claude is not configured (ANTHROPIC_API_KEY)")
+        self.claude_service = self.pipeline.claude_service
+        self.client = client or self.claude_service.client
+
+    def submit(self, max_requests: int | None = None) -> ClaudeBatch | None:
+        """Submit up to ``max_requests`` queued requests as one batch."""
+        max_requests = max_requests or settings.CLAUDE_BATCH_MAX_REQUESTS
+        queued = list(
+            ClaudeBatchRequest.objects.filter(
+                batch__isnull=True, upload__status=UploadedFile.Status.ENRICHING
+            ).order_by("created_at")[:max_requests]
+        )
+        if not queued:
+            return None
+
+        response = self.client.messages.batches.create(
+            requests=[
+                {"custom_id": str(request.upload_id), "params": request.params}
+                for request in queued
+            ]
+        )
+        with transaction.atomic():
+            batch = ClaudeBatch.objects.create(
+                batch_id=response.id, request_count=len(queued)
+            )
+            ClaudeBatchRequest.objects.filter(
+                pk__in=[request.pk for request in queued]
+            ).update(batch=batch)
+        logger.info(
+            "Submitted Claude batch %s (%d requests)", batch.batch_id, len(queued)
+        )
+        return batch
+
+    def collect(self) -> int:
+        """Finish the uploads of every ended batch. Returns batches collected."""
+        collected = 0
+        in_progress = ClaudeBatch.objects.filter(
+            status=ClaudeBatch.Status.IN_PROGRESS
+        ).order_by("created_at")
+        for batch in in_progress:
+            remote = self.client.messages.batches.retrieve(batch.batch_id)
+            if remote.processing_status != "ended":
+                continue
+            self._collect_results(batch)
+            batch.status = ClaudeBatch.Status.COLLECTED
+            batch.save(update_fields=["status", "updated_at"])
+            collected += 1
+        return collected
+
+    def _collect_results(self, batch: ClaudeBatch) -> None:
+        requests = {
+            str(request.upload_id): request
+            for request in batch.requests.select_related("upload")
+        }
+        for entry in self.client.messages.batches.results(batch.batch_id):
+            request = requests.get(entry.custom_id)
+            if request is None:
+                continue
+            upload = request.upload
+            if upload.status != UploadedFile.Status.ENRICHING:
+                # Already finished before a restart
+                continue
+
+            result = entry.result
+            if result.type == "succeeded":
+                self._finish(upload, request, result.message)
+            elif result.type in ("expired", "canceled"):
+                # Queue again for the next batch
+                request.batch = None
+                request.save(update_fields=["batch"])
+            else:
+                error = getattr(getattr(result, "error", None), "error", None)
+                upload.mark_failed(
+                    f"Claude batch request failed: {getattr(error, 'message', error)}"
+                )
+
+    def _finish(self, upload: UploadedFile, request: ClaudeBatchRequest, message):
+        try:
+            claude_result = self.claude_service.result_from_message(
+                message, request.prompt
+            )
+            metadata = TikaMetadata.objects.get(upload=upload)
+            tika_result = tika_result_from_metadata(metadata, include_text=False)
+            with transaction.atomic():
+                self.pipeline.finish(upload, tika_result, claude_result)
+        except Exception as e:
+            logger.exception("Failed to finish upload %s from batch", upload.id)
+            upload.mark_failed(e)
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from tiki.models import ClaudeEnrichment, ExtractedText, TikaMetadata, UploadedFile
+
+from .claude import ClaudeResult
+from .tika import TikaResult
+
+logger = logging.getLogger(__name__)
+
+
+def compute_content_hash(file) -> str:
+    """Return the SHA-256 hex digest of a Django File, reading it in chunks.
+
+    Files stored by the streaming upload handler already carry their hash.
+    """
+    if getattr(file, "content_hash", None):
+        return file.content_hash
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedResult:
+    source_id: str
+    tika_result: TikaResult
+    claude_result: ClaudeResult | None = None
+
+
+def tika_result_from_metadata(
+    metadata: TikaMetadata, include_text: bool = True
+) -> TikaResult:
+    return TikaResult(
+        mime_type=metadata.mime_type,
+        language=metadata.language,
+        author=metadata.author,
+        title=metadata.title,
+        created_date=metadata.created_date,
+        modified_date=metadata.modified_date,
+        full_text=metadata.full_text if include_text else "",
+        raw_metadata=metadata.raw_metadata,
+    )
+
+
+def claude_result_from_enrichment(enrichment: ClaudeEnrichment) -> ClaudeResult:
+    return ClaudeResult(
+        suggested_themes=enrichment.suggested_themes,
+        generated_description=enrichment.generated_description,
+        suggested_keywords=enrichment.suggested_keywords,
+        prompt_used=enrichment.prompt_used,
+        raw_response=enrichment.raw_response,
+        model_used=enrichment.model_used,
+        model_requested=enrichment.model_requested,
+    )
+
+
+class ResultCache:
+    """Reuse Tika and Claude results from earlier uploads with the same content.
+
+    Entries are the results of previous completed uploads, so nothing extra is
+    stored. An entry expires TIKI_DEDUP_TTL seconds after its upload was
+    created; a TTL of 0 disables the cache. Claude results are only reused
+    when they were produced by the currently configured model.
+    """
+
+    def __init__(self, ttl: int | None = None, model: str | None = None):
+        self.ttl = settings.TIKI_DEDUP_TTL if ttl is None else ttl
+        self.model = model or settings.CLAUDE_MODEL
+
+    def lookup(self, upload: UploadedFile) -> CachedResult | None:
+        if self.ttl <= 0 or upload.skip_cache or not upload.content_hash:
+            return None
+
+        source = (
+            self._sources()
+            .filter(upload__content_hash=upload.content_hash)
+            .exclude(upload_id=upload.id)
+            .first()
+        )
+        if source is None:
+            return None
+        logger.info(
+            "Reusing results of upload %s for upload %s",
+            source.upload_id,
+            upload.id,
+        )
+        return self._cached_result(source)
+
+    def lookup_many(self, uploads: list[UploadedFile]) -> dict[str, CachedResult]:
+        """Look up several pending uploads in one query, keyed by upload id."""
+        if self.ttl <= 0:
+            return {}
+        hashes = {
+            upload.content_hash
+            for upload in uploads
+            if upload.content_hash and not upload.skip_cache
+        }
+        if not hashes:
+            return {}
+
+        # Only the newest source per hash is loaded with its heavy columns
+        newest = (
+            self._eligible()
+            .filter(upload__content_hash=OuterRef("upload__content_hash"))
+            .order_by("-upload__created_at")
+            .values("pk")[:1]
+        )
+        sources = self._sources().filter(
+            upload__content_hash__in=hashes, pk=Subquery(newest)
+        )
+        latest = {source.upload.content_hash: source for source in sources}
+        results = {}
+        for upload in uploads:
+            source = latest.get(upload.content_hash)
+            if source is None or upload.skip_cache or source.upload_id == upload.id:
+                continue
+            logger.info(
+                "Reusing results of upload %s for upload %s",
+                source.upload_id,
+                upload.id,
+            )
+            results[str(upload.id)] = self._cached_result(source)
+        return results
+
+    def _eligible(self):
+        """Metadata of completed uploads within the TTL."""
+        cutoff = timezone.now() - timedelta(seconds=self.ttl)
+        return TikaMetadata.objects.filter(
+            upload__status=UploadedFile.Status.COMPLETED,
+            upload__created_at__gte=cutoff,
+        )
+
+    def _sources(self):
+        """Like ``_eligible``, newest first, with the results to reuse."""
+        return (
+            self._eligible()
+            .with_raw_metadata()
+            .select_related("upload__claude_enrichment", "upload__extracted_text")
+            .order_by("-upload__created_at")
+        )
+
+    def _cached_result(self, source: TikaMetadata) -> CachedResult:
+        tika_result = tika_result_from_metadata(source, include_text=False)
+        try:
+            tika_result.full_text = source.upload.extracted_text.get_text()
+        except ExtractedText.DoesNotExist:
+            pass
+
+        claude_result = None
+        try:
+            enrichment = source.upload.claude_enrichment
+        except ClaudeEnrichment.DoesNotExist:
+            enrichment = None
+        # model_used is what the API reports, which differs from an alias
+        if enrichment is not None and enrichment.model_requested == self.model:
+            claude_result = claude_result_from_enrichment(enrichment)
+
+        return CachedResult(
+            source_id=str(source.upload_id),
+            tika_result=tika_result,
+            claude_result=claude_result,
+        )
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.db import connection, connections, transaction
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "tiki_upload_status"
+LISTEN_TIMEOUT = 5.0
+RECONNECT_DELAY = 2.0
+
+
+class AsyncSubscription:
+    """Subscriber queue for asyncio code, fed from any thread."""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, payload: dict) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, payload)
+
+    async def get(self, timeout: float) -> dict:
+        """Wait for the next event; raises TimeoutError after ``timeout``."""
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+
+class StatusHub:
+    """Fan upload status changes out to subscribers in this process.
+
+    On Postgres, status changes are sent with NOTIFY and a single listener
+    thread per process LISTENs for them, so any number of waiting clients
+    share one connection and issue no polling queries. On other backends
+    changes are delivered in-process only; subscribers in another process
+    (e.g. a separate worker) won't see them and should re-check the database.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+
+    @property
+    def cross_process(self) -> bool:
+        return connection.vendor == "postgresql"
+
+    def subscribe(self, upload_id) -> queue.SimpleQueue:
+        """Return a queue receiving ``{"id", "status"}`` events for an upload."""
+        return self._add(upload_id, queue.SimpleQueue())
+
+    def asubscribe(self, upload_id) -> AsyncSubscription:
+        """Like ``subscribe``, for a coroutine on the running event loop."""
+        return self._add(upload_id, AsyncSubscription())
+
+    def _add(self, upload_id, events):
+        with self._lock:
+            self._subscribers[str(upload_id)].add(events)
+            if self.cross_process and self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="tiki-events", daemon=True
+                )
+                self._listener.start()
+        return events
+
+    def unsubscribe(self, upload_id, events) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(str(upload_id))
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del self._subscribers[str(upload_id)]
+
+    def publish(self, upload_id, status: str) -> None:
+        """Announce a status change once the current transaction commits."""
+        self.publish_many([(upload_id, status)])
+
+    def publish_many(self, changes: Iterable[tuple]) -> None:
+        """Announce ``(upload_id, status)`` changes with a single NOTIFY query."""
+        payloads = [
+            {"id": str(upload_id), "status": str(status)}
+            for upload_id, status in changes
+        ]
+        if not payloads:
+            return
+        transaction.on_commit(lambda: self._committed(payloads))
+
+    def dispatch(self, payload: dict) -> None:
+        """Deliver an event to this process's subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(payload["id"], ()))
+        for events in subscribers:
+            events.put(payload)
+
+    def _committed(self, payloads: list[dict]) -> None:
+        # Every status change passes through here, so count them too
+        metrics.count_transitions(payload["status"] for payload in payloads)
+        if self.cross_process:
+            self._notify(payloads)
+        else:
+            self._dispatch_all(payloads)
+
+    def _dispatch_all(self, payloads: list[dict]) -> None:
+        for payload in payloads:
+            self.dispatch(payload)
+
+    def _notify(self, payloads: list[dict]) -> None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                    [CHANNEL, [json.dumps(payload) for payload in payloads]],
+                )
+        except Exception:
+            # Progress events are best-effort; never fail the pipeline over one
+            logger.exception(
+                "Failed to publish status for %d uploads", len(payloads)
+            )
+
+    def _listen(self) -> None:
+        while True:
+            wrapper = connections.create_connection("default")
+            try:
+                wrapper.ensure_connection()
+                raw = wrapper.connection
+                raw.autocommit = True
+                raw.execute(f"LISTEN {CHANNEL}")
+                while True:
+                    for notify in raw.notifies(timeout=LISTEN_TIMEOUT):
+                        try:
+                            self.dispatch(json.loads(notify.payload))
+                        except (ValueError, KeyError):
+                            logger.warning("Ignoring bad payload: %s", notify.payload)
+            except Exception:
+                logger.exception("Status listener failed, reconnecting")
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                wrapper.close()
+
+
+hub = StatusHub()
+
+
+def publish_status(upload_id, status: str) -> None:
+    hub.publish(upload_id, status)
+
+
+def publish_statuses(changes: Iterable[tuple]) -> None:
+    hub.publish_many(changes)
@@ -0,0 +1,128 @@
+import base64
+from collections.abc import Iterator
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+from tiki.models import DCATOutput
+
+from .dcat_builder import DCAT_CONTEXT
+from .serializers import FORMAT_ALIASES, dumps, dumps_with, render_many
+
+EXPORT_FORMATS = {
+    "jsonld": "application/ld+json",
+    "ntriples": "application/n-triples",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_ALIASES = {**FORMAT_ALIASES, "ndjson": "ndjson", "jsonl": "ndjson"}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def encode_cursor(updated_at: datetime, pk: int) -> str:
+    """Opaque keyset cursor pointing just past the record ``(updated_at, pk)``."""
+    raw = f"{updated_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.split("|")
+        updated_at = parse_datetime(timestamp)
+        if updated_at is None:
+            raise ValueError(timestamp)
+        return updated_at, int(pk)
+    except ValueError as e:
+        raise ExportError("Invalid cursor") from e
+
+
+def finalized_outputs(
+    updated_since: datetime | None = None, after: str | None = None
+) -> QuerySet:
+    """Finalized records in keyset order (updated_at, id).
+
+    ``after`` is a cursor from ``next_cursor``; only later records are
+    returned, so paging stays cheap however deep the harvest goes.
+    """
+    outputs = (
+        DCATOutput.objects.filter(is_finalized=True)
+        .only(
+            "id",
+            "upload_id",
+            "version",
+            "jsonld",
+            "user_edits",
+            "merged_jsonld",
+            "updated_at",
+        )
+        .order_by("updated_at", "id")
+    )
+    if updated_since is not None:
+        outputs = outputs.filter(updated_at__gte=updated_since)
+    if after is not None:
+        updated_at, pk = decode_cursor(after)
+        outputs = outputs.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+        )
+    return outputs
+
+
+def next_cursor(outputs: QuerySet, limit: int) -> str | None:
+    """Cursor for the page after the first ``limit`` records, if there is one."""
+    keys = list(outputs.values_list("updated_at", "id")[limit - 1 : limit + 1])
+    if len(keys) < 2:
+        return None
+    return encode_cursor(*keys[0])
+
+
+def export_chunks(
+    outputs: QuerySet, fmt: str, chunk_size: int | None = None
+) -> Iterator[bytes]:
+    """Yield ``outputs`` encoded in ``fmt``, one chunk of records at a time.
+
+    Rows are read through a server-side cursor, so memory use depends on the
+    chunk size, not on the number of records. N-Triples and NDJSON reuse the
+    rendered records cached by the serializer layer.
+    """
+    chunk_size = chunk_size or settings.TIKI_EXPORT_CHUNK_SIZE
+    rows = outputs.iterator(chunk_size=chunk_size)
+    if fmt == "jsonld":
+        yield b'{"@context":%s,"@graph":[' % dumps(DCAT_CONTEXT)
+    first = True
+    while chunk := list(islice(rows, chunk_size)):
+        if fmt == "jsonld":
+            parts = [dumps(node) for output in chunk for node in _graph(output)]
+        elif fmt == "ntriples":
+            parts = render_many(chunk, "ntriples")
+        else:
+            parts = [
+                dumps_with(
+                    {
+                        "id": str(output.upload_id),
+                        "updated_at": output.updated_at.isoformat(),
+                    },
+                    jsonld=data,
+                )
+                + b"\n"
+                for output, data in zip(chunk, render_many(chunk, "jsonld"))
+            ]
+        if fmt == "jsonld" and parts:
+            yield (b"" if first else b",") + b",".join(parts)
+            first = False
+        elif parts:
+            yield b"".join(parts)
+    if fmt == "jsonld":
+        yield b"]}"
+
+
+def _graph(output: DCATOutput) -> list:
+    merged = output.get_merged_jsonld()
+    if "@graph" in merged:
+        return merged["@graph"]
+    return [{key: value for key, value in merged.items() if key != "@context"}]
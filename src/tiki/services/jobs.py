@@ -0,0 +1,303 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from tiki.models import (
+    ClaudeBatchRequest,
+    ClaudeEnrichment,
+    DCATOutput,
+    ExtractedText,
+    TikaMetadata,
+    UploadedFile,
+)
+
+from .events import publish_status, publish_statuses
+from .pipeline import EnrichmentPipeline, PipelineJob
+from .stages import StagedPipeline
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS_STATUSES = [
+    UploadedFile.Status.EXTRACTING,
+    UploadedFile.Status.ENRICHING,
+]
+
+# Uploads this process claimed, kept alive by the heartbeat thread
+_owned: set = set()
+_owned_lock = threading.Lock()
+_heartbeat: threading.Thread | None = None
+
+
+def start_heartbeat() -> None:
+    """Start refreshing the heartbeat of uploads this process claims, every
+    TIKI_WORKER_STALE_AFTER / 4 seconds on a daemon thread, once per process.
+
+    A claimed upload may wait in a queue or a bulk buffer for longer than
+    TIKI_WORKER_STALE_AFTER without its row changing; the heartbeat keeps
+    requeue_stale from handing it to another process meanwhile.
+    """
+    global _heartbeat
+    with _owned_lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(
+                target=_beat_forever, name="tiki-heartbeat", daemon=True
+            )
+            _heartbeat.start()
+
+
+def _own(upload_ids) -> None:
+    with _owned_lock:
+        if _heartbeat is not None:
+            _owned.update(upload_ids)
+
+
+def heartbeat() -> int:
+    """Refresh ``heartbeat_at`` of the in-progress uploads this process owns,
+    and forget the rest. Returns the number refreshed.
+    """
+    with _owned_lock:
+        owned = list(_owned)
+    if not owned:
+        return 0
+    in_progress = set(
+        UploadedFile.objects.filter(id__in=owned, status__in=IN_PROGRESS_STATUSES)
+        .order_by()
+        .values_list("id", flat=True)
+    )
+    with _owned_lock:
+        _owned.difference_update(set(owned) - in_progress)
+    return UploadedFile.objects.filter(id__in=in_progress).update(
+        heartbeat_at=timezone.now()
+    )
+
+
+def _beat_forever() -> None:
+    interval = settings.TIKI_WORKER_STALE_AFTER / 4
+    while True:
+        time.sleep(interval)
+        close_old_connections()
+        try:
+            heartbeat()
+        except Exception:
+            logger.exception("Refreshing upload heartbeats failed")
+        finally:
+            connection.close()
+
+
+def claim_next() -> UploadedFile | None:
+    """Move the oldest pending upload to extracting and return it.
+
+    On Postgres the candidate row is locked with SKIP LOCKED so concurrent
+    workers never block on each other; the conditional UPDATE keeps the claim
+    safe on backends without row locking (sqlite).
+    """
+    with transaction.atomic():
+        upload = (
+            UploadedFile.objects.select_for_update(skip_locked=True)
+            .filter(status=UploadedFile.Status.PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if upload is None:
+            return None
+        claimed = UploadedFile.objects.filter(
+            pk=upload.pk, status=UploadedFile.Status.PENDING
+        ).update(status=UploadedFile.Status.EXTRACTING, updated_at=timezone.now())
+
+    if not claimed:
+        return None
+    upload.status = UploadedFile.Status.EXTRACTING
+    _own([upload.pk])
+    publish_status(upload.pk, upload.status)
+    return upload
+
+
+def claim(upload_id) -> UploadedFile | None:
+    """Claim a specific pending upload, or return None if someone else has."""
+    claimed = UploadedFile.objects.filter(
+        pk=upload_id, status=UploadedFile.Status.PENDING
+    ).update(status=UploadedFile.Status.EXTRACTING, updated_at=timezone.now())
+    if not claimed:
+        return None
+    _own([upload_id])
+    publish_status(upload_id, UploadedFile.Status.EXTRACTING)
+    return UploadedFile.objects.get(pk=upload_id)
+
+
+def claim_batch(batch_id) -> list[UploadedFile]:
+    """Claim every pending upload of a batch with one UPDATE and return them.
+
+    Uploads locked or already claimed by a queue worker are left out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        uploads = list(
+            UploadedFile.objects.select_for_update(skip_locked=True)
+            .filter(batch_id=batch_id, status=UploadedFile.Status.PENDING)
+            .order_by("created_at")
+        )
+        if not uploads:
+            return []
+        ids = [upload.pk for upload in uploads]
+        claimed = UploadedFile.objects.filter(
+            pk__in=ids, status=UploadedFile.Status.PENDING
+        ).update(status=UploadedFile.Status.EXTRACTING, updated_at=now)
+        if claimed != len(uploads):
+            # Without row locks (sqlite) a worker may have claimed some first
+            uploads = list(
+                UploadedFile.objects.filter(
+                    pk__in=ids, status=UploadedFile.Status.EXTRACTING, updated_at=now
+                ).order_by("created_at")
+            )
+        for upload in uploads:
+            upload.status = UploadedFile.Status.EXTRACTING
+            upload.updated_at = now
+        _own(upload.pk for upload in uploads)
+        publish_statuses((upload.pk, upload.status) for upload in uploads)
+    return uploads
+
+
+def requeue_stale(older_than: timedelta) -> int:
+    """Return uploads stuck in progress (e.g. after a worker crash) to pending.
+
+    Uploads whose owner is still alive, i.e. with a recent heartbeat, are
+    not stuck however long they have waited.
+    """
+    cutoff = timezone.now() - older_than
+    with transaction.atomic():
+        stale_ids = list(
+            UploadedFile.objects.select_for_update(skip_locked=True)
+            .filter(status__in=IN_PROGRESS_STATUSES, updated_at__lt=cutoff)
+            .exclude(heartbeat_at__gte=cutoff)
+            # Uploads waiting on a Message Batches API batch are not stuck
+            .exclude(id__in=ClaudeBatchRequest.objects.values("upload_id"))
+            # No need to sort by the default -created_at ordering
+            .order_by()
+            .values_list("id", flat=True)
+        )
+        if not stale_ids:
+            return 0
+        # Discard partial results so the pipeline can recreate them cleanly
+        TikaMetadata.objects.filter(upload_id__in=stale_ids).delete()
+        ExtractedText.objects.filter(upload_id__in=stale_ids).delete()
+        ClaudeEnrichment.objects.filter(upload_id__in=stale_ids).delete()
+        DCATOutput.objects.filter(upload_id__in=stale_ids).delete()
+        UploadedFile.objects.filter(id__in=stale_ids).update(
+            status=UploadedFile.Status.PENDING,
+            heartbeat_at=None,
+            updated_at=timezone.now(),
+        )
+        publish_statuses(
+            (upload_id, UploadedFile.Status.PENDING) for upload_id in stale_ids
+        )
+    logger.warning("Requeued %d stale uploads", len(stale_ids))
+    return len(stale_ids)
+
+
+class Worker:
+    def __init__(
+        self,
+        pipeline: EnrichmentPipeline | None = None,
+        poll_interval: float | None = None,
+    ):
+        self.pipeline = pipeline or EnrichmentPipeline()
+        self.poll_interval = (
+            poll_interval
+            if poll_interval is not None
+            else settings.TIKI_WORKER_POLL_INTERVAL
+        )
+
+    def run_once(self) -> bool:
+        """Process one pending upload. Return False if the queue was empty,
+        or if Tika is down and uploads are left queued until it recovers.
+        """
+        if not self.pipeline.tika_service.breaker.available():
+            return False
+        upload = claim_next()
+        if upload is None:
+            return False
+        try:
+            self.pipeline.run(upload)
+        except Exception:
+            # The pipeline has already logged and marked the upload failed
+            pass
+        return True
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        """Keep draining the queue until stop_event is set."""
+        try:
+            while not stop_event.is_set():
+                close_old_connections()
+                if not self.run_once():
+                    stop_event.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+
+class StagedWorker:
+    """Feed claimed uploads through the pipeline's stages.
+
+    Unlike Worker, which runs each upload start to finish on one thread, the
+    stages run on their own thread pools, so Tika extractions and Claude
+    calls of different uploads overlap. Uploads are claimed only when the
+    first stage has room.
+    """
+
+    def __init__(
+        self,
+        pipeline: EnrichmentPipeline | None = None,
+        poll_interval: float | None = None,
+        concurrency: dict[str, int] | None = None,
+    ):
+        self.pipeline = pipeline or EnrichmentPipeline()
+        self.poll_interval = (
+            poll_interval
+            if poll_interval is not None
+            else settings.TIKI_WORKER_POLL_INTERVAL
+        )
+        self.staged = StagedPipeline(
+            self.pipeline.stages(concurrency), on_error=self.pipeline.fail
+        )
+
+    def run_once(self) -> int:
+        """Process every pending upload, then stop. Returns the number fed."""
+        fed = 0
+        self.staged.start()
+        try:
+            while self._tika_available() and self.staged.wait_for_room():
+                upload = claim_next()
+                if upload is None:
+                    break
+                self.staged.put(PipelineJob(upload=upload))
+                fed += 1
+        finally:
+            self.staged.close()
+        return fed
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        """Keep feeding the stages until stop_event is set, then drain them."""
+        self.staged.start()
+        try:
+            while not stop_event.is_set():
+                # Claiming only once there is room keeps a claimed upload
+                # from waiting in extracting for a full queue
+                if not self.staged.wait_for_room(self.poll_interval):
+                    continue
+                close_old_connections()
+                upload = claim_next() if self._tika_available() else None
+                if upload is None:
+                    stop_event.wait(self.poll_interval)
+                    continue
+                self.staged.put(PipelineJob(upload=upload))
+        finally:
+            connection.close()
+            self.staged.close()
+
+    def _tika_available(self) -> bool:
+        # Leave uploads queued while Tika is down rather than fail them
+        return self.pipeline.tika_service.breaker.available()
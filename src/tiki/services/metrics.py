@@ -0,0 +1,158 @@
+"""Prometheus metrics for the enrichment pipeline.
+
+With several worker processes (gunicorn, or uvicorn --workers), set
+PROMETHEUS_MULTIPROC_DIR (see config/gunicorn.py and docker-compose.asgi.yml)
+so every worker writes its samples to a shared directory and ``/metrics``
+aggregates them. Without prometheus_client installed, recording is a no-op.
+"""
+
+import os
+from collections.abc import Iterable
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in bytes, labelled for dashboards
+SIZE_BUCKETS = [
+    (100 * 1024, "100KB"),
+    (1024 * 1024, "1MB"),
+    (10 * 1024 * 1024, "10MB"),
+    (100 * 1024 * 1024, "100MB"),
+]
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+DOCUMENT_LABELS = ["mime_type", "size"]
+
+if prometheus_client is not None:
+    TIKA_SECONDS = prometheus_client.Histogram(
+        "tiki_tika_extract_seconds",
+        "Time to extract a document with Tika.",
+        DOCUMENT_LABELS,
+        buckets=SECONDS_BUCKETS,
+    )
+    CLAUDE_SECONDS = prometheus_client.Histogram(
+        "tiki_claude_seconds",
+        "Time to enrich a document with Claude, including rate-limit waits.",
+        DOCUMENT_LABELS,
+        buckets=SECONDS_BUCKETS,
+    )
+    CLAUDE_INPUT_TOKENS = prometheus_client.Histogram(
+        "tiki_claude_input_tokens",
+        "Input tokens per Claude enrichment, cached prompt tokens included.",
+        DOCUMENT_LABELS,
+        buckets=TOKEN_BUCKETS,
+    )
+    CLAUDE_OUTPUT_TOKENS = prometheus_client.Histogram(
+        "tiki_claude_output_tokens",
+        "Output tokens per Claude enrichment.",
+        DOCUMENT_LABELS,
+        buckets=TOKEN_BUCKETS,
+    )
+    DB_WRITE_SECONDS = prometheus_client.Histogram(
+        "tiki_db_write_seconds",
+        "Time to store pipeline results.",
+        ["operation"],
+        buckets=SECONDS_BUCKETS,
+    )
+    PIPELINE_SECONDS = prometheus_client.Histogram(
+        "tiki_pipeline_seconds",
+        "Time from the start of the pipeline to a completed upload.",
+        DOCUMENT_LABELS,
+        buckets=SECONDS_BUCKETS,
+    )
+    STAGE_SECONDS = prometheus_client.Histogram(
+        "tiki_stage_seconds",
+        "Time spent in each stage of a staged worker.",
+        ["stage"],
+        buckets=SECONDS_BUCKETS,
+    )
+    TRANSITIONS = prometheus_client.Counter(
+        "tiki_upload_transitions",
+        "Upload status changes, by the status entered.",
+        ["status"],
+    )
+
+
+def enabled() -> bool:
+    return prometheus_client is not None
+
+
+def size_bucket(file_size: int) -> str:
+    for limit, label in SIZE_BUCKETS:
+        if file_size < limit:
+            return f"<{label}"
+    return f">={SIZE_BUCKETS[-1][1]}"
+
+
+def document_labels(mime_type: str, file_size: int) -> dict:
+    # Drop parameters such as charset to keep the label set small
+    mime_type = (mime_type or "").split(";")[0].strip().lower()
+    return {"mime_type": mime_type or "unknown", "size": size_bucket(file_size)}
+
+
+def observe_extract(seconds: float, mime_type: str, file_size: int) -> None:
+    if enabled():
+        TIKA_SECONDS.labels(**document_labels(mime_type, file_size)).observe(seconds)
+
+
+def observe_claude(
+    seconds: float, raw_response: dict, mime_type: str, file_size: int
+) -> None:
+    if not enabled():
+        return
+    labels = document_labels(mime_type, file_size)
+    CLAUDE_SECONDS.labels(**labels).observe(seconds)
+    usage = raw_response.get("usage") or {}
+    CLAUDE_INPUT_TOKENS.labels(**labels).observe(
+        usage.get("input_tokens", 0)
+        + usage.get("cache_creation_input_tokens", 0)
+        + usage.get("cache_read_input_tokens", 0)
+    )
+    CLAUDE_OUTPUT_TOKENS.labels(**labels).observe(usage.get("output_tokens", 0))
+
+
+def observe_db_write(seconds: float, operation: str) -> None:
+    if enabled():
+        DB_WRITE_SECONDS.labels(operation=operation).observe(seconds)
+
+
+def observe_pipeline(seconds: float, mime_type: str, file_size: int) -> None:
+    if enabled():
+        PIPELINE_SECONDS.labels(**document_labels(mime_type, file_size)).observe(
+            seconds
+        )
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if enabled():
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def count_transitions(statuses: Iterable[str]) -> None:
+    if enabled():
+        for status in statuses:
+            TRANSITIONS.labels(status=status).inc()
+
+
+def registry():
+    """Registry to expose: all processes' samples in multiprocess mode."""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return prometheus_client.REGISTRY
+    collected = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def exposition() -> bytes:
+    """Current metrics in the Prometheus text format."""
+    return prometheus_client.generate_latest(registry())
+
+
+def start_server(port: int) -> None:
+    """Serve /metrics from a background thread (for the worker command)."""
+    prometheus_client.start_http_server(port, registry=registry())
@@ -1,86 +1,477 @@
+import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
-from tiki.models import ClaudeEnrichment, DCATOutput, TikaMetadata, UploadedFile
+from tiki.models import (
+    ClaudeBatchRequest,
+    ClaudeEnrichment,
+    DCATOutput,
+    ExtractedText,
+    TikaMetadata,
+    UploadedFile,
+)
 
+from . import claude, metrics
+from .breaker import CircuitOpenError
 from .claude import ClaudeResult, ClaudeService
-from .dcat_builder import DCATBuilder
-from .tika import TikaService
+from .dcat_builder import DCATBuilder, DCATBuildResult
+from .dedup import CachedResult, ResultCache
+from .stages import Stage
+from .tika import TikaResult, TikaService
 
 logger = logging.getLogger(__name__)
 
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def in_flight() -> int:
+    """Number of ``run``/``arun`` calls currently running in this process."""
+    return _in_flight
+
+
+@contextmanager
+def _tracked():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    try:
+        yield
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+@dataclass
+class PipelineJob:
+    """An upload on its way through the pipeline, with each stage's result."""
+
+    upload: UploadedFile
+    tika_future: Future | None = None
+    cached: CachedResult | None = None
+    tika_result: TikaResult | None = None
+    claude_result: ClaudeResult | None = None
+    dcat_result: DCATBuildResult | None = None
+    dcat_output: DCATOutput | None = None
+    # Set instead of claude_result when queued for the Message Batches API
+    batch_request: ClaudeBatchRequest | None = None
+    # perf_counter() when the job entered the pipeline; None if unknown
+    started: float | None = field(default_factory=time.perf_counter)
+    # The upload's updated_at when it was claimed; BulkWriter only stores the
+    # results while the row still has it, i.e. nobody has claimed it since
+    claimed_at: datetime | None = None
+
+    def __post_init__(self):
+        if self.claimed_at is None:
+            self.claimed_at = self.upload.updated_at
+
 
 class EnrichmentPipeline:
     def __init__(self):
         self.tika_service = TikaService()
         self.dcat_builder = DCATBuilder()
-        key = (settings.ANTHROPIC_API_KEY or "").strip()
-        self._claude_enabled = len(key) > 20 and key.startswith("sk-ant-")
+        self.result_cache = ResultCache()
+        self._claude_enabled = claude.is_configured()
         if self._claude_enabled:
             self.claude_service = ClaudeService()
 
-    def run(self, upload: UploadedFile) -> DCATOutput:
-        """Run the enrichment pipeline: Tika → (optionally Claude) → DCAT-AP."""
+    def run(
+        self, upload: UploadedFile, tika_future: Future | None = None
+    ) -> DCATOutput | None:
+        """Run the enrichment pipeline: Tika → (optionally Claude) → DCAT-AP.
+
+        Uploads whose content hash matches a recent completed upload reuse
+        that upload's Tika and Claude results instead of calling the services.
+        ``tika_future`` is an extraction already started while the file was
+        being uploaded; if it failed, the stored file is extracted instead.
+
+        With CLAUDE_ENRICHMENT_MODE = "batch" the upload is left in
+        ``enriching`` and queued for the Message Batches API, and None is
+        returned; ``manage.py claude_batches`` finishes it later.
+        """
+        job = PipelineJob(upload=upload, tika_future=tika_future)
         try:
-            # Step 1: Extract with Tika
+            with _tracked():
+                for _, handler in self._stage_handlers():
+                    if handler(job) is None:
+                        return None
+                return job.dcat_output
+
+        except Exception as e:
+            self.fail(job, e)
+            raise
+
+    def stages(self, concurrency: dict[str, int] | None = None) -> list[Stage]:
+        """The pipeline as stages for a StagedPipeline, which runs them on
+        separate thread pools with queues in between.
+
+        Concurrency per stage defaults to TIKI_STAGE_CONCURRENCY.
+        """
+        concurrency = {**settings.TIKI_STAGE_CONCURRENCY, **(concurrency or {})}
+        return [
+            Stage(name=name, handler=handler, concurrency=concurrency.get(name, 1))
+            for name, handler in self._stage_handlers()
+        ]
+
+    def fail(self, job: PipelineJob, error: Exception) -> None:
+        """Record a pipeline failure on the job's upload."""
+        logger.error(
+            "Pipeline failed for upload %s",
+            job.upload.id,
+            exc_info=(type(error), error, error.__traceback__),
+        )
+        job.upload.mark_failed(error)
+
+    def _stage_handlers(self):
+        return [
+            ("extract", self.stage_extract),
+            ("persist_extraction", self.stage_persist_extraction),
+            ("enrich", self.stage_enrich),
+            ("build", self.stage_build),
+            ("persist_output", self.stage_persist_output),
+        ]
+
+    def stage_extract(self, job: PipelineJob) -> PipelineJob:
+        """Extract with Tika, or reuse the result of an identical upload."""
+        upload = job.upload
+        # Queue workers claim uploads as extracting
+        if upload.status != UploadedFile.Status.EXTRACTING:
             upload.mark_extracting()
-            tika_result = self.tika_service.extract(upload.file.path)
 
-            TikaMetadata.objects.create(
-                upload=upload,
+        job.cached = self.result_cache.lookup(upload)
+        self._extract_job(job)
+        return job
+
+    def stage_persist_extraction(self, job: PipelineJob) -> PipelineJob:
+        self._save_extraction(job.upload, job.tika_result)
+        if self._claude_enabled:
+            job.upload.mark_enriching()
+        return job
+
+    def stage_enrich(self, job: PipelineJob) -> PipelineJob | None:
+        """Enrich with Claude (if an API key is configured).
+
+        Returns None when the upload was queued for a Message Batch.
+        """
+        if not self._claude_enabled:
+            logger.info("Skipping Claude enrichment (no API key configured)")
+            return job
+
+        if job.cached and job.cached.claude_result:
+            job.claude_result = self._reused_claude_result(job.cached)
+        elif settings.CLAUDE_ENRICHMENT_MODE == "batch":
+            self._batch_request(job.upload, job.tika_result).save()
+            return None
+        else:
+            self._enrich_job(job)
+        return job
+
+    def stage_build(self, job: PipelineJob) -> PipelineJob:
+        """Build DCAT-AP JSON-LD."""
+        job.dcat_result = self.dcat_builder.build(
+            tika_result=job.tika_result,
+            claude_result=job.claude_result,
+            filename=job.upload.original_filename,
+            file_size=job.upload.file_size,
+        )
+        return job
+
+    def stage_persist_output(self, job: PipelineJob) -> PipelineJob:
+        """Store the Claude result and DCAT-AP output and complete the upload."""
+        started = time.perf_counter()
+        if job.claude_result is not None:
+            self._save_enrichment(job.upload, job.claude_result)
+
+        job.dcat_output = self._output_row(job)
+        job.dcat_output.save()
+        job.upload.mark_completed()
+        metrics.observe_db_write(time.perf_counter() - started, "output")
+        self.observe_completed(job)
+        return job
+
+    def observe_completed(self, job: PipelineJob) -> None:
+        """Record the end-to-end time of a job that completed its upload."""
+        if job.started is not None:
+            metrics.observe_pipeline(
+                time.perf_counter() - job.started,
+                job.tika_result.mime_type,
+                job.upload.file_size,
+            )
+
+    def compute(self, job: PipelineJob) -> PipelineJob:
+        """Run extraction, enrichment and the DCAT build without any writes.
+
+        Used by BulkWriter, which stores the results of many jobs at once;
+        ``job.cached`` must already be looked up (ResultCache.lookup_many).
+        With CLAUDE_ENRICHMENT_MODE = "batch", ``job.batch_request`` is set
+        instead of calling Claude and the DCAT build is left for later.
+        """
+        self._extract_job(job)
+        if self._claude_enabled:
+            if job.cached and job.cached.claude_result:
+                job.claude_result = self._reused_claude_result(job.cached)
+            elif settings.CLAUDE_ENRICHMENT_MODE == "batch":
+                job.batch_request = self._batch_request(job.upload, job.tika_result)
+                return job
+            else:
+                self._enrich_job(job)
+        return self.stage_build(job)
+
+    def rows(self, job: PipelineJob) -> list:
+        """Unsaved model instances holding a computed job's results."""
+        rows = list(self._extraction_rows(job.upload, job.tika_result))
+        if job.batch_request is not None:
+            return [*rows, job.batch_request]
+        if job.claude_result is not None:
+            rows.append(self._enrichment_row(job.upload, job.claude_result))
+        job.dcat_output = self._output_row(job)
+        return [*rows, job.dcat_output]
+
+    async def arun(
+        self, upload: UploadedFile, tika_future: Future | None = None
+    ) -> DCATOutput | None:
+        """Async variant of ``run`` for ASGI views.
+
+        Tika and Claude are called without blocking the event loop; database
+        work runs in Django's sync thread.
+        """
+        started = time.perf_counter()
+        with _tracked():
+            try:
+                if upload.status != UploadedFile.Status.EXTRACTING:
+                    await sync_to_async(upload.mark_extracting)()
+
+                cached = await sync_to_async(self.result_cache.lookup)(upload)
+                if cached:
+                    tika_result = cached.tika_result
+                else:
+                    extract_started = time.perf_counter()
+                    tika_result = await self._aextract(upload, tika_future)
+                    metrics.observe_extract(
+                        time.perf_counter() - extract_started,
+                        tika_result.mime_type,
+                        upload.file_size,
+                    )
+
+                await sync_to_async(self._save_extraction)(upload, tika_result)
+
+                claude_result = None
+                if self._claude_enabled:
+                    await sync_to_async(upload.mark_enriching)()
+                    if cached and cached.claude_result:
+                        claude_result = self._reused_claude_result(cached)
+                    elif settings.CLAUDE_ENRICHMENT_MODE == "batch":
+                        request = self._batch_request(upload, tika_result)
+                        await sync_to_async(request.save)()
+                        return None
+                    else:
+                        claude_result = await self._aenrich(upload, tika_result)
+                else:
+                    logger.info("Skipping Claude enrichment (no API key configured)")
+
+                return await sync_to_async(self.finish)(
+                    upload, tika_result, claude_result, started=started
+                )
+
+            except Exception as e:
+                logger.exception("Pipeline failed for upload %s", upload.id)
+                await sync_to_async(upload.mark_failed)(e)
+                raise
+
+    def finish(
+        self,
+        upload: UploadedFile,
+        tika_result: TikaResult,
+        claude_result: ClaudeResult | None,
+        started: float | None = None,
+    ) -> DCATOutput:
+        """Store the Claude result, build DCAT-AP JSON-LD and complete the upload.
+
+        ``started`` is when the pipeline began, for the end-to-end timing.
+        """
+        job = PipelineJob(
+            upload=upload,
+            tika_result=tika_result,
+            claude_result=claude_result,
+            started=started,
+        )
+        self.stage_build(job)
+        return self.stage_persist_output(job).dcat_output
+
+    def _batch_request(
+        self, upload: UploadedFile, tika_result: TikaResult
+    ) -> ClaudeBatchRequest:
+        prompt, params = self.claude_service.build_request(
+            text=tika_result.full_text,
+            title=tika_result.title,
+            author=tika_result.author,
+            mime_type=tika_result.mime_type,
+            language=tika_result.language,
+        )
+        return ClaudeBatchRequest(upload=upload, prompt=prompt, params=params)
+
+    def _extract_job(self, job: PipelineJob) -> None:
+        if job.cached:
+            job.tika_result = job.cached.tika_result
+            return
+        started = time.perf_counter()
+        job.tika_result = self._extract(job.upload, job.tika_future)
+        metrics.observe_extract(
+            time.perf_counter() - started,
+            job.tika_result.mime_type,
+            job.upload.file_size,
+        )
+
+    def _enrich_job(self, job: PipelineJob) -> None:
+        tika_result = job.tika_result
+        started = time.perf_counter()
+        try:
+            job.claude_result = self.claude_service.enrich(
+                text=tika_result.full_text,
+                title=tika_result.title,
+                author=tika_result.author,
                 mime_type=tika_result.mime_type,
                 language=tika_result.language,
-                author=tika_result.author,
+            )
+        except Exception as e:
+            if not self._without_claude(job.upload, e):
+                raise
+            return
+        metrics.observe_claude(
+            time.perf_counter() - started,
+            job.claude_result.raw_response,
+            tika_result.mime_type,
+            job.upload.file_size,
+        )
+
+    async def _aenrich(
+        self, upload: UploadedFile, tika_result: TikaResult
+    ) -> ClaudeResult | None:
+        started = time.perf_counter()
+        try:
+            claude_result = await self.claude_service.aenrich(
+                text=tika_result.full_text,
                 title=tika_result.title,
-                created_date=tika_result.created_date,
-                modified_date=tika_result.modified_date,
-                full_text=tika_result.full_text,
-                raw_metadata=tika_result.raw_metadata,
+                author=tika_result.author,
+                mime_type=tika_result.mime_type,
+                language=tika_result.language,
             )
+        except Exception as e:
+            if not self._without_claude(upload, e):
+                raise
+            return None
+        metrics.observe_claude(
+            time.perf_counter() - started,
+            claude_result.raw_response,
+            tika_result.mime_type,
+            upload.file_size,
+        )
+        return claude_result
+
+    def _without_claude(self, upload: UploadedFile, error: Exception) -> bool:
+        """Whether to carry on without Claude after ``error``.
+
+        With TIKI_CLAUDE_OUTAGE = "degrade", an open breaker or an outage
+        error completes the upload with a Tika-only record, flagged for
+        re-enrichment.
+        """
+        if settings.TIKI_CLAUDE_OUTAGE != "degrade":
+            return False
+        if not isinstance(error, CircuitOpenError) and not claude.is_outage(error):
+            return False
+        logger.warning(
+            "Claude unavailable, completing upload %s without it: %s", upload.id, error
+        )
+        upload.needs_enrichment = True
+        return True
+
+    def _save_extraction(self, upload: UploadedFile, tika_result: TikaResult):
+        started = time.perf_counter()
+        for row in self._extraction_rows(upload, tika_result):
+            row.save()
+        metrics.observe_db_write(time.perf_counter() - started, "extraction")
 
-            # Step 2: Enrich with Claude (if API key configured)
-            claude_result = None
-            if self._claude_enabled:
-                upload.mark_enriching()
-                claude_result = self.claude_service.enrich(
-                    text=tika_result.full_text,
-                    title=tika_result.title,
-                    author=tika_result.author,
-                    mime_type=tika_result.mime_type,
-                    language=tika_result.language,
+    def _extraction_rows(
+        self, upload: UploadedFile, tika_result: TikaResult
+    ) -> tuple[TikaMetadata, ExtractedText]:
+        metadata = TikaMetadata(
+            upload=upload,
+            mime_type=tika_result.mime_type,
+            language=tika_result.language,
+            author=tika_result.author,
+            title=tika_result.title,
+            created_date=tika_result.created_date,
+            modified_date=tika_result.modified_date,
+            raw_metadata=tika_result.raw_metadata,
+        )
+        return metadata, ExtractedText.from_text(tika_result.full_text, upload=upload)
+
+    def _reused_claude_result(self, cached: CachedResult) -> ClaudeResult:
+        claude_result = cached.claude_result
+        claude_result.raw_response = {
+            **claude_result.raw_response,
+            "reused_from": cached.source_id,
+        }
+        return claude_result
+
+    async def _aextract(
+        self, upload: UploadedFile, tika_future: Future | None
+    ) -> TikaResult:
+        if tika_future is not None:
+            try:
+                return await asyncio.wait_for(
+                    asyncio.wrap_future(tika_future), settings.TIKA_READ_TIMEOUT
                 )
+            except Exception as e:
+                logger.warning(
+                    "Streamed extraction failed for upload %s, retrying from "
+                    "storage: %s",
+                    upload.id,
+                    e,
+                )
+        return await self.tika_service.aextract(upload.file.path)
 
-                ClaudeEnrichment.objects.create(
-                    upload=upload,
-                    suggested_themes=claude_result.suggested_themes,
-                    generated_description=claude_result.generated_description,
-                    suggested_keywords=claude_result.suggested_keywords,
-                    prompt_used=claude_result.prompt_used,
-                    raw_response=claude_result.raw_response,
-                    model_used=claude_result.model_used,
+    def _extract(self, upload: UploadedFile, tika_future: Future | None) -> TikaResult:
+        if tika_future is not None:
+            try:
+                return tika_future.result(timeout=settings.TIKA_READ_TIMEOUT)
+            except Exception as e:
+                logger.warning(
+                    "Streamed extraction failed for upload %s, retrying from "
+                    "storage: %s",
+                    upload.id,
+                    e,
                 )
-            else:
-                logger.info("Skipping Claude enrichment (no API key configured)")
-
-            # Step 3: Build DCAT-AP JSON-LD
-            dcat_result = self.dcat_builder.build(
-                tika_result=tika_result,
-                claude_result=claude_result,
-                filename=upload.original_filename,
-                file_size=upload.file_size,
-            )
+        return self.tika_service.extract(upload.file.path)
 
-            dcat_output = DCATOutput.objects.create(
-                upload=upload,
-                jsonld=dcat_result.jsonld,
-                empty_fields=dcat_result.empty_fields,
-            )
+    def _save_enrichment(self, upload: UploadedFile, claude_result: ClaudeResult):
+        self._enrichment_row(upload, claude_result).save()
 
-            upload.mark_completed()
-            return dcat_output
+    def _enrichment_row(
+        self, upload: UploadedFile, claude_result: ClaudeResult
+    ) -> ClaudeEnrichment:
+        return ClaudeEnrichment(
+            upload=upload,
+            suggested_themes=claude_result.suggested_themes,
+            generated_description=claude_result.generated_description,
+            suggested_keywords=claude_result.suggested_keywords,
+            prompt_used=claude_result.prompt_used,
+            raw_response=claude_result.raw_response,
+            model_used=claude_result.model_used,
+            model_requested=claude_result.model_requested,
+        )
 
-        except Exception as e:
-            logger.exception("Pipeline failed for upload %s", upload.id)
-            upload.mark_failed(e)
-            raise
+    def _output_row(self, job: PipelineJob) -> DCATOutput:
+        return DCATOutput(
+            upload=job.upload,
+            jsonld=job.dcat_result.jsonld,
+            empty_fields=job.dcat_result.empty_fields,
+        )
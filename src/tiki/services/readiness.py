@@ -0,0 +1,152 @@
+"""Readiness probes for load balancers and orchestrators.
+
+Unlike /health/ (liveness), readiness checks the services a request needs:
+the database, the Tika server and the Claude configuration. Results are
+cached per process for TIKI_READY_CACHE_TTL seconds, so frequent probes
+cost at most one round-trip to each dependency per interval.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+
+from tiki.models import UploadedFile
+
+from . import claude, pipeline
+from .tika import TikaClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Check:
+    ok: bool
+    seconds: float = 0.0
+    detail: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {"ok": self.ok, "ms": round(self.seconds * 1000, 1), **self.detail}
+
+
+def check_database() -> Check:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    return Check(ok=True)
+
+
+def check_tika() -> Check:
+    return Check(ok=True, detail={"version": _tika_client().version()})
+
+
+def check_claude() -> Check:
+    configured = claude.is_configured()
+    return Check(
+        ok=configured or not settings.TIKI_READY_REQUIRE_CLAUDE,
+        detail={
+            "configured": configured,
+            "mode": settings.CLAUDE_ENRICHMENT_MODE,
+            "model": settings.CLAUDE_MODEL,
+        },
+    )
+
+
+def saturation() -> dict:
+    """Queued uploads, pipelines running anywhere, and pipelines running here."""
+    active = UploadedFile.objects.filter(
+        status__in=["pending", "extracting", "enriching"]
+    ).aggregate(
+        queued=Count("id", filter=Q(status="pending")),
+        in_flight=Count("id", filter=~Q(status="pending")),
+    )
+    return {
+        "queue_depth": active["queued"],
+        "in_flight": active["in_flight"],
+        "process_in_flight": pipeline.in_flight(),
+    }
+
+
+CHECKS: dict[str, Callable[[], Check]] = {
+    "database": check_database,
+    "tika": check_tika,
+    "claude": check_claude,
+}
+
+
+def readiness() -> tuple[bool, dict]:
+    """Return whether this process should receive traffic, and why."""
+    checks = {name: _cached(name, probe) for name, probe in CHECKS.items()}
+    ready = all(check.ok for check in checks.values())
+    report = {"checks": {name: check.as_dict() for name, check in checks.items()}}
+
+    if checks["database"].ok:
+        load = _cached("saturation", lambda: Check(ok=True, detail=saturation()))
+        if load.ok:
+            report["saturation"] = load.detail
+            saturated = _saturated(load.detail)
+            if saturated:
+                report["saturated"] = saturated
+                ready = False
+
+    report["status"] = "ready" if ready else "unavailable"
+    return ready, report
+
+
+def reset() -> None:
+    """Forget cached results (for tests)."""
+    with _lock:
+        _results.clear()
+
+
+def _saturated(load: dict) -> list[str]:
+    limits = {
+        "queue_depth": settings.TIKI_READY_MAX_QUEUE_DEPTH,
+        "process_in_flight": settings.TIKI_READY_MAX_IN_FLIGHT,
+    }
+    return [name for name, limit in limits.items() if limit and load[name] >= limit]
+
+
+_results: dict[str, tuple[float, Check]] = {}
+_lock = threading.Lock()
+
+
+def _cached(name: str, probe: Callable[[], Check]) -> Check:
+    # Probes run under the lock, so concurrent requests share one probe
+    with _lock:
+        now = time.monotonic()
+        cached = _results.get(name)
+        if cached and now - cached[0] < settings.TIKI_READY_CACHE_TTL:
+            return cached[1]
+
+        started = time.perf_counter()
+        try:
+            check = probe()
+        except Exception as e:
+            logger.warning("Readiness check %s failed: %s", name, e)
+            check = Check(ok=False, detail={"error": str(e)[:200]})
+        check.seconds = time.perf_counter() - started
+        _results[name] = (now, check)
+        return check
+
+
+_tika_clients: dict[str, TikaClient] = {}
+
+
+def _tika_client() -> TikaClient:
+    # Not the shared client: probes need short timeouts and no retries.
+    # Only called from _cached, under its lock
+    url = settings.TIKA_SERVER_URL
+    if url not in _tika_clients:
+        _tika_clients[url] = TikaClient(
+            url,
+            connect_timeout=settings.TIKI_READY_TIMEOUT,
+            read_timeout=settings.TIKI_READY_TIMEOUT,
+            retries=0,
+            pool_maxsize=1,
+        )
+    return _tika_clients[url]
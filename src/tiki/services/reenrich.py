@@ -0,0 +1,303 @@
+"""Re-run Claude enrichment and the DCAT build over stored uploads.
+
+Used after changing CLAUDE_MODEL or the prompt, and to finish uploads that
+completed without Claude during an outage. Text comes from the stored
+ExtractedText, so neither the original file nor Tika is needed.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from tiki.models import (
+    ClaudeEnrichment,
+    DCATOutput,
+    ExtractedText,
+    ReenrichmentRun,
+    TikaMetadata,
+    UploadedFile,
+)
+
+from . import claude, metrics
+from .breaker import CircuitOpenError
+from .dedup import tika_result_from_metadata
+from .pipeline import EnrichmentPipeline
+
+logger = logging.getLogger(__name__)
+
+# The DCATOutput fields regenerate() changes
+REGENERATED_FIELDS = [
+    "jsonld",
+    "empty_fields",
+    "merged_jsonld",
+    "version",
+    "updated_at",
+]
+
+
+class ReenrichError(RuntimeError):
+    pass
+
+
+@dataclass
+class ReenrichFilter:
+    """Which uploads to re-enrich. Criteria are combined with AND."""
+
+    statuses: list[str] = field(
+        default_factory=lambda: [UploadedFile.Status.COMPLETED.value]
+    )
+    # Enrichments made by one of these models
+    models: list[str] = field(default_factory=list)
+    # Uploads without an enrichment by the current CLAUDE_MODEL
+    outdated: bool = False
+    # Uploads completed without Claude during an outage
+    needs_enrichment: bool = False
+    since: datetime | None = None
+    until: datetime | None = None
+    # Finalized records are published; leave them alone unless asked
+    include_finalized: bool = False
+
+    def queryset(self) -> QuerySet:
+        uploads = UploadedFile.objects.filter(status__in=self.statuses)
+        if self.models:
+            uploads = uploads.filter(
+                Q(claude_enrichment__model_used__in=self.models)
+                | Q(claude_enrichment__model_requested__in=self.models)
+            )
+        if self.outdated:
+            uploads = uploads.filter(
+                Q(claude_enrichment__isnull=True)
+                | ~Q(claude_enrichment__model_requested=settings.CLAUDE_MODEL)
+            )
+        if self.needs_enrichment:
+            uploads = uploads.filter(needs_enrichment=True)
+        if self.since is not None:
+            uploads = uploads.filter(created_at__gte=self.since)
+        if self.until is not None:
+            uploads = uploads.filter(created_at__lt=self.until)
+        if not self.include_finalized:
+            uploads = uploads.exclude(dcat_output__is_finalized=True)
+        return uploads
+
+    def as_dict(self) -> dict:
+        """JSON-serializable form, stored with the run."""
+        return {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in asdict(self).items()
+        }
+
+
+@dataclass
+class ReenrichReport:
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+class Reenricher:
+    """Re-enrich the uploads matching a filter, ``workers`` at a time.
+
+    Uploads are read in pages of ``batch_size`` in id order (a keyset
+    cursor), and the run's checkpoint advances once a whole page is done,
+    so an interrupted run resumes after its last complete page. ``rate``
+    caps Claude requests per minute across workers (0: only the Claude
+    scheduler's rate limits apply).
+    """
+
+    def __init__(
+        self,
+        pipeline: EnrichmentPipeline | None = None,
+        workers: int | None = None,
+        rate: float | None = None,
+        batch_size: int | None = None,
+    ):
+        self.pipeline = pipeline or EnrichmentPipeline()
+        if not hasattr(self.pipeline, "claude_service"):
+            raise ReenrichError("Claude is not configured (ANTHROPIC_API_KEY)")
+        self.workers = workers or settings.TIKI_REENRICH_WORKERS
+        self.rate = settings.TIKI_REENRICH_RATE if rate is None else rate
+        self.batch_size = batch_size or settings.TIKI_REENRICH_BATCH_SIZE
+        self._pacer = _Pacer(self.rate)
+
+    def run(
+        self,
+        reenrichment_run: ReenrichmentRun,
+        upload_filter: ReenrichFilter,
+        max_batches: int | None = None,
+    ) -> ReenrichReport:
+        """Continue ``reenrichment_run`` from its checkpoint.
+
+        Stops early, with the checkpoint at the last complete page, if
+        Claude becomes unavailable.
+        """
+        report = ReenrichReport()
+        pages = _pages(
+            upload_filter.queryset(),
+            reenrichment_run.last_upload_id,
+            self.batch_size,
+        )
+        batches = 0
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="reenrich") as pool:
+            for uploads in pages:
+                futures = [pool.submit(self._reenrich_task, u) for u in uploads]
+                page = Counter()
+                for future in wait(futures).done:
+                    error = future.exception()
+                    if error is not None:
+                        # The checkpoint stays before this page, so a rerun
+                        # retries all of it
+                        raise ReenrichError(
+                            f"Claude is unavailable, stopping: {error}"
+                        ) from error
+                    page[future.result()] += 1
+                self._checkpoint(reenrichment_run, uploads[-1].id, page)
+                report.processed += page["processed"]
+                report.skipped += page["skipped"]
+                report.failed += page["failed"]
+                batches += 1
+                if max_batches is not None and batches >= max_batches:
+                    return report
+        reenrichment_run.finished_at = timezone.now()
+        reenrichment_run.save(update_fields=["finished_at", "updated_at"])
+        return report
+
+    def reenrich(self, upload: UploadedFile) -> bool:
+        """Re-enrich one upload loaded by ``_pages``. Returns False if it has
+        no stored extraction to work from.
+        """
+        try:
+            metadata, text = upload.tika_metadata, upload.extracted_text
+        except (TikaMetadata.DoesNotExist, ExtractedText.DoesNotExist):
+            return False
+        tika_result = tika_result_from_metadata(metadata, include_text=False)
+        tika_result.full_text = text.get_text()
+
+        self._pacer.wait()
+        started = time.perf_counter()
+        claude_result = self.pipeline.claude_service.enrich(
+            text=tika_result.full_text,
+            title=tika_result.title,
+            author=tika_result.author,
+            mime_type=tika_result.mime_type,
+            language=tika_result.language,
+        )
+        metrics.observe_claude(
+            time.perf_counter() - started,
+            claude_result.raw_response,
+            tika_result.mime_type,
+            upload.file_size,
+        )
+        build = self.pipeline.dcat_builder.build(
+            tika_result=tika_result,
+            claude_result=claude_result,
+            filename=upload.original_filename,
+            file_size=upload.file_size,
+        )
+
+        with transaction.atomic():
+            ClaudeEnrichment.objects.update_or_create(
+                upload=upload,
+                defaults={
+                    "suggested_themes": claude_result.suggested_themes,
+                    "generated_description": claude_result.generated_description,
+                    "suggested_keywords": claude_result.suggested_keywords,
+                    "prompt_used": claude_result.prompt_used,
+                    "raw_response": claude_result.raw_response,
+                    "model_used": claude_result.model_used,
+                    "model_requested": claude_result.model_requested,
+                },
+            )
+            # Re-read under a row lock: the page may have been loaded minutes
+            # ago, and edits or finalization since then must not be lost
+            output = (
+                DCATOutput.objects.select_for_update().filter(upload=upload).first()
+            )
+            if output is None:
+                output = DCATOutput(upload=upload, version=0)
+            output.regenerate(build.jsonld, build.empty_fields)
+            output.save(update_fields=REGENERATED_FIELDS if output.pk else None)
+            # update() leaves updated_at alone, as for retention
+            UploadedFile.objects.filter(pk=upload.pk).update(needs_enrichment=False)
+        return True
+
+    def _reenrich_task(self, upload: UploadedFile) -> str:
+        """Run ``reenrich`` on a worker thread; returns the report field to
+        count it under. Raises only when Claude is unavailable.
+        """
+        close_old_connections()
+        try:
+            return "processed" if self.reenrich(upload) else "skipped"
+        except Exception as e:
+            if isinstance(e, CircuitOpenError) or claude.is_outage(e):
+                raise
+            logger.exception("Re-enrichment failed for upload %s", upload.id)
+            return "failed"
+        finally:
+            connection.close()
+
+    def _checkpoint(
+        self, reenrichment_run: ReenrichmentRun, last_id, page: Counter
+    ) -> None:
+        reenrichment_run.last_upload_id = last_id
+        reenrichment_run.processed += page["processed"]
+        reenrichment_run.skipped += page["skipped"]
+        reenrichment_run.failed += page["failed"]
+        reenrichment_run.save(
+            update_fields=[
+                "last_upload_id",
+                "processed",
+                "skipped",
+                "failed",
+                "updated_at",
+            ]
+        )
+        logger.info(
+            "Re-enrichment %s: %d processed, %d skipped, %d failed",
+            reenrichment_run.name,
+            reenrichment_run.processed,
+            reenrichment_run.skipped,
+            reenrichment_run.failed,
+        )
+
+
+class _Pacer:
+    """Space calls evenly at ``rate`` per minute across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 60 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        time.sleep(slot - now)
+
+
+def _pages(
+    queryset: QuerySet, after_id, batch_size: int
+) -> Iterator[list[UploadedFile]]:
+    # Keyset on id; one query per page loads the stored extraction. The
+    # DCAT output is read later, under a lock
+    queryset = queryset.select_related("tika_metadata", "extracted_text").order_by("id")
+    while True:
+        page = queryset if after_id is None else queryset.filter(id__gt=after_id)
+        uploads = list(page[:batch_size])
+        if not uploads:
+            return
+        yield uploads
+        after_id = uploads[-1].id
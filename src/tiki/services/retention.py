@@ -0,0 +1,171 @@
+import gzip
+import logging
+import shutil
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from tiki.models import UploadedFile
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = [UploadedFile.Status.COMPLETED, UploadedFile.Status.FAILED]
+DELETE_ON_CHOICES = ("", "completed", "finalized")
+
+
+@dataclass
+class RetentionPolicy:
+    """When original uploads are deleted or compressed.
+
+    Only uploads that finished processing (completed or failed) are touched;
+    ages are measured from their last status change.
+    """
+
+    delete_after: timedelta | None = None
+    # "completed": as soon as the upload completes; "finalized": once its
+    # DCAT record is finalized
+    delete_on: str = ""
+    compress_after: timedelta | None = None
+
+    def __post_init__(self):
+        if self.delete_on not in DELETE_ON_CHOICES:
+            raise ValueError(f"Unsupported delete_on: {self.delete_on}")
+
+    @classmethod
+    def from_settings(cls) -> "RetentionPolicy":
+        return cls(
+            delete_after=_days(settings.TIKI_RETENTION_DELETE_AFTER_DAYS),
+            delete_on=settings.TIKI_RETENTION_DELETE_ON,
+            compress_after=_days(settings.TIKI_RETENTION_COMPRESS_AFTER_DAYS),
+        )
+
+    def deletable(self) -> QuerySet:
+        conditions = []
+        if self.delete_after is not None:
+            conditions.append(Q(updated_at__lt=timezone.now() - self.delete_after))
+        if self.delete_on == "completed":
+            conditions.append(Q(status=UploadedFile.Status.COMPLETED))
+        elif self.delete_on == "finalized":
+            conditions.append(Q(dcat_output__is_finalized=True))
+        if not conditions:
+            return UploadedFile.objects.none()
+        return (
+            UploadedFile.objects.filter(status__in=TERMINAL_STATUSES)
+            .exclude(file_state=UploadedFile.FileState.DELETED)
+            .filter(reduce(or_, conditions))
+        )
+
+    def compressible(self) -> QuerySet:
+        if self.compress_after is None:
+            return UploadedFile.objects.none()
+        return UploadedFile.objects.filter(
+            status__in=TERMINAL_STATUSES,
+            file_state=UploadedFile.FileState.PRESENT,
+            updated_at__lt=timezone.now() - self.compress_after,
+        )
+
+
+@dataclass
+class RetentionReport:
+    deleted: int = 0
+    compressed: int = 0
+    failed: int = 0
+
+
+def apply_retention(
+    policy: RetentionPolicy | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> RetentionReport:
+    """Delete, then compress, original uploads due under ``policy``.
+
+    Work is done ``batch_size`` uploads at a time, at most ``max_batches``
+    per pass, so a run can be bounded and simply repeated later.
+    """
+    policy = policy or RetentionPolicy.from_settings()
+    batch_size = batch_size or settings.TIKI_RETENTION_BATCH_SIZE
+    report = RetentionReport()
+
+    for uploads in _batches(policy.deletable(), batch_size, max_batches):
+        deleted = []
+        for upload in uploads:
+            try:
+                upload.file.storage.delete(upload.file.name)
+            except OSError:
+                logger.exception("Could not delete the file of upload %s", upload.id)
+                report.failed += 1
+            else:
+                deleted.append(upload.id)
+        # update() leaves updated_at alone, so ages still count from processing
+        UploadedFile.objects.filter(id__in=deleted).update(
+            file_state=UploadedFile.FileState.DELETED
+        )
+        report.deleted += len(deleted)
+
+    for uploads in _batches(policy.compressible(), batch_size, max_batches):
+        for upload in uploads:
+            try:
+                compress_file(upload)
+            except OSError:
+                logger.exception("Could not compress the file of upload %s", upload.id)
+                report.failed += 1
+            else:
+                report.compressed += 1
+
+    logger.info(
+        "Retention: deleted %d, compressed %d, failed %d files",
+        report.deleted,
+        report.compressed,
+        report.failed,
+    )
+    return report
+
+
+def compress_file(upload: UploadedFile):
+    """Replace the upload's file with a gzipped copy (``<name>.gz``).
+
+    The row points at the new blob before the original is removed, so an
+    interruption leaves at worst an orphaned original, never a dangling row.
+    """
+    storage, name = upload.file.storage, upload.file.name
+    with tempfile.TemporaryFile() as buffer:
+        with (
+            storage.open(name, "rb") as source,
+            gzip.GzipFile(fileobj=buffer, mode="wb") as target,
+        ):
+            shutil.copyfileobj(source, target)
+        buffer.seek(0)
+        compressed_name = storage.save(f"{name}.gz", File(buffer))
+    UploadedFile.objects.filter(pk=upload.pk).update(
+        file=compressed_name, file_state=UploadedFile.FileState.COMPRESSED
+    )
+    storage.delete(name)
+    upload.file.name = compressed_name
+    upload.file_state = UploadedFile.FileState.COMPRESSED
+
+
+def _batches(
+    queryset: QuerySet, batch_size: int, max_batches: int | None
+) -> Iterator[list[UploadedFile]]:
+    # Keyset on id: rows that failed are passed over instead of refetched
+    queryset = queryset.only("id", "file", "file_state").order_by("id")
+    last_id, batches = None, 0
+    while max_batches is None or batches < max_batches:
+        page = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        uploads = list(page[:batch_size])
+        if not uploads:
+            return
+        yield uploads
+        last_id, batches = uploads[-1].id, batches + 1
+
+
+def _days(days: int) -> timedelta | None:
+    return timedelta(days=days) if days > 0 else None
@@ -0,0 +1,421 @@
+"""Render DCAT-AP records as JSON-LD, Turtle, RDF/XML or N-Triples.
+
+Rendered bytes are cached per DCATOutput version, so repeated reads (e.g.
+catalogue harvesters) skip serialization entirely. The RDF serializers are
+generators, so many records can be streamed without building one big string.
+They understand the JSON-LD produced by DCATBuilder (prefixed terms from the
+document's ``@context``, nested nodes, ``@id``/``@value`` objects), not
+JSON-LD in general.
+"""
+
+import itertools
+import json
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .dcat_builder import DCAT_CONTEXT
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+NCNAME_RE = re.compile(r"^[A-Za-z_](?:[\w.-]*[\w-])?$")
+IRI_ESCAPE_RE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+LITERAL_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+
+
+@dataclass(frozen=True)
+class Format:
+    name: str
+    media_type: str
+    extension: str
+
+
+FORMATS = {
+    "jsonld": Format("jsonld", "application/ld+json", "jsonld"),
+    "turtle": Format("turtle", "text/turtle", "ttl"),
+    "rdfxml": Format("rdfxml", "application/rdf+xml", "rdf"),
+    "ntriples": Format("ntriples", "application/n-triples", "nt"),
+}
+# Short names accepted in ?format=
+FORMAT_ALIASES = {
+    **{fmt.extension: name for name, fmt in FORMATS.items()},
+    **{name: name for name in FORMATS},
+    "json-ld": "jsonld",
+    "xml": "rdfxml",
+}
+
+
+def dumps(value) -> bytes:
+    """Encode ``value`` as compact UTF-8 JSON, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps_with(value: dict, **encoded: bytes) -> bytes:
+    """Encode ``value`` with extra keys whose values are already JSON bytes."""
+    body = dumps(value)
+    for key, data in encoded.items():
+        body = b"%s%s%s:%s}" % (
+            body[:-1],
+            b"," if len(body) > 2 else b"",
+            dumps(key),
+            data,
+        )
+    return body
+
+
+class IRI(str):
+    pass
+
+
+class BNode(str):
+    pass
+
+
+@dataclass(frozen=True)
+class Literal:
+    value: str
+    datatype: str | None = None
+    language: str | None = None
+
+
+def triples(jsonld: dict, bnode_prefix: str = "b") -> Iterator[tuple]:
+    """Yield ``(subject, predicate, object)`` triples of a JSON-LD document.
+
+    Empty strings and nulls (DCATBuilder's placeholders for missing required
+    fields) produce no triples.
+    """
+    context = jsonld.get("@context") or {}
+    counter = itertools.count()
+    nodes = jsonld["@graph"] if "@graph" in jsonld else [jsonld]
+    for node in nodes:
+        yield from _node_triples(node, context, bnode_prefix, counter)
+
+
+def _expand(term: str, context: dict) -> str | None:
+    """Expand a compact IRI; None for a bare term (not in the context)."""
+    prefix, sep, local = term.partition(":")
+    if not sep:
+        return None
+    return context[prefix] + local if prefix in context else term
+
+
+def _node_triples(node: dict, context: dict, bnode_prefix: str, counter):
+    subject = (
+        IRI(_expand(node["@id"], context) or node["@id"])
+        if "@id" in node
+        else BNode(f"{bnode_prefix}{next(counter)}")
+    )
+    types = node.get("@type", [])
+    for rdf_type in [types] if isinstance(types, str) else types:
+        yield subject, IRI(RDF + "type"), IRI(_expand(rdf_type, context) or rdf_type)
+
+    for key, values in node.items():
+        if key.startswith("@"):
+            continue
+        predicate = _expand(key, context)
+        if predicate is None:
+            # Terms missing from the context are dropped, as in JSON-LD
+            continue
+        for value in values if isinstance(values, list) else [values]:
+            obj = _object(value, context)
+            if obj is None:
+                continue
+            if isinstance(obj, dict):
+                nested = list(_node_triples(obj, context, bnode_prefix, counter))
+                if not nested:
+                    continue
+                yield subject, IRI(predicate), nested[0][0]
+                yield from nested
+            else:
+                yield subject, IRI(predicate), obj
+
+
+def _object(value, context: dict):
+    """Return the RDF term for a JSON-LD value, or a dict for a nested node."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return Literal(str(value).lower(), XSD + "boolean")
+    if isinstance(value, int):
+        return Literal(str(value), XSD + "integer")
+    if isinstance(value, float):
+        return Literal(repr(value), XSD + "double")
+    if isinstance(value, str):
+        return Literal(value)
+    if not isinstance(value, dict):
+        return None
+    if "@value" in value:
+        if value["@value"] in (None, ""):
+            return None
+        datatype = value.get("@type")
+        return Literal(
+            str(value["@value"]),
+            (_expand(datatype, context) or datatype) if datatype else None,
+            value.get("@language"),
+        )
+    if set(value) == {"@id"}:
+        return IRI(_expand(value["@id"], context) or value["@id"])
+    return value
+
+
+def _nt_term(term) -> str:
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    if isinstance(term, IRI):
+        escaped = IRI_ESCAPE_RE.sub(lambda m: f"\\u{ord(m.group()):04X}", term)
+        return f"<{escaped}>"
+    literal = f'"{term.value.translate(LITERAL_ESCAPES)}"'
+    if term.language:
+        return f"{literal}@{term.language}"
+    if term.datatype:
+        return f"{literal}^^{_nt_term(IRI(term.datatype))}"
+    return literal
+
+
+def iter_ntriples(documents: Iterable[tuple[str, dict]]) -> Iterator[str]:
+    """Yield N-Triples lines for ``(id, jsonld)`` pairs."""
+    for doc_id, jsonld in documents:
+        for s, p, o in triples(jsonld, _bnode_prefix(doc_id)):
+            yield f"{_nt_term(s)} {_nt_term(p)} {_nt_term(o)} .\n"
+
+
+def iter_turtle(
+    documents: Iterable[tuple[str, dict]], prefixes: dict | None = None
+) -> Iterator[str]:
+    """Yield Turtle for ``(id, jsonld)`` pairs, one subject block at a time."""
+    prefixes = prefixes or _default_prefixes()
+    for prefix, namespace in prefixes.items():
+        yield f"@prefix {prefix}: <{namespace}> .\n"
+
+    def term(value) -> str:
+        if isinstance(value, IRI):
+            return _qname(value, prefixes) or _nt_term(value)
+        if isinstance(value, Literal) and value.datatype and not value.language:
+            literal = f'"{value.value.translate(LITERAL_ESCAPES)}"'
+            datatype = _qname(value.datatype, prefixes) or _nt_term(
+                IRI(value.datatype)
+            )
+            return f"{literal}^^{datatype}"
+        return _nt_term(value)
+
+    for doc_id, jsonld in documents:
+        for subject, properties in _by_subject(triples(jsonld, _bnode_prefix(doc_id))):
+            yield f"\n{term(subject)}\n"
+            yield " ;\n".join(
+                f"    {'a' if p == RDF + 'type' else term(p)} "
+                f"{', '.join(term(o) for o in objects)}"
+                for p, objects in properties.items()
+            )
+            yield " .\n"
+
+
+def iter_rdfxml(
+    documents: Iterable[tuple[str, dict]], prefixes: dict | None = None
+) -> Iterator[str]:
+    """Yield RDF/XML for ``(id, jsonld)`` pairs, one description at a time."""
+    prefixes = {"rdf": RDF, **(prefixes or _default_prefixes())}
+    declarations = " ".join(
+        f"xmlns:{prefix}={quoteattr(namespace)}"
+        for prefix, namespace in prefixes.items()
+    )
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield f"<rdf:RDF {declarations}>\n"
+    for doc_id, jsonld in documents:
+        for subject, properties in _by_subject(triples(jsonld, _bnode_prefix(doc_id))):
+            about = (
+                f"rdf:nodeID={quoteattr(subject)}"
+                if isinstance(subject, BNode)
+                else f"rdf:about={quoteattr(subject)}"
+            )
+            yield f"  <rdf:Description {about}>\n"
+            for predicate, objects in properties.items():
+                for obj in objects:
+                    element = _xml_property(predicate, obj, prefixes)
+                    if element is not None:
+                        yield f"    {element}\n"
+            yield "  </rdf:Description>\n"
+    yield "</rdf:RDF>\n"
+
+
+def _xml_property(predicate: str, obj, prefixes: dict) -> str | None:
+    """Return the property element, or None if RDF/XML can't express it."""
+    tag = _qname(predicate, prefixes)
+    namespace = ""
+    if tag is None:
+        # Declare the predicate's namespace on the element itself
+        ns, local = _split_iri(predicate)
+        if not NCNAME_RE.match(local):
+            return None
+        tag, namespace = f"ns0:{local}", f" xmlns:ns0={quoteattr(ns)}"
+    if isinstance(obj, BNode):
+        return f"<{tag}{namespace} rdf:nodeID={quoteattr(obj)}/>"
+    if isinstance(obj, IRI):
+        return f"<{tag}{namespace} rdf:resource={quoteattr(obj)}/>"
+    attributes = namespace
+    if obj.language:
+        attributes += f" xml:lang={quoteattr(obj.language)}"
+    elif obj.datatype:
+        attributes += f" rdf:datatype={quoteattr(obj.datatype)}"
+    return f"<{tag}{attributes}>{escape(obj.value)}</{tag}>"
+
+
+def _by_subject(triples_: Iterable[tuple]) -> Iterator[tuple]:
+    """Group triples into ``(subject, {predicate: [objects]})``, in order."""
+    grouped: dict = {}
+    for s, p, o in triples_:
+        grouped.setdefault(s, {}).setdefault(p, []).append(o)
+    yield from grouped.items()
+
+
+def _split_iri(iri: str) -> tuple[str, str]:
+    cut = max(iri.rfind("#"), iri.rfind("/")) + 1
+    return iri[:cut], iri[cut:]
+
+
+def _qname(iri: str, prefixes: dict) -> str | None:
+    namespace, local = _split_iri(iri)
+    if not NCNAME_RE.match(local):
+        return None
+    for prefix, candidate in prefixes.items():
+        if candidate == namespace:
+            return f"{prefix}:{local}"
+    return None
+
+
+def _bnode_prefix(doc_id) -> str:
+    # Blank node labels must not clash between records in one stream
+    return f"u{str(doc_id).replace('-', '')}_b"
+
+
+def _default_prefixes() -> dict:
+    return dict(DCAT_CONTEXT)
+
+
+def serialize(documents: Iterable[tuple[str, dict]], fmt: str) -> Iterator[bytes]:
+    """Yield ``(id, jsonld)`` documents encoded in ``fmt`` as UTF-8 chunks.
+
+    JSON-LD output is a single document, or a JSON array of them.
+    """
+    if fmt == "jsonld":
+        yield from _iter_jsonld(documents)
+        return
+    chunks = {
+        "turtle": iter_turtle,
+        "rdfxml": iter_rdfxml,
+        "ntriples": iter_ntriples,
+    }[fmt](documents)
+    for chunk in chunks:
+        yield chunk.encode()
+
+
+def _iter_jsonld(documents: Iterable[tuple[str, dict]]) -> Iterator[bytes]:
+    documents = list(documents)
+    if len(documents) == 1:
+        yield dumps(documents[0][1])
+        return
+    yield b"["
+    for index, (_, jsonld) in enumerate(documents):
+        yield b"," + dumps(jsonld) if index else dumps(jsonld)
+    yield b"]"
+
+
+def _cache_key(dcat_output, fmt: str) -> str:
+    # Includes the row id: requeued uploads get a new DCATOutput at version 1
+    return (
+        f"tiki:dcat:{dcat_output.upload_id}:{dcat_output.pk}:"
+        f"{dcat_output.version}:{fmt}"
+    )
+
+
+def _render(dcat_output, fmt: str) -> bytes:
+    documents = [(dcat_output.upload_id, dcat_output.get_merged_jsonld())]
+    return b"".join(serialize(documents, fmt))
+
+
+def render(dcat_output, fmt: str = "jsonld") -> bytes:
+    """Return the merged record in ``fmt``, cached per DCATOutput version."""
+    cache = caches[settings.TIKI_RENDER_CACHE]
+    key = _cache_key(dcat_output, fmt)
+    data = cache.get(key)
+    if data is None:
+        data = _render(dcat_output, fmt)
+        cache.set(key, data, settings.TIKI_RENDER_CACHE_TIMEOUT)
+    return data
+
+
+def render_many(dcat_outputs: list, fmt: str) -> list[bytes]:
+    """Like ``render`` for many records, with one cache round-trip each way."""
+    cache = caches[settings.TIKI_RENDER_CACHE]
+    keys = [_cache_key(dcat_output, fmt) for dcat_output in dcat_outputs]
+    cached = cache.get_many(keys)
+    missing = {}
+    for key, dcat_output in zip(keys, dcat_outputs):
+        if key not in cached:
+            missing[key] = _render(dcat_output, fmt)
+    if missing:
+        cache.set_many(missing, settings.TIKI_RENDER_CACHE_TIMEOUT)
+    return [cached.get(key) or missing[key] for key in keys]
+
+
+async def arender(dcat_output, fmt: str = "jsonld") -> bytes:
+    """Async variant of ``render``."""
+    cache = caches[settings.TIKI_RENDER_CACHE]
+    key = _cache_key(dcat_output, fmt)
+    data = await cache.aget(key)
+    if data is None:
+        data = _render(dcat_output, fmt)
+        await cache.aset(key, data, settings.TIKI_RENDER_CACHE_TIMEOUT)
+    return data
+
+
+class FormatError(ValueError):
+    """The request asks for a format that cannot be served; ``status`` is 400
+    for an unknown ``?format=`` and 406 for an unsatisfiable Accept header.
+    """
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+def negotiate(request, default: str | None = None) -> str | None:
+    """Pick a document format from ``?format=`` or the Accept header.
+
+    Returns None when plain JSON (the API's own envelope) is preferred, and
+    raises FormatError when no format the request allows is available.
+    """
+    requested = request.GET.get("format")
+    if requested:
+        if requested.lower() == "json":
+            return None
+        try:
+            return FORMAT_ALIASES[requested.lower()]
+        except KeyError:
+            raise FormatError(f"Unsupported format: {requested}", 400) from None
+    if not request.headers.get("Accept"):
+        return default
+    media_types = ["application/json"] + [fmt.media_type for fmt in FORMATS.values()]
+    preferred = request.get_preferred_type(media_types)
+    if preferred is None:
+        raise FormatError(
+            f"None of the accepted types is available: {', '.join(media_types)}",
+            406,
+        )
+    for name, fmt in FORMATS.items():
+        if fmt.media_type == preferred:
+            return name
+    return default
@@ -0,0 +1,182 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import close_old_connections, connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """One step of a StagedPipeline.
+
+    ``handler`` takes an item and returns it (or a replacement) for the next
+    stage, or None when the item needs no further processing.
+    """
+
+    name: str
+    handler: Callable[[Any], Any]
+    concurrency: int = 1
+    # Capacity of the queue in front of the stage; defaults to 2 × concurrency
+    queue_size: int = 0
+
+
+class _StageRunner:
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.queue: queue.Queue = queue.Queue(
+            maxsize=stage.queue_size or 2 * stage.concurrency
+        )
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.running = stage.concurrency
+
+
+class StagedPipeline:
+    """Run items through stages connected by bounded queues.
+
+    Every stage has its own thread pool, so slow stages (a CPU-heavy Tika
+    extraction, a Claude call waiting on the network) overlap across items
+    instead of running one after another. A full queue blocks the stage
+    feeding it, which bounds the number of items in flight.
+
+    ``on_error(item, exc)`` is called when a handler raises; the item is then
+    dropped. Call ``close()`` to let queued items drain and stop the threads.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        on_error: Callable[[Any, Exception], None] | None = None,
+    ):
+        self._runners = [_StageRunner(stage) for stage in stages]
+        self._on_error = on_error
+        self._threads: list[threading.Thread] = []
+        self._started_at: float | None = None
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        for index, runner in enumerate(self._runners):
+            for number in range(runner.stage.concurrency):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(index,),
+                    name=f"tiki-stage-{runner.stage.name}-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def put(self, item, timeout: float | None = None) -> None:
+        """Queue an item for the first stage, blocking while it is full."""
+        self._runners[0].queue.put(item, timeout=timeout)
+
+    def wait_for_room(self, timeout: float | None = None) -> bool:
+        """Wait until the first stage can take an item without blocking.
+
+        Returns False if ``timeout`` passed first. With a single feeder, the
+        next ``put`` is then guaranteed not to block.
+        """
+        first = self._runners[0].queue
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with first.not_full:
+            # _qsize() is Queue's own unlocked size, as used by put()
+            while 0 < first.maxsize <= first._qsize():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                first.not_full.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Finish queued items, then stop every stage."""
+        first = self._runners[0]
+        for _ in range(first.stage.concurrency):
+            first.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def run(self, items: Iterable) -> None:
+        """Process ``items`` to completion."""
+        self.start()
+        try:
+            for item in items:
+                self.put(item)
+        finally:
+            self.close()
+
+    def stats(self) -> list[dict]:
+        """Per-stage queue depth, counters and throughput (items per second)."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        report = []
+        for runner in self._runners:
+            with runner.lock:
+                report.append({
+                    "stage": runner.stage.name,
+                    "concurrency": runner.stage.concurrency,
+                    "queue_depth": runner.queue.qsize(),
+                    "queue_size": runner.queue.maxsize,
+                    "processed": runner.processed,
+                    "failed": runner.failed,
+                    "busy_seconds": round(runner.busy_seconds, 3),
+                    "throughput": (
+                        round(runner.processed / elapsed, 3) if elapsed else 0.0
+                    ),
+                })
+        return report
+
+    def _work(self, index: int) -> None:
+        runner = self._runners[index]
+        following = (
+            self._runners[index + 1] if index + 1 < len(self._runners) else None
+        )
+        try:
+            while (item := runner.queue.get()) is not _STOP:
+                close_old_connections()
+                started = time.monotonic()
+                try:
+                    result = runner.stage.handler(item)
+                except Exception as e:
+                    elapsed = time.monotonic() - started
+                    with runner.lock:
+                        runner.failed += 1
+                        runner.busy_seconds += elapsed
+                    metrics.observe_stage(runner.stage.name, elapsed)
+                    self._failed(item, e)
+                    continue
+                elapsed = time.monotonic() - started
+                with runner.lock:
+                    runner.processed += 1
+                    runner.busy_seconds += elapsed
+                metrics.observe_stage(runner.stage.name, elapsed)
+                if result is not None and following is not None:
+                    following.queue.put(result)
+        finally:
+            connection.close()
+            with runner.lock:
+                runner.running -= 1
+                last = runner.running == 0
+            # The last thread out passes the shutdown on to the next stage
+            if last and following is not None:
+                for _ in range(following.stage.concurrency):
+                    following.queue.put(_STOP)
+
+    def _failed(self, item, error: Exception) -> None:
+        if self._on_error is None:
+            logger.error("Stage failed for %r: %s", item, error)
+            return
+        try:
+            self._on_error(item, error)
+        except Exception:
+            logger.exception("Error handler failed for %r", item)
@@ -0,0 +1,211 @@
+"""Pick the most representative parts of a long document for the prompt.
+
+The start of a long report is usually a cover page and table of contents.
+``select_text`` keeps a short lead, then fills the rest of the budget with
+high-scoring sentences sampled from every section of the document, so
+Claude sees what the document is actually about.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Share of the budget kept for the start of the document (title, abstract)
+LEAD_FRACTION = 0.15
+# Documents without recognisable headings are cut into this many sections
+DEFAULT_SECTIONS = 8
+# Longer "sentences" (tables, text without punctuation) are cut to this
+MAX_SENTENCE_CHARS = 400
+MIN_SENTENCE_CHARS = 20
+MAX_HEADING_CHARS = 80
+# Sentences scored per section; larger sections are sampled evenly
+MAX_CANDIDATES = 200
+SEPARATOR = "\n\n"
+
+WORD_RE = re.compile(r"[^\W\d_]{3,}")
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+TOC_LINE_RE = re.compile(r"(\.{3,}|…+|\s{3,})\s*\d+$")
+NUMBERED_HEADING_RE = re.compile(
+    r"^(#+\s+|\d+(\.\d+)*\.?\s+|[IVXLC]+\.\s+|"
+    r"(chapter|section|part|appendix|annex)\s+[\w.]+)",
+    re.IGNORECASE,
+)
+
+STOPWORDS = frozenset(
+    """
+    about above after again against all also and any are because been before
+    being below between both but can could did does doing down during each few
+    for from further had has have having her here hers herself him himself his
+    how into its itself just more most not now off once only other our ours
+    out over own same she should some such than that the their theirs them
+    then there these they this those through too under until very was were
+    what when where which while who whom why will with would you your yours
+    may must shall per via within without upon among
+    """.split()
+)
+
+
+@dataclass
+class _Section:
+    heading: str = ""
+    sentences: list[str] = field(default_factory=list)
+
+
+def select_text(text: str, max_chars: int) -> str:
+    """Return at most ``max_chars`` characters representative of ``text``.
+
+    Texts that already fit are returned unchanged.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    sections = _split_sections(text)
+    sentences = [s for section in sections for s in section.sentences]
+    if not sentences:
+        return text[:max_chars]
+
+    lead_budget = int(max_chars * LEAD_FRACTION)
+    lead, lead_count = [], 0
+    for sentence in sentences:
+        if sum(map(len, lead)) + len(sentence) > lead_budget:
+            break
+        lead.append(sentence)
+        lead_count += 1
+    # Sentences in the lead aren't picked again
+    sections = _drop_leading(sections, lead_count)
+
+    picked = _pick_sentences(sections, max_chars - len(" ".join(lead)))
+    parts = [" ".join(lead)] if lead else []
+    for section, indices in zip(sections, picked):
+        if not indices:
+            continue
+        chosen = " ".join(section.sentences[i] for i in sorted(indices))
+        parts.append(f"{section.heading}\n{chosen}" if section.heading else chosen)
+    if not parts:
+        # Nothing fits the budget (e.g. one huge run-on sentence)
+        return text[:max_chars]
+    return SEPARATOR.join(parts)[:max_chars]
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > MAX_HEADING_CHARS or line[-1] in ".,;:":
+        return False
+    if not WORD_RE.search(line):
+        return False
+    if NUMBERED_HEADING_RE.match(line) or line.isupper():
+        return True
+    words = line.split()
+    return len(words) <= 8 and all(w[0].isupper() for w in words if len(w) > 3)
+
+
+def _split_sentences(paragraph: list[str], seen: set[str]) -> list[str]:
+    """Split a paragraph into sentences, skipping repeats (running headers)."""
+    sentences = []
+    for sentence in SENTENCE_SPLIT_RE.split(" ".join(paragraph)):
+        sentence = sentence.strip()[:MAX_SENTENCE_CHARS]
+        if len(sentence) >= MIN_SENTENCE_CHARS and sentence not in seen:
+            seen.add(sentence)
+            sentences.append(sentence)
+    return sentences
+
+
+def _split_sections(text: str) -> list[_Section]:
+    """Split text into sections at heading-like lines, skipping TOC entries."""
+    sections = [_Section()]
+    paragraph: list[str] = []
+    seen: set[str] = set()
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            sections[-1].sentences += _split_sentences(paragraph, seen)
+            paragraph = []
+        elif line[-1].isdigit() and TOC_LINE_RE.search(line):
+            continue
+        elif _is_heading(line):
+            sections[-1].sentences += _split_sentences(paragraph, seen)
+            paragraph = []
+            sections.append(_Section(heading=line.lstrip("# ")))
+        else:
+            paragraph.append(line)
+    sections[-1].sentences += _split_sentences(paragraph, seen)
+    sections = [section for section in sections if section.sentences]
+
+    if len(sections) < 2:
+        # No usable structure: sample evenly sized stretches instead
+        sentences = [s for section in sections for s in section.sentences]
+        size = math.ceil(len(sentences) / DEFAULT_SECTIONS) or 1
+        sections = [
+            _Section(sentences=sentences[start : start + size])
+            for start in range(0, len(sentences), size)
+        ]
+    return sections
+
+
+def _drop_leading(sections: list[_Section], count: int) -> list[_Section]:
+    remaining = []
+    for section in sections:
+        dropped = min(count, len(section.sentences))
+        count -= dropped
+        remaining.append(_Section(section.heading, section.sentences[dropped:]))
+    return remaining
+
+
+def _pick_sentences(sections: list[_Section], budget: int) -> list[set[int]]:
+    """Choose sentences round-robin across sections, best-scoring first.
+
+    Each section's sentences are ranked by TF-IDF, treating sections as the
+    documents, so terms that characterise a section outrank boilerplate
+    shared by all of them.
+    """
+    section_terms = [
+        Counter(WORD_RE.findall(" ".join(section.sentences).lower()))
+        for section in sections
+    ]
+    for terms in section_terms:
+        for stopword in STOPWORDS.intersection(terms):
+            del terms[stopword]
+    document_frequency: Counter[str] = Counter()
+    for terms in section_terms:
+        document_frequency.update(terms.keys())
+    idf = {
+        term: math.log((1 + len(sections)) / (1 + count)) + 1
+        for term, count in document_frequency.items()
+    }
+    weights = [
+        {term: idf[term] * math.log1p(count) for term, count in terms.items()}
+        for terms in section_terms
+    ]
+
+    rankings = []
+    for section, weight in zip(sections, weights):
+        step = max(1, len(section.sentences) // MAX_CANDIDATES)
+        scores = []
+        for index in range(0, len(section.sentences), step):
+            words = set(WORD_RE.findall(section.sentences[index].lower()))
+            words.intersection_update(weight)
+            score = sum(map(weight.__getitem__, words))
+            scores.append((score / math.sqrt(len(words) or 1), index))
+        scores.sort(reverse=True)
+        rankings.append([index for _, index in scores])
+
+    picked: list[set[int]] = [set() for _ in sections]
+    used = 0
+    positions = [0] * len(sections)
+    progress = True
+    while progress:
+        progress = False
+        for number, section in enumerate(sections):
+            ranking = rankings[number]
+            while positions[number] < len(ranking):
+                index = ranking[positions[number]]
+                positions[number] += 1
+                cost = len(section.sentences[index]) + 1
+                if not picked[number]:
+                    cost += len(section.heading) + len(SEPARATOR)
+                if used + cost <= budget:
+                    picked[number].add(index)
+                    used += cost
+                    progress = True
+                    break
+    return picked
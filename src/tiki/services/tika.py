@@ -1,12 +1,30 @@
+import asyncio
+import json
 import logging
+import os
+import threading
+import weakref
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from dataclasses import dataclass, field
 from datetime import datetime
+from typing import BinaryIO
 
+import httpx
+import urllib3
 from django.conf import settings
-from tika import parser as tika_parser
+from urllib3.util import Retry, Timeout
+
+from .breaker import Breaker, get_breaker
 
 logger = logging.getLogger(__name__)
 
+# Key under which /rmeta/text returns the extracted text of each document
+CONTENT_KEY = "X-TIKA:content"
+# Only 503 means Tika turned the request away; after a 502/504 or a read
+# timeout it may still be parsing, and a retry would parse the file twice
+RETRYABLE_STATUS_CODES = (503,)
+READ_CHUNK_SIZE = 64 * 1024
+
 # Tika uses many different keys for the same metadata field
 AUTHOR_KEYS = ["Author", "dc:creator", "meta:author", "creator", "pdf:docinfo:author"]
 TITLE_KEYS = ["title", "dc:title", "meta:title", "pdf:docinfo:title"]
@@ -31,6 +49,9 @@ def _first_match(metadata: dict, keys: list[str]) -> str:
     """Return the first non-empty value from metadata matching any of the given keys."""
     for key in keys:
         value = metadata.get(key, "")
+        # /rmeta returns multi-valued keys as lists
+        if isinstance(value, list):
+            value = value[0] if value else ""
         if value:
             return str(value) if not isinstance(value, str) else value
     return ""
@@ -55,24 +76,328 @@ def _parse_date(value: str) -> datetime | None:
     return None
 
 
+class TikaError(Exception):
+    """A failed Tika request; ``status`` is the HTTP status, if any arrived."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+def is_outage(error: Exception) -> bool:
+    """Whether ``error`` means the Tika server is unavailable, rather than
+    that it could not handle one document (e.g. 422 for an unparseable file).
+    """
+    if not isinstance(error, TikaError):
+        return False
+    return error.status is None or error.status >= 500
+
+
+class TikaClient:
+    """Client for a running Tika server, backed by a keep-alive connection pool.
+
+    Instances are safe to share between threads; concurrent requests reuse
+    pooled sockets. File bodies are streamed, and requests are retried with
+    exponential backoff on connection errors and 503, but not on read
+    timeouts.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        retries: int | None = None,
+        backoff: float | None = None,
+        pool_maxsize: int | None = None,
+    ):
+        self.server_url = server_url.rstrip("/")
+        self._pool = urllib3.PoolManager(
+            maxsize=pool_maxsize or settings.TIKA_POOL_MAXSIZE,
+            timeout=Timeout(
+                connect=connect_timeout or settings.TIKA_CONNECT_TIMEOUT,
+                read=read_timeout or settings.TIKA_READ_TIMEOUT,
+            ),
+            retries=Retry(
+                total=settings.TIKA_RETRIES if retries is None else retries,
+                backoff_factor=(
+                    settings.TIKA_RETRY_BACKOFF if backoff is None else backoff
+                ),
+                read=0,
+                status_forcelist=RETRYABLE_STATUS_CODES,
+                allowed_methods=frozenset({"GET", "PUT"}),
+                raise_on_status=False,
+            ),
+        )
+
+    def rmeta(self, body: BinaryIO | Iterable[bytes], filename: str = "") -> list[dict]:
+        """PUT a file to /rmeta/text and return metadata and text per document.
+
+        The body may also be an iterable of chunks, which is sent with chunked
+        encoding and cannot be retried. The container document comes first,
+        followed by any embedded ones.
+        """
+        headers = _rmeta_headers(filename)
+        retries = None
+        if hasattr(body, "read"):
+            length = _body_length(body)
+            if length is not None:
+                headers["Content-Length"] = str(length)
+        else:
+            retries = False
+
+        response = self._request(
+            "PUT", "/rmeta/text", body=body, headers=headers, retries=retries
+        )
+        try:
+            return json.load(response)
+        except json.JSONDecodeError as e:
+            raise TikaError(
+                f"Tika returned invalid JSON: {e}", status=response.status
+            ) from e
+        finally:
+            response.release_conn()
+
+    def version(self) -> str:
+        response = self._request("GET", "/version", headers={"Accept": "text/plain"})
+        try:
+            return response.read().decode().strip()
+        finally:
+            response.release_conn()
+
+    def _request(self, method: str, path: str, **kwargs) -> urllib3.BaseHTTPResponse:
+        if kwargs.get("retries") is None:
+            kwargs.pop("retries", None)
+        try:
+            response = self._pool.request(
+                method, self.server_url + path, preload_content=False, **kwargs
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise TikaError(f"Tika request failed: {e}") from e
+        if response.status >= 400:
+            detail = response.read(500).decode(errors="replace")
+            response.release_conn()
+            raise TikaError(
+                f"Tika returned HTTP {response.status}: {detail}",
+                status=response.status,
+            )
+        return response
+
+
+def _body_length(body: BinaryIO) -> int | None:
+    """Size of the remaining body, or None to fall back to chunked encoding."""
+    try:
+        position = body.tell()
+        end = body.seek(0, os.SEEK_END)
+        body.seek(position)
+        return end - position
+    except (AttributeError, OSError):
+        return None
+
+
+def _rmeta_headers(filename: str) -> dict[str, str]:
+    headers = {"Accept": "application/json"}
+    # The filename only helps type detection; headers must stay ASCII
+    filename = filename.encode("ascii", "ignore").decode().replace('"', "")
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return headers
+
+
+class AsyncTikaClient:
+    """asyncio counterpart of TikaClient, built on an httpx connection pool.
+
+    Requests beyond ``pool_maxsize`` wait for a free connection rather than
+    failing, so many concurrent extractions queue up in front of Tika.
+    Connection errors are retried; 503 responses are retried for
+    GETs and in-memory bodies, but not for streamed ones.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        retries: int | None = None,
+        backoff: float | None = None,
+        pool_maxsize: int | None = None,
+    ):
+        self.server_url = server_url.rstrip("/")
+        self.retries = settings.TIKA_RETRIES if retries is None else retries
+        self.backoff = settings.TIKA_RETRY_BACKOFF if backoff is None else backoff
+        pool_maxsize = pool_maxsize or settings.TIKA_POOL_MAXSIZE
+        self._http = httpx.AsyncClient(
+            base_url=self.server_url,
+            timeout=httpx.Timeout(
+                read_timeout or settings.TIKA_READ_TIMEOUT,
+                connect=connect_timeout or settings.TIKA_CONNECT_TIMEOUT,
+                pool=None,
+            ),
+            # Limits must be given to the transport, the client ignores them
+            # when a transport is passed
+            transport=httpx.AsyncHTTPTransport(
+                retries=self.retries,
+                limits=httpx.Limits(
+                    max_connections=pool_maxsize,
+                    max_keepalive_connections=pool_maxsize,
+                ),
+            ),
+        )
+
+    async def rmeta(
+        self,
+        body: bytes | AsyncIterable[bytes],
+        filename: str = "",
+        length: int | None = None,
+    ) -> list[dict]:
+        """PUT a document to /rmeta/text; see TikaClient.rmeta.
+
+        Pass ``length`` with a streamed body to avoid chunked encoding.
+        """
+        headers = _rmeta_headers(filename)
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        response = await self._request(
+            "PUT",
+            "/rmeta/text",
+            content=body,
+            headers=headers,
+            retry_status=isinstance(body, bytes),
+        )
+        try:
+            return response.json()
+        except json.JSONDecodeError as e:
+            raise TikaError(
+                f"Tika returned invalid JSON: {e}", status=response.status_code
+            ) from e
+
+    async def version(self) -> str:
+        response = await self._request(
+            "GET", "/version", headers={"Accept": "text/plain"}, retry_status=True
+        )
+        return response.text.strip()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def _request(
+        self, method: str, path: str, retry_status: bool = False, **kwargs
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._http.request(method, path, **kwargs)
+            except httpx.HTTPError as e:
+                raise TikaError(f"Tika request failed: {e}") from e
+            if (
+                retry_status
+                and response.status_code in RETRYABLE_STATUS_CODES
+                and attempt < self.retries
+            ):
+                await asyncio.sleep(self.backoff * 2**attempt)
+                attempt += 1
+                continue
+            if response.status_code >= 400:
+                detail = response.text[:500]
+                raise TikaError(
+                    f"Tika returned HTTP {response.status_code}: {detail}",
+                    status=response.status_code,
+                )
+            return response
+
+
+_clients: dict[str, TikaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(server_url: str | None = None) -> TikaClient:
+    """Return the process-wide client for a Tika server, creating it once."""
+    server_url = server_url or settings.TIKA_SERVER_URL
+    with _clients_lock:
+        if server_url not in _clients:
+            _clients[server_url] = TikaClient(server_url)
+        return _clients[server_url]
+
+
+# httpx clients are bound to the event loop they were first used on
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, AsyncTikaClient]
+] = weakref.WeakKeyDictionary()
+
+
+def get_async_client(server_url: str | None = None) -> AsyncTikaClient:
+    """Return the async client for a Tika server on the running event loop."""
+    server_url = server_url or settings.TIKA_SERVER_URL
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if server_url not in clients:
+        clients[server_url] = AsyncTikaClient(server_url)
+    return clients[server_url]
+
+
+async def _aiter_file(path: str) -> AsyncIterator[bytes]:
+    """Read a file in chunks without blocking the event loop."""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        while chunk := await asyncio.to_thread(f.read, READ_CHUNK_SIZE):
+            yield chunk
+    finally:
+        f.close()
+
+
+def result_from_rmeta(documents: list[dict]) -> TikaResult:
+    """Build a TikaResult from an /rmeta response.
+
+    Metadata comes from the container document; the text is that of every
+    document, so embedded files and attachments (zip members, email
+    attachments, OLE objects) are included, as tika-python did.
+    """
+    metadata = dict(documents[0]) if documents else {}
+    metadata.pop(CONTENT_KEY, None)
+    content = "".join(document.get(CONTENT_KEY) or "" for document in documents)
+
+    return TikaResult(
+        mime_type=_first_match(metadata, ["Content-Type"]),
+        language=_first_match(metadata, LANGUAGE_KEYS),
+        author=_first_match(metadata, AUTHOR_KEYS),
+        title=_first_match(metadata, TITLE_KEYS),
+        created_date=_parse_date(_first_match(metadata, CREATED_DATE_KEYS)),
+        modified_date=_parse_date(_first_match(metadata, MODIFIED_DATE_KEYS)),
+        full_text=content.strip(),
+        raw_metadata=metadata,
+    )
+
+
 class TikaService:
-    def __init__(self, server_url: str | None = None):
+    def __init__(
+        self,
+        server_url: str | None = None,
+        client: TikaClient | None = None,
+        async_client: AsyncTikaClient | None = None,
+        breaker: Breaker | None = None,
+    ):
         self.server_url = server_url or settings.TIKA_SERVER_URL
+        self.client = client or get_client(self.server_url)
+        self._async_client = async_client
+        self.breaker = breaker or get_breaker("tika", is_outage)
 
     def extract(self, file_path: str) -> TikaResult:
-        """Extract text and metadata from a file using Apache Tika."""
-        parsed = tika_parser.from_file(file_path, serverEndpoint=self.server_url)
-
-        metadata = parsed.get("metadata", {}) or {}
-        content = parsed.get("content", "") or ""
-
-        return TikaResult(
-            mime_type=metadata.get("Content-Type", ""),
-            language=_first_match(metadata, LANGUAGE_KEYS),
-            author=_first_match(metadata, AUTHOR_KEYS),
-            title=_first_match(metadata, TITLE_KEYS),
-            created_date=_parse_date(_first_match(metadata, CREATED_DATE_KEYS)),
-            modified_date=_parse_date(_first_match(metadata, MODIFIED_DATE_KEYS)),
-            full_text=content.strip(),
-            raw_metadata=metadata,
+        """Extract text and metadata from a file using Apache Tika.
+
+        Raises CircuitOpenError without calling Tika while it is down.
+        """
+        with open(file_path, "rb") as f:
+            documents = self.breaker.call(
+                self.client.rmeta, f, filename=os.path.basename(file_path)
+            )
+        return result_from_rmeta(documents)
+
+    async def aextract(self, file_path: str) -> TikaResult:
+        """Async variant of ``extract``, streaming the file to Tika."""
+        client = self._async_client or get_async_client(self.server_url)
+        documents = await self.breaker.acall(
+            client.rmeta,
+            _aiter_file(file_path),
+            filename=os.path.basename(file_path),
+            length=os.path.getsize(file_path),
         )
+        return result_from_rmeta(documents)
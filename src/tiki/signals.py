@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import UploadedFile
+from .services.events import publish_status
+
+
+@receiver(post_save, sender=UploadedFile)
+def upload_status_changed(sender, instance, created, update_fields, **kwargs):
+    """Push status transitions to clients waiting on the progress stream."""
+    if created or update_fields is None or "status" in update_fields:
+        publish_status(instance.pk, instance.status)
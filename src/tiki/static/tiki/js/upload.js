@@ -56,17 +56,15 @@ document.addEventListener("DOMContentLoaded", function () {
 
         var formData = new FormData();
         formData.append("file", file);
+        // Return once stored and report real progress from the event stream
+        formData.append("async", "1");
 
         try {
-            setProgress(30, "Extracting metadata with Tika...");
-
             var response = await fetch("/api/enrich/", {
                 method: "POST",
                 body: formData,
             });
 
-            setProgress(80, "Processing response...");
-
             var data = await response.json();
 
             if (!response.ok) {
@@ -74,6 +72,17 @@ document.addEventListener("DOMContentLoaded", function () {
                 return;
             }
 
+            if (response.status === 202) {
+                setProgress(30, "Queued for processing...");
+                data = window.EventSource && data.events_url
+                    ? await streamResult(data.events_url, data.result_url)
+                    : await pollResult(data.result_url);
+                if (data.status === "failed") {
+                    showError(data.error || "Processing failed");
+                    return;
+                }
+            }
+
             setProgress(100, "Complete!");
             zone.classList.remove("uploading");
 
@@ -84,6 +93,52 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     }
 
+    var STATUS_PROGRESS = {
+        pending: [40, "Queued for processing..."],
+        extracting: [50, "Extracting metadata with Tika..."],
+        enriching: [70, "Enriching with Claude..."],
+    };
+
+    function streamResult(eventsUrl, resultUrl) {
+        return new Promise(function (resolve) {
+            var source = new EventSource(eventsUrl);
+            source.addEventListener("status", function (e) {
+                var progress = STATUS_PROGRESS[JSON.parse(e.data).status];
+                if (progress) {
+                    setProgress(progress[0], progress[1]);
+                }
+            });
+            source.addEventListener("result", function (e) {
+                source.close();
+                resolve(JSON.parse(e.data));
+            });
+            source.onerror = function () {
+                // EventSource reconnects by itself unless the stream is gone
+                if (source.readyState === EventSource.CLOSED) {
+                    resolve(pollResult(resultUrl));
+                }
+            };
+        });
+    }
+
+    async function pollResult(url) {
+        while (true) {
+            var response = await fetch(url);
+            var data = await response.json();
+            if (!response.ok) {
+                return { status: "failed", error: data.error };
+            }
+            if (data.status === "completed" || data.status === "failed") {
+                return data;
+            }
+            var progress = STATUS_PROGRESS[data.status];
+            if (progress) {
+                setProgress(progress[0], progress[1]);
+            }
+            await new Promise(function (resolve) { setTimeout(resolve, 1000); });
+        }
+    }
+
     function displayResult(data) {
         resultSection.classList.add("active");
 
@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile as DjangoUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from tiki.models import UploadedFile
+from tiki.services.tika import get_client, result_from_rmeta
+
+logger = logging.getLogger(__name__)
+
+# Chunks buffered for the Tika tee before the upload waits for Tika to catch up
+TEE_QUEUE_SIZE = 64
+
+
+class StoredUploadedFile(DjangoUploadedFile):
+    """An upload that has already been written to its final storage location.
+
+    Assign ``storage_name`` (not the file itself) to ``UploadedFile.file`` so
+    Django does not copy it again; ``content_hash`` is the SHA-256 computed
+    while the bytes arrived. Set ``attached`` once an upload row refers to
+    it; ``discard_unattached`` deletes the rest when the view is done.
+    """
+
+    attached = False
+
+    def __init__(
+        self,
+        file,
+        name,
+        storage_name,
+        content_type,
+        size,
+        charset,
+        content_hash,
+        tika_future=None,
+    ):
+        super().__init__(file, name, content_type, size, charset)
+        self.storage_name = storage_name
+        self.content_hash = content_hash
+        self.tika_future = tika_future
+
+    def delete(self):
+        self.close()
+        UploadedFile._meta.get_field("file").storage.delete(self.storage_name)
+
+
+class StreamingStorageUploadHandler(FileUploadHandler):
+    """Write uploaded files once, straight into ``UploadedFile.file`` storage.
+
+    Hash and size are computed on the fly. With ``tee_tika`` the same chunks
+    are also streamed to the Tika server as they arrive, and the extraction
+    result is exposed as ``StoredUploadedFile.tika_future``. Only the file
+    fields named in ``fields`` (default: all) are stored; others are dropped.
+    """
+
+    def __init__(self, request=None, tee_tika=False, fields=None):
+        super().__init__(request)
+        self.tee_tika = tee_tika
+        self.fields = fields
+        self.storage = UploadedFile._meta.get_field("file").storage
+        self.stored = []
+        self._file = None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        if self.fields is not None and field_name not in self.fields:
+            self._file = None
+            self._tee_queue = None
+            raise StopFutureHandlers()
+        self.digest = hashlib.sha256()
+        self.storage_name, self._file = self._open_target(file_name)
+        self._tee_queue = None
+        self._tee_future = None
+        if self.tee_tika:
+            self._start_tee()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self._file is None:
+            return None
+        self._file.write(raw_data)
+        self.digest.update(raw_data)
+        if self._tee_queue is not None:
+            self._tee_put(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self._file is None:
+            return None
+        self._file.close()
+        self._file = None
+        self._tee_put(None)
+        stored = StoredUploadedFile(
+            file=self.storage.open(self.storage_name, "rb"),
+            name=self.file_name,
+            storage_name=self.storage_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_hash=self.digest.hexdigest(),
+            tika_future=self._tee_future,
+        )
+        self.stored.append(stored)
+        return stored
+
+    def discard_unattached(self):
+        """Delete stored files no upload refers to (e.g. after a 400), and
+        the partial file of a body that was cut off.
+
+        Django doesn't call ``upload_interrupted`` when the client
+        disconnects mid-body (UnreadablePostError), so that is done here.
+        """
+        self.upload_interrupted()
+        for stored in self.stored:
+            if not stored.attached:
+                stored.delete()
+        self.stored = []
+
+    def upload_interrupted(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self._tee_put(None)
+        self.storage.delete(self.storage_name)
+
+    def _open_target(self, file_name):
+        field = UploadedFile._meta.get_field("file")
+        name = self.storage.get_available_name(field.generate_filename(None, file_name))
+        os.makedirs(os.path.dirname(self.storage.path(name)), exist_ok=True)
+        # Same exclusive-create retry loop as FileSystemStorage._save
+        while True:
+            try:
+                return name, open(self.storage.path(name), "xb")
+            except FileExistsError:
+                name = self.storage.get_available_name(name)
+
+    def _start_tee(self):
+        self._tee_queue = queue.Queue(maxsize=TEE_QUEUE_SIZE)
+        self._tee_future = Future()
+        chunks = iter(self._tee_queue.get, None)
+        client = get_client()
+        future = self._tee_future
+        file_name = self.file_name
+
+        def run():
+            try:
+                future.set_result(result_from_rmeta(client.rmeta(chunks, file_name)))
+            except Exception as e:
+                logger.warning("Streaming upload to Tika failed: %s", e)
+                future.set_exception(e)
+                # Unblock the upload if it is waiting on a full queue
+                for _ in chunks:
+                    pass
+
+        threading.Thread(target=run, name="tiki-tika-tee", daemon=True).start()
+
+    def _tee_put(self, chunk):
+        if self._tee_queue is None:
+            return
+        if self._tee_future.done():
+            # Tika gave up early; just end its stream
+            chunk = None
+        self._tee_queue.put(chunk)
+        if chunk is None:
+            self._tee_queue = None
+
+
+def use_streaming_uploads(request, fields, tee_tika=False):
+    """Install the streaming handler on a request before its body is read.
+
+    Only the file ``fields`` the view uses are stored. Returns the handler,
+    whose ``discard_unattached()`` the view calls when done, or None: only
+    local filesystem storage can be written incrementally, and other storage
+    backends keep Django's default handlers.
+    """
+    storage = UploadedFile._meta.get_field("file").storage
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return None
+    handler = StreamingStorageUploadHandler(
+        request,
+        tee_tika=tee_tika and settings.TIKI_UPLOAD_TEE_TIKA,
+        fields=set(fields),
+    )
+    request.upload_handlers = [handler]
+    return handler
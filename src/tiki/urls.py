@@ -1,11 +1,28 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import api, ui
 
+# Under ASGI the async variants keep the event loop free while Tika and
+# Claude work; under WSGI each would need its own event loop per request
+if settings.TIKI_ASYNC_VIEWS:
+    enrich, result, events = api.aenrich, api.aresult, api.aevents
+    edit_field, export = api.aedit_field, api.aexport
+else:
+    enrich, result, events = api.enrich, api.result, api.events
+    edit_field, export = api.edit_field, api.export
+
 urlpatterns = [
     path("", ui.home, name="home"),
-    path("api/enrich/", api.enrich, name="api-enrich"),
-    path("api/result/<uuid:upload_id>/", api.result, name="api-result"),
-    path("api/result/<uuid:upload_id>/edit/", api.edit_field, name="api-edit-field"),
+    path("api/enrich/", enrich, name="api-enrich"),
+    path("api/result/<uuid:upload_id>/", result, name="api-result"),
+    path("api/result/<uuid:upload_id>/edit/", edit_field, name="api-edit-field"),
+    path("api/result/<uuid:upload_id>/text/", api.full_text, name="api-full-text"),
+    path("api/result/<uuid:upload_id>/events/", events, name="api-events"),
+    path("api/batch/", api.batch_enrich, name="api-batch-enrich"),
+    path("api/batch/<uuid:batch_id>/", api.batch, name="api-batch"),
+    path("api/export/", export, name="api-export"),
     path("health/", api.health, name="health"),
+    path("ready/", api.ready, name="ready"),
+    path("metrics/", api.metrics, name="metrics"),
 ]
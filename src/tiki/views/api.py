@@ -1,55 +1,339 @@
 import json
 import logging
+import queue
+import threading
+import time
+import zipfile
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
-from tiki.models import DCATOutput, UploadedFile
+from tiki.models import DCATOutput, ExtractedText, UploadBatch, UploadedFile
+from tiki.services import metrics as pipeline_metrics
+from tiki.services import readiness
+from tiki.services.batch import (
+    BatchError,
+    batch_progress,
+    create_batch,
+    submit_batch,
+    submit_upload,
+)
+from tiki.services.dedup import compute_content_hash
+from tiki.services.events import hub
+from tiki.services.export import (
+    EXPORT_ALIASES,
+    EXPORT_FORMATS,
+    ExportError,
+    export_chunks,
+    finalized_outputs,
+    next_cursor,
+)
 from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.serializers import (
+    FORMATS,
+    FormatError,
+    arender,
+    dumps,
+    dumps_with,
+    negotiate,
+    render,
+)
+from tiki.uploadhandler import use_streaming_uploads
 
 logger = logging.getLogger(__name__)
 
+EDIT_FIELDS = [
+    "user_edits",
+    "merged_jsonld",
+    "empty_fields",
+    "version",
+    "updated_at",
+]
+
 
 @csrf_exempt
 @require_POST
 def enrich(request):
-    """Accept a file upload and return DCAT-AP JSON-LD."""
-    uploaded_file = request.FILES.get("file")
-    if not uploaded_file:
-        return JsonResponse({"error": "No file provided"}, status=400)
+    """Accept a file upload and return DCAT-AP JSON-LD.
 
-    upload = UploadedFile.objects.create(
-        file=uploaded_file,
-        original_filename=uploaded_file.name,
-        file_size=uploaded_file.size,
-    )
+    With TIKI_ASYNC_ENRICH the upload is queued for the background workers and
+    a 202 is returned immediately; follow the events URL (or poll the result
+    URL) for the outcome. Send ``async=1`` to get the same 202 response while
+    the upload is processed in this process's background threads.
+    Send ``no_cache=1`` or ``Cache-Control: no-cache`` to bypass reuse of
+    results from earlier identical uploads.
+    """
+    received = _receive_upload(request)
+    if received is None:
+        return JsonResponse({"error": "No file provided"}, status=400)
+    upload, tika_future = received
+    if upload.status == UploadedFile.Status.PENDING:
+        return _accepted(upload)
 
     try:
         pipeline = EnrichmentPipeline()
-        dcat_output = pipeline.run(upload)
-        return JsonResponse({
-            "id": str(upload.id),
-            "status": upload.status,
-            "jsonld": dcat_output.jsonld,
-            "empty_fields": dcat_output.empty_fields,
-        })
+        dcat_output = pipeline.run(upload, tika_future=tika_future)
     except Exception:
         logger.exception("Enrichment failed for upload %s", upload.id)
-        return JsonResponse(
-            {"id": str(upload.id), "status": "failed", "error": upload.error_message},
-            status=500,
+        return _failed(upload)
+    return _enriched(upload, dcat_output)
+
+
+@csrf_exempt
+@require_POST
+async def aenrich(request):
+    """Async variant of ``enrich`` for ASGI deployments (TIKI_ASYNC_VIEWS).
+
+    While Tika and Claude work on the upload, the event loop is free to serve
+    other requests, so one process can hold many enrichments in flight.
+    """
+    received = await sync_to_async(_receive_upload)(request)
+    if received is None:
+        return JsonResponse({"error": "No file provided"}, status=400)
+    upload, tika_future = received
+    if upload.status == UploadedFile.Status.PENDING:
+        return _accepted(upload)
+
+    try:
+        dcat_output = await _get_async_pipeline().arun(upload, tika_future=tika_future)
+    except Exception:
+        logger.exception("Enrichment failed for upload %s", upload.id)
+        return _failed(upload)
+    return _enriched(upload, dcat_output)
+
+
+_async_pipeline: EnrichmentPipeline | None = None
+
+
+def _get_async_pipeline():
+    # Shared so the async HTTP clients and their connection pools are reused
+    global _async_pipeline
+    if _async_pipeline is None:
+        _async_pipeline = EnrichmentPipeline()
+    return _async_pipeline
+
+
+def _receive_upload(request):
+    """Store the posted file and create its upload.
+
+    Returns ``(upload, tika_future)``, or None if no file was sent. Uploads
+    to be processed in the background are returned as pending.
+    """
+    handler = use_streaming_uploads(
+        request, ["file"], tee_tika=not settings.TIKI_ASYNC_ENRICH
+    )
+    try:
+        uploaded_file = request.FILES.get("file")
+        if not uploaded_file:
+            return None
+
+        background = settings.TIKI_ASYNC_ENRICH or _is_truthy(request.POST.get("async"))
+        tika_future = getattr(uploaded_file, "tika_future", None)
+        # Inline uploads skip `pending` so queue workers never pick them up
+        upload = UploadedFile.objects.create(
+            file=getattr(uploaded_file, "storage_name", uploaded_file),
+            original_filename=uploaded_file.name,
+            file_size=uploaded_file.size,
+            content_hash=compute_content_hash(uploaded_file),
+            skip_cache=_wants_cache_bypass(request),
+            status=(
+                UploadedFile.Status.PENDING
+                if background
+                else UploadedFile.Status.EXTRACTING
+            ),
         )
+        uploaded_file.attached = True
+    finally:
+        if handler is not None:
+            handler.discard_unattached()
+    if background and not settings.TIKI_ASYNC_ENRICH:
+        submit_upload(upload, tika_future)
+    return upload, tika_future
+
+
+def _enriched(upload, dcat_output):
+    if dcat_output is None:
+        # Queued for a Claude Message Batch
+        return _accepted(upload)
+    return _json({
+        "id": str(upload.id),
+        "status": upload.status,
+        "jsonld": dcat_output.jsonld,
+        "empty_fields": dcat_output.empty_fields,
+    })
+
+
+def _json(payload, status=200):
+    """Like JsonResponse, encoded with the (faster) serializer layer."""
+    return HttpResponse(dumps(payload), status=status, content_type="application/json")
+
+
+def _failed(upload):
+    return JsonResponse(
+        {"id": str(upload.id), "status": "failed", "error": upload.error_message},
+        status=500,
+    )
+
+
+def _accepted(upload):
+    return JsonResponse(
+        {
+            "id": str(upload.id),
+            "status": upload.status,
+            "result_url": reverse("api-result", args=[upload.id]),
+            # Streams are only offered where they don't each hold a thread
+            **(
+                {"events_url": reverse("api-events", args=[upload.id])}
+                if settings.TIKI_ASYNC_VIEWS
+                else {}
+            ),
+        },
+        status=202,
+    )
+
+
+def _is_truthy(value):
+    return (value or "").lower() in ("1", "true", "yes")
+
+
+def _wants_cache_bypass(request):
+    if _is_truthy(request.POST.get("no_cache")):
+        return True
+    return "no-cache" in request.headers.get("Cache-Control", "")
 
 
 @require_GET
 def result(request, upload_id):
-    """Retrieve the result for a given upload."""
+    """Retrieve the result for a given upload.
+
+    Returns the JSON status envelope by default. Asking for JSON-LD, Turtle,
+    RDF/XML or N-Triples (Accept header or ``?format=``) returns just the
+    DCAT-AP record in that format once the upload has completed. Rendered
+    records are cached until the next edit. An unknown ``?format=`` is a
+    400, and an Accept header that allows none of these formats a 406.
+    """
+    try:
+        # One query for both; _completed_output reads the DCAT output
+        upload = UploadedFile.objects.select_related("dcat_output").get(id=upload_id)
+    except UploadedFile.DoesNotExist:
+        return JsonResponse({"error": "Not found"}, status=404)
+
     try:
-        upload = UploadedFile.objects.get(id=upload_id)
+        fmt = negotiate(request)
+    except FormatError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    dcat_output = _completed_output(upload)
+    if dcat_output is None:
+        return _vary(JsonResponse(_result_payload(upload)))
+    etag = _etag(dcat_output, fmt)
+    if _not_modified(request, etag):
+        return _vary(HttpResponseNotModified(headers={"ETag": etag}))
+    rendered = render(dcat_output, fmt or "jsonld")
+    return _rendered(upload, dcat_output, fmt, rendered, etag)
+
+
+@require_GET
+async def aresult(request, upload_id):
+    """Async variant of ``result``."""
+    try:
+        upload = await UploadedFile.objects.select_related("dcat_output").aget(
+            id=upload_id
+        )
     except UploadedFile.DoesNotExist:
         return JsonResponse({"error": "Not found"}, status=404)
 
+    try:
+        fmt = negotiate(request)
+    except FormatError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    dcat_output = _completed_output(upload)
+    if dcat_output is None:
+        return _vary(JsonResponse(_result_payload(upload)))
+    etag = _etag(dcat_output, fmt)
+    if _not_modified(request, etag):
+        return _vary(HttpResponseNotModified(headers={"ETag": etag}))
+    rendered = await arender(dcat_output, fmt or "jsonld")
+    return _rendered(upload, dcat_output, fmt, rendered, etag)
+
+
+def _completed_output(upload):
+    if upload.status != UploadedFile.Status.COMPLETED:
+        return None
+    try:
+        return upload.dcat_output
+    except DCATOutput.DoesNotExist:
+        return None
+
+
+def _etag(dcat_output, fmt):
+    # Every change to a record bumps its version
+    return quote_etag(f"{dcat_output.pk}.{dcat_output.version}.{fmt or 'json'}")
+
+
+def _not_modified(request, etag):
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags or f"W/{etag}" in etags
+
+
+def _if_match(request, dcat_output):
+    """Whether the request's If-Match (if any) names the record's version."""
+    if_match = request.headers.get("If-Match")
+    if not if_match:
+        return True
+    etags = parse_etags(if_match)
+    # An ETag in any format names the version (see _etag)
+    current = f'"{dcat_output.pk}.{dcat_output.version}.'
+    return "*" in etags or any(
+        etag.removeprefix("W/").startswith(current) for etag in etags
+    )
+
+
+def _rendered(upload, dcat_output, fmt, data, etag):
+    """Respond with a rendered record, or the envelope around it if ``fmt``
+    is None."""
+    if fmt is None:
+        envelope = {
+            "id": str(upload.id),
+            "status": upload.status,
+            "original_filename": upload.original_filename,
+            "empty_fields": dcat_output.empty_fields,
+            "is_finalized": dcat_output.is_finalized,
+        }
+        response = HttpResponse(
+            dumps_with(envelope, jsonld=data), content_type="application/json"
+        )
+    else:
+        response = HttpResponse(
+            data, content_type=f"{FORMATS[fmt].media_type}; charset=utf-8"
+        )
+    response["ETag"] = etag
+    # Let browsers keep the record but revalidate it with If-None-Match
+    patch_cache_control(response, no_cache=True)
+    return _vary(response)
+
+
+def _vary(response):
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def _result_payload(upload):
     response = {
         "id": str(upload.id),
         "status": upload.status,
@@ -66,47 +350,440 @@ def result(request, upload_id):
             response["is_finalized"] = dcat_output.is_finalized
         except DCATOutput.DoesNotExist:
             response["error"] = "DCAT output not found"
+    return response
+
 
-    return JsonResponse(response)
+@require_GET
+def events(request, upload_id):
+    """Stream status changes of an upload as Server-Sent Events.
+
+    Sends a ``status`` event for the current status and every transition,
+    then a final ``result`` event (the same body as the result endpoint) once
+    the upload has completed or failed. Comment lines keep the connection
+    alive; after TIKI_EVENTS_TIMEOUT the stream ends and EventSource clients
+    reconnect.
+
+    Under WSGI each stream holds a worker thread, so at most
+    TIKI_EVENTS_MAX_SYNC_STREAMS are served per process; beyond that the
+    client gets a 503 and should poll the result instead.
+    """
+    if not UploadedFile.objects.filter(id=upload_id).exists():
+        return JsonResponse({"error": "Not found"}, status=404)
+    if not _reserve_sync_stream():
+        response = JsonResponse(
+            {"error": "Too many event streams, poll the result instead"},
+            status=503,
+        )
+        response["Retry-After"] = str(int(settings.TIKI_EVENTS_KEEPALIVE))
+        return response
+
+    response = StreamingHttpResponse(
+        _SyncStream(_event_stream(upload_id)), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+async def aevents(request, upload_id):
+    """Async variant of ``events``; an ASGI server holds each stream as a
+    coroutine rather than a thread."""
+    if not await UploadedFile.objects.filter(id=upload_id).aexists():
+        return JsonResponse({"error": "Not found"}, status=404)
+
+    response = StreamingHttpResponse(
+        _aevent_stream(upload_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+_sync_streams = 0
+_sync_streams_lock = threading.Lock()
+
+
+def _reserve_sync_stream():
+    global _sync_streams
+    with _sync_streams_lock:
+        if _sync_streams >= settings.TIKI_EVENTS_MAX_SYNC_STREAMS:
+            return False
+        _sync_streams += 1
+        return True
+
+
+class _SyncStream:
+    """Release the stream's slot when the server closes the response, even
+    if the client left before the first event."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._released = False
+
+    def __iter__(self):
+        return self.stream
+
+    def close(self):
+        global _sync_streams
+        self.stream.close()
+        with _sync_streams_lock:
+            if not self._released:
+                self._released = True
+                _sync_streams -= 1
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _event_stream(upload_id):
+    terminal = (UploadedFile.Status.COMPLETED, UploadedFile.Status.FAILED)
+    # Subscribe before reading the status so no transition is missed
+    subscription = hub.subscribe(upload_id)
+    try:
+        status = UploadedFile.objects.values_list("status", flat=True).get(
+            id=upload_id
+        )
+        yield _sse("status", {"id": str(upload_id), "status": status})
+        deadline = time.monotonic() + settings.TIKI_EVENTS_TIMEOUT
+        while status not in terminal and time.monotonic() < deadline:
+            try:
+                event = subscription.get(timeout=settings.TIKI_EVENTS_KEEPALIVE)
+            except queue.Empty:
+                if not hub.cross_process:
+                    # Changes made by other processes aren't delivered here
+                    latest = UploadedFile.objects.values_list(
+                        "status", flat=True
+                    ).get(id=upload_id)
+                    if latest != status:
+                        status = latest
+                        yield _sse("status", {"id": str(upload_id), "status": status})
+                        continue
+                yield ": keepalive\n\n"
+                continue
+            if event["status"] != status:
+                status = event["status"]
+                yield _sse("status", event)
+
+        if status in terminal:
+            upload = UploadedFile.objects.get(id=upload_id)
+            yield _sse("result", _result_payload(upload))
+    finally:
+        hub.unsubscribe(upload_id, subscription)
+
+
+@require_GET
+def full_text(request, upload_id):
+    """Stream the full extracted text of an upload as plain text."""
+    try:
+        text = ExtractedText.objects.select_related("upload").get(upload_id=upload_id)
+    except ExtractedText.DoesNotExist:
+        return JsonResponse({"error": "Not found"}, status=404)
+
+    response = StreamingHttpResponse(
+        text.iter_bytes(), content_type="text/plain; charset=utf-8"
+    )
+    filename = f"{text.upload.original_filename}.txt"
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    if text.truncated:
+        response["X-Tiki-Truncated"] = f"{text.length}/{text.original_length}"
+    return response
+
+
+async def _aevent_stream(upload_id):
+    terminal = (UploadedFile.Status.COMPLETED, UploadedFile.Status.FAILED)
+    statuses = UploadedFile.objects.values_list("status", flat=True)
+    subscription = hub.asubscribe(upload_id)
+    try:
+        status = await statuses.aget(id=upload_id)
+        yield _sse("status", {"id": str(upload_id), "status": status})
+        deadline = time.monotonic() + settings.TIKI_EVENTS_TIMEOUT
+        while status not in terminal and time.monotonic() < deadline:
+            try:
+                event = await subscription.get(settings.TIKI_EVENTS_KEEPALIVE)
+            except TimeoutError:
+                if not hub.cross_process:
+                    latest = await statuses.aget(id=upload_id)
+                    if latest != status:
+                        status = latest
+                        yield _sse("status", {"id": str(upload_id), "status": status})
+                        continue
+                yield ": keepalive\n\n"
+                continue
+            if event["status"] != status:
+                status = event["status"]
+                yield _sse("status", event)
+
+        if status in terminal:
+            upload = await UploadedFile.objects.select_related("dcat_output").aget(
+                id=upload_id
+            )
+            yield _sse("result", _result_payload(upload))
+    finally:
+        hub.unsubscribe(upload_id, subscription)
 
 
 @csrf_exempt
 @require_POST
 def edit_field(request, upload_id):
-    """Update empty fields on a DCAT output."""
-    try:
-        upload = UploadedFile.objects.get(id=upload_id)
-        dcat_output = upload.dcat_output
-    except (UploadedFile.DoesNotExist, DCATOutput.DoesNotExist):
-        return JsonResponse({"error": "Not found"}, status=404)
+    """Update empty fields on a DCAT output.
+
+    The record is locked while the edit is applied, so concurrent edits are
+    applied one after the other. With ``If-Match`` (an ETag of the record in
+    any format) the edit is refused with 412 if the record has changed since.
+    """
+    return _edit(request, upload_id)
+
+
+@csrf_exempt
+@require_POST
+async def aedit_field(request, upload_id):
+    """Async variant of ``edit_field``."""
+    # The async ORM has no transactions, so the locked edit runs in a thread
+    return await sync_to_async(_edit)(request, upload_id)
+
+
+def _edit(request, upload_id):
+    with transaction.atomic():
+        try:
+            dcat_output = DCATOutput.objects.select_for_update().get(
+                upload_id=upload_id
+            )
+        except DCATOutput.DoesNotExist:
+            return JsonResponse({"error": "Not found"}, status=404)
 
+        if not _if_match(request, dcat_output):
+            return JsonResponse(
+                {"error": "The record has changed; fetch it and retry"},
+                status=412,
+                headers={"ETag": _etag(dcat_output, None)},
+            )
+        error = _apply_edits(request, dcat_output)
+        if error is not None:
+            return error
+        dcat_output.save(update_fields=EDIT_FIELDS)
+    return _edited(dcat_output)
+
+
+def _parse_edit(request):
+    """Return a list of ``(op, path, value)`` edits, or an error response.
+
+    The body is either ``{"field", "value"}`` (set a top-level field), one
+    JSON Patch operation, or a list of them (add/replace/remove only).
+    """
     try:
         body = json.loads(request.body)
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON"}, status=400)
 
-    field_name = body.get("field")
-    value = body.get("value")
+    if isinstance(body, dict) and "op" not in body:
+        field_name = body.get("field")
+        value = body.get("value")
+        if not field_name or value is None:
+            return JsonResponse(
+                {"error": "field and value are required"}, status=400
+            )
+        return [("replace", field_name, value)]
 
-    if not field_name or value is None:
-        return JsonResponse({"error": "field and value are required"}, status=400)
+    operations = body if isinstance(body, list) else [body]
+    edits = []
+    for operation in operations:
+        if not isinstance(operation, dict):
+            return JsonResponse({"error": "Invalid patch operation"}, status=400)
+        op, path, value = (
+            operation.get("op"),
+            operation.get("path"),
+            operation.get("value"),
+        )
+        if not isinstance(path, str) or not path:
+            return JsonResponse({"error": "path is required"}, status=400)
+        if op != "remove" and value is None:
+            return JsonResponse({"error": "value is required"}, status=400)
+        edits.append((op, path, value))
+    if not edits:
+        return JsonResponse({"error": "No operations"}, status=400)
+    return edits
 
-    dcat_output.user_edits[field_name] = value
 
-    # Remove from empty_fields if it was there
-    if field_name in dcat_output.empty_fields:
-        dcat_output.empty_fields.remove(field_name)
+def _apply_edits(request, dcat_output):
+    """Apply the request's edits; returns an error response if they're invalid."""
+    edits = _parse_edit(request)
+    if isinstance(edits, JsonResponse):
+        return edits
+    try:
+        dcat_output.apply_edits(edits)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return None
 
-    dcat_output.save(update_fields=["user_edits", "empty_fields"])
 
-    return JsonResponse({
-        "id": str(upload.id),
+def _edited(dcat_output):
+    response = _json({
+        "id": str(dcat_output.upload_id),
         "jsonld": dcat_output.get_merged_jsonld(),
         "empty_fields": dcat_output.empty_fields,
     })
+    response["ETag"] = _etag(dcat_output, None)
+    return response
+
+
+@csrf_exempt
+@require_POST
+def batch_enrich(request):
+    """Accept many files (or zip archives) and process them concurrently.
+
+    Returns 202 with the batch id; poll the status URL for progress.
+    """
+    handler = use_streaming_uploads(request, ["files"])
+    try:
+        files = request.FILES.getlist("files")
+        if not files:
+            return JsonResponse({"error": "No files provided"}, status=400)
+
+        try:
+            batch = create_batch(files, skip_cache=_wants_cache_bypass(request))
+        except (BatchError, zipfile.BadZipFile) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        for batch_file in files:
+            batch_file.attached = True
+    finally:
+        if handler is not None:
+            handler.discard_unattached()
+
+    if not settings.TIKI_ASYNC_ENRICH:
+        submit_batch(batch)
+
+    return JsonResponse(
+        {
+            "id": str(batch.id),
+            "total": batch.total_files,
+            "status_url": reverse("api-batch", args=[batch.id]),
+        },
+        status=202,
+    )
+
+
+@require_GET
+def batch(request, batch_id):
+    """Report per-file status and aggregate progress of a batch."""
+    try:
+        upload_batch = UploadBatch.objects.get(id=batch_id)
+    except UploadBatch.DoesNotExist:
+        return JsonResponse({"error": "Not found"}, status=404)
+
+    return JsonResponse(batch_progress(upload_batch))
+
+
+@require_GET
+def export(request):
+    """Stream every finalized DCAT-AP record for catalogue harvesters.
+
+    Formats (``?format=`` or Accept): a JSON-LD ``@graph`` (default),
+    N-Triples, or NDJSON with one record per line. ``updated_since``
+    (ISO 8601) limits the export to records changed since then. With
+    ``limit`` the export is paged; the Link header carries the cursor for
+    the next page.
+    """
+    query = _export_query(request)
+    if isinstance(query, JsonResponse):
+        return query
+    outputs, fmt, next_url = query
+    return _export_response(export_chunks(outputs, fmt), fmt, next_url)
+
+
+@require_GET
+async def aexport(request):
+    """Async variant of ``export``."""
+    query = await sync_to_async(_export_query)(request)
+    if isinstance(query, JsonResponse):
+        return query
+    outputs, fmt, next_url = query
+    chunks = _aiterate(export_chunks(outputs, fmt))
+    return _export_response(chunks, fmt, next_url)
+
+
+def _export_query(request):
+    """Return ``(outputs, format, next_url)`` for an export, or an error."""
+    requested = request.GET.get("format")
+    if requested:
+        fmt = EXPORT_ALIASES.get(requested.lower(), requested)
+    else:
+        preferred = request.get_preferred_type(list(EXPORT_FORMATS.values()))
+        fmt = next(
+            (name for name, type_ in EXPORT_FORMATS.items() if type_ == preferred),
+            "jsonld",
+        )
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"error": f"Unsupported format: {fmt}"}, status=400)
+
+    updated_since = None
+    if request.GET.get("updated_since"):
+        updated_since = parse_datetime(request.GET["updated_since"])
+        if updated_since is None:
+            return JsonResponse({"error": "Invalid updated_since"}, status=400)
+    try:
+        limit = int(request.GET.get("limit", 0))
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit"}, status=400)
+    try:
+        outputs = finalized_outputs(updated_since, request.GET.get("cursor"))
+    except ExportError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    next_url = None
+    if limit > 0:
+        cursor = next_cursor(outputs, limit)
+        if cursor is not None:
+            params = request.GET.copy()
+            params["cursor"] = cursor
+            next_url = f"{request.path}?{params.urlencode()}"
+        outputs = outputs[:limit]
+    return outputs, fmt, next_url
+
+
+def _export_response(chunks, fmt, next_url):
+    response = StreamingHttpResponse(
+        chunks, content_type=f"{EXPORT_FORMATS[fmt]}; charset=utf-8"
+    )
+    if next_url:
+        response["Link"] = f'<{next_url}>; rel="next"'
+    return _vary(response)
+
+
+async def _aiterate(iterator):
+    """Pull from a sync iterator in Django's sync thread, one chunk at a time.
+
+    ASGI would otherwise read a sync streaming body to the end before
+    sending anything.
+    """
+    done = object()
+    pull = sync_to_async(next)
+    while (chunk := await pull(iterator, done)) is not done:
+        yield chunk
 
 
 @require_GET
 def health(request):
     """Liveness check."""
     return JsonResponse({"status": "ok"})
+
+
+@require_GET
+def ready(request):
+    """Readiness check: 503 while a dependency is down or the pod is saturated."""
+    is_ready, report = readiness.readiness()
+    response = JsonResponse(report, status=200 if is_ready else 503)
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+@require_GET
+def metrics(request):
+    """Prometheus metrics, aggregated over all processes in multiprocess mode."""
+    if not pipeline_metrics.enabled():
+        return JsonResponse({"error": "prometheus_client is not installed"}, status=503)
+    return HttpResponse(
+        pipeline_metrics.exposition(), content_type=pipeline_metrics.CONTENT_TYPE
+    )
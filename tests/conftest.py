@@ -1,6 +1,15 @@
 import pytest
 
 from tiki.models import UploadedFile
+from tiki.services import breaker
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    """Don't let a breaker's cached state leak from one test into the next."""
+    breaker.reset()
+    yield
+    breaker.reset()
 
 
 @pytest.fixture
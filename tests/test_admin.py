@@ -0,0 +1,94 @@
+import pytest
+
+from tiki.admin import EstimatedCountPaginator
+from tiki.models import ClaudeEnrichment, DCATOutput, TikaMetadata, UploadedFile
+
+
+@pytest.fixture(autouse=True)
+def _plain_static_storage(settings):
+    # The manifest storage needs collectstatic, which tests don't run
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+
+
+@pytest.mark.django_db
+class TestUploadedFileAdmin:
+    def test_changelist_search(self, admin_client, uploaded_file):
+        response = admin_client.get("/admin/tiki/uploadedfile/", {"q": "test"})
+        assert response.status_code == 200
+        assert b"test.txt" in response.content
+
+    def test_exact_count_off_postgres(self, uploaded_file):
+        paginator = EstimatedCountPaginator(UploadedFile.objects.all(), 10)
+        assert paginator.count == 1
+
+    def test_previews_truncate_large_fields(
+        self, admin_client, uploaded_file, settings
+    ):
+        settings.TIKI_ADMIN_PREVIEW_CHARS = 20
+        TikaMetadata.objects.create(
+            upload=uploaded_file, raw_metadata={"X-Parsed-By": "x" * 100}
+        )
+        ClaudeEnrichment.objects.create(upload=uploaded_file, prompt_used="Short")
+        DCATOutput.objects.create(upload=uploaded_file, jsonld={"@graph": []})
+
+        response = admin_client.get(
+            f"/admin/tiki/uploadedfile/{uploaded_file.id}/change/"
+        )
+        content = response.content.decode()
+
+        assert "x" * 100 not in content
+        assert f"/admin/tiki/uploadedfile/{uploaded_file.id}/field/raw_metadata/" in (
+            content
+        )
+        assert "<pre>Short</pre>" in content
+        assert "/field/jsonld/" not in content
+
+    def test_field_view(self, admin_client, uploaded_file):
+        TikaMetadata.objects.create(
+            upload=uploaded_file, raw_metadata={"X-Parsed-By": "x" * 100}
+        )
+        url = f"/admin/tiki/uploadedfile/{uploaded_file.id}/field/"
+
+        assert admin_client.get(url + "raw_metadata/").json() == {
+            "X-Parsed-By": "x" * 100
+        }
+        assert admin_client.get(url + "jsonld/").status_code == 404
+        assert admin_client.get(url + "file/").status_code == 404
+
+    def test_save_keeps_deferred_fields(self, admin_client, uploaded_file):
+        DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Test"}]}
+        )
+        dcat_output = DCATOutput.objects.get()
+        response = admin_client.post(
+            f"/admin/tiki/uploadedfile/{uploaded_file.id}/change/",
+            {
+                "original_filename": "test.txt",
+                "file_size": "12",
+                "status": "completed",
+                "error_message": "",
+                "content_hash": "",
+                "tika_metadata-TOTAL_FORMS": "0",
+                "tika_metadata-INITIAL_FORMS": "0",
+                "claude_enrichment-TOTAL_FORMS": "0",
+                "claude_enrichment-INITIAL_FORMS": "0",
+                "dcat_output-TOTAL_FORMS": "1",
+                "dcat_output-INITIAL_FORMS": "1",
+                "dcat_output-0-id": str(dcat_output.pk),
+                "dcat_output-0-upload": str(uploaded_file.id),
+                "dcat_output-0-empty_fields": '["dct:publisher"]',
+                "dcat_output-0-user_edits": '{"dct:license": "CC-BY"}',
+                "dcat_output-0-is_finalized": "on",
+            },
+        )
+        assert response.status_code == 302
+
+        dcat_output.refresh_from_db()
+        assert dcat_output.jsonld == {"@graph": [{"dct:title": "Test"}]}
+        assert dcat_output.merged_jsonld["@graph"][0]["dct:license"] == "CC-BY"
+        assert dcat_output.version == 2
@@ -0,0 +1,105 @@
+import zipfile
+
+import pytest
+from django.core.management import call_command
+
+from tiki.benchmarks import corpus, runner
+from tiki.benchmarks.fakes import FakeAnthropic, FakeTika
+from tiki.services.breaker import Breaker
+from tiki.services.claude import ClaudeScheduler, ClaudeService, RateLimitBudget
+from tiki.services.tika import TikaService
+
+
+def test_corpus(tmp_path):
+    paths = corpus.generate(tmp_path, 3, [2000])
+
+    assert [path.suffix for path in paths] == [".pdf", ".docx", ".csv"]
+    pdf = paths[0].read_bytes()
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    with zipfile.ZipFile(paths[1]) as archive:
+        assert "<w:t>" in archive.read("word/document.xml").decode()
+    assert paths[2].read_text().startswith("station,year")
+    # Same seed, same corpus
+    assert corpus.generate(tmp_path / "again", 3, [2000])[0].read_bytes() == pdf
+
+
+def test_fake_tika(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"x" * 1000)
+
+    with FakeTika(text_chars=100) as tika:
+        service = TikaService(
+            server_url=tika.url, breaker=Breaker("tika", failure_threshold=0)
+        )
+        result = service.extract(str(path))
+
+    assert result.mime_type == "application/pdf"
+    assert result.title == "report"
+    assert len(result.full_text) == 100
+
+
+def test_fake_anthropic():
+    with FakeAnthropic(output_tokens=50) as anthropic:
+        service = ClaudeService(
+            api_key="sk-ant-benchmark",
+            base_url=anthropic.url,
+            breaker=Breaker("claude", failure_threshold=0),
+            scheduler=ClaudeScheduler(
+                budget=RateLimitBudget(0, 0),
+                max_concurrency=1,
+                max_retries=0,
+                backoff=0,
+                backoff_max=0,
+            ),
+        )
+        result = service.enrich(text="Water quality", title="Report")
+
+    assert len(result.generated_description) == 200
+    assert result.suggested_themes[0].endswith("/ENVI")
+    assert result.raw_response["usage"]["output_tokens"] == 50
+
+
+def test_compare():
+    baseline = {
+        "results": {
+            "api": {
+                "throughput": 10,
+                "p95_ms": 100,
+                "queries_per_op": 7,
+                "peak_rss_mb": 100,
+            }
+        }
+    }
+    same = dict(baseline["results"]["api"])
+    slower = {**same, "throughput": 7, "p95_ms": 130, "queries_per_op": 8}
+
+    assert runner.compare({"api": same}, baseline, 0.25) == []
+    assert runner.compare({"api": slower}, baseline, 0.25) == [
+        "api: throughput 7 < 10",
+        "api: p95_ms 130 > 100",
+        "api: queries_per_op 8 > 7",
+    ]
+
+
+@pytest.mark.django_db
+def test_command_records_and_checks_baseline(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    options = [
+        "--uploads=2",
+        "--concurrency=1",
+        "--sizes=1000",
+        "--tika-latency=0",
+        "--tika-latency-per-mb=0",
+        "--claude-latency=0",
+        "--build-iterations=10",
+        f"--baseline={baseline}",
+    ]
+
+    call_command("benchmark_pipeline", *options, "--update-baseline")
+    results = runner.load_baseline(baseline)["results"]
+    assert set(results) == {"build", "pipeline", "api"}
+    assert results["pipeline"]["operations"] == 2
+    assert results["api"]["queries_per_op"] > 0
+
+    call_command("benchmark_pipeline", *options, "--tolerance=100")
+    assert "No regressions" in capsys.readouterr().out
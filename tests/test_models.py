@@ -1,6 +1,14 @@
+import copy
+
 import pytest
 
-from tiki.models import ClaudeEnrichment, DCATOutput, TikaMetadata, UploadedFile
+from tiki.models import (
+    ClaudeEnrichment,
+    DCATOutput,
+    ExtractedText,
+    TikaMetadata,
+    UploadedFile,
+)
 
 
 @pytest.mark.django_db
@@ -63,3 +71,152 @@ class TestDCATOutput:
         )
         merged = dcat.get_merged_jsonld()
         assert merged["@graph"][0]["dct:title"] == "Test"
+
+
+    def test_apply_edits_materializes_merged(self, uploaded_file):
+        dcat = DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dct:title": "Test", "dct:publisher": ""}]},
+            empty_fields=["dct:publisher"],
+        )
+
+        dcat.apply_edits([("replace", "/dct:publisher/foaf:name", "Agency")])
+        dcat.save()
+        dcat.refresh_from_db()
+
+        assert dcat.version == 2
+        assert dcat.empty_fields == []
+        assert dcat.jsonld["@graph"][0]["dct:publisher"] == ""
+        dataset = dcat.get_merged_jsonld()["@graph"][0]
+        assert dataset["dct:publisher"] == {"foaf:name": "Agency"}
+        # Reads return the stored document instead of a copy
+        assert dcat.get_merged_jsonld() is dcat.merged_jsonld
+
+    def test_apply_edits_lists_and_removal(self, uploaded_file):
+        dcat = DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dcat:keyword": ["a", "b"], "dct:title": "T"}]},
+        )
+
+        dcat.apply_edits([
+            ("add", "/dcat:keyword/-", "c"),
+            ("replace", "/dcat:keyword/0", "z"),
+            ("remove", "/dct:title", None),
+        ])
+
+        dataset = dcat.get_merged_jsonld()["@graph"][0]
+        assert dataset == {"dcat:keyword": ["z", "b", "c"]}
+        assert dcat.user_edits[-1] == {
+            "op": "remove",
+            "path": "/dct:title",
+            "value": None,
+        }
+
+    def test_rebuild_replays_edits_in_order(self, uploaded_file):
+        dcat = DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dcat:keyword": ["a", "b"]}]},
+        )
+        dcat.apply_edits([("add", "/dcat:keyword/-", "x")])
+        dcat.apply_edits([
+            ("add", "/dcat:keyword/-", "y"),
+            ("add", "/dcat:keyword/0", "z"),
+        ])
+        incremental = copy.deepcopy(dcat.get_merged_jsonld())
+
+        dcat.rebuild_merged_jsonld()
+
+        assert dcat.get_merged_jsonld() == incremental
+        assert incremental["@graph"][0]["dcat:keyword"] == ["z", "a", "b", "x", "y"]
+
+    def test_regenerate_keeps_user_edits(self, uploaded_file):
+        dcat = DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dct:title": "Old", "dct:publisher": ""}]},
+            empty_fields=["dct:publisher"],
+        )
+        dcat.apply_edits([("replace", "/dct:publisher/foaf:name", "Agency")])
+
+        dcat.regenerate(
+            {"@graph": [{"dct:title": "New", "dct:publisher": "", "dct:license": ""}]},
+            ["dct:publisher", "dct:license"],
+        )
+
+        assert dcat.version == 3
+        assert dcat.empty_fields == ["dct:license"]
+        dataset = dcat.get_merged_jsonld()["@graph"][0]
+        assert dataset["dct:title"] == "New"
+        assert dataset["dct:publisher"] == {"foaf:name": "Agency"}
+
+    @pytest.mark.parametrize(
+        "edit",
+        [
+            ("move", "/dct:title", "x"),
+            ("replace", "/dcat:keyword/9", "x"),
+            ("remove", "/dct:missing", None),
+        ],
+    )
+    def test_apply_edits_rejects_invalid(self, uploaded_file, edit):
+        dcat = DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dcat:keyword": ["a"], "dct:title": "T"}]},
+        )
+        with pytest.raises(ValueError):
+            dcat.apply_edits([edit])
+
+
+@pytest.mark.django_db
+class TestTikaMetadata:
+    def test_raw_metadata_deferred(self, uploaded_file):
+        TikaMetadata.objects.create(upload=uploaded_file, raw_metadata={"a": 1})
+
+        metadata = TikaMetadata.objects.get(upload=uploaded_file)
+        assert "raw_metadata" in metadata.get_deferred_fields()
+        assert metadata.raw_metadata == {"a": 1}
+
+        related = UploadedFile.objects.get(pk=uploaded_file.pk).tika_metadata
+        assert "raw_metadata" in related.get_deferred_fields()
+
+    def test_with_raw_metadata(self, uploaded_file):
+        TikaMetadata.objects.create(upload=uploaded_file, raw_metadata={"a": 1})
+
+        metadata = TikaMetadata.objects.with_raw_metadata().get(upload=uploaded_file)
+        assert metadata.get_deferred_fields() == set()
+
+    def test_full_text_loaded_on_demand(self, uploaded_file):
+        metadata = TikaMetadata.objects.create(upload=uploaded_file)
+        assert metadata.full_text == ""
+
+        ExtractedText.from_text("Chapter one", upload=uploaded_file).save()
+        metadata = TikaMetadata.objects.get(upload=uploaded_file)
+        assert metadata.full_text == "Chapter one"
+
+
+@pytest.mark.django_db
+class TestExtractedText:
+    @pytest.mark.parametrize("codec", ["none", "gzip"])
+    def test_round_trip(self, uploaded_file, codec):
+        text = "Éire " * 50000
+        ExtractedText.from_text(text, codec=codec, upload=uploaded_file).save()
+
+        stored = ExtractedText.objects.get(upload=uploaded_file)
+        assert stored.codec == codec
+        assert stored.get_text() == text
+        assert not stored.truncated
+
+    def test_gzip_compresses(self):
+        text = "repetitive text " * 10000
+        assert len(ExtractedText.from_text(text, codec="gzip").data) < len(text) / 10
+
+    def test_truncates_to_cap(self, settings):
+        settings.TIKI_FULL_TEXT_MAX_CHARS = 5
+        stored = ExtractedText.from_text("Hello, Tiki!", codec="none")
+        assert stored.get_text() == "Hello"
+        assert stored.truncated
+        assert stored.original_length == 12
+
+    def test_zstd_falls_back_without_package(self, monkeypatch):
+        monkeypatch.setattr("tiki.models.text.zstandard", None)
+        stored = ExtractedText.from_text("Hello", codec="zstd")
+        assert stored.codec == "gzip"
+        assert stored.get_text() == "Hello"
@@ -0,0 +1,209 @@
+import hashlib
+import io
+import os
+import zipfile
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from tiki.models import UploadedFile
+from tiki.services.batch import (
+    BatchError,
+    batch_progress,
+    create_batch,
+    iter_batch_files,
+    process_upload,
+    recover_uploads,
+    submit_batch,
+)
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.tika import TikaResult
+
+
+def _zip_file(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return SimpleUploadedFile(
+        "archive.zip", buffer.getvalue(), content_type="application/zip"
+    )
+
+
+class TestIterBatchFiles:
+    def test_plain_files(self):
+        files = [SimpleUploadedFile("a.txt", b"a"), SimpleUploadedFile("b.txt", b"b")]
+        assert [f.name for f in iter_batch_files(files)] == ["a.txt", "b.txt"]
+
+    def test_expands_zip(self):
+        archive = _zip_file({
+            "reports/a.csv": b"x,y\n1,2\n",
+            "b.txt": b"hello",
+            "__MACOSX/._b.txt": b"junk",
+            ".DS_Store": b"junk",
+        })
+        members = list(iter_batch_files([archive]))
+        assert [m.name for m in members] == ["a.csv", "b.txt"]
+        assert [m.size for m in members] == [8, 5]
+
+
+@pytest.mark.django_db
+class TestCreateBatch:
+    def test_creates_pending_uploads(self):
+        batch = create_batch([
+            SimpleUploadedFile("a.txt", b"first"),
+            _zip_file({"b.txt": b"second", "c.txt": b"third"}),
+        ])
+
+        assert batch.total_files == 3
+        uploads = list(batch.uploads.order_by("original_filename"))
+        assert [u.original_filename for u in uploads] == ["a.txt", "b.txt", "c.txt"]
+        assert all(u.status == UploadedFile.Status.PENDING for u in uploads)
+        assert all(len(u.content_hash) == 64 for u in uploads)
+        with uploads[1].file.open("rb") as stored:
+            assert stored.read() == b"second"
+
+    def test_empty(self):
+        with pytest.raises(BatchError):
+            create_batch([])
+
+    def test_members_are_hashed_while_stored(self):
+        batch = create_batch([_zip_file({"b.txt": b"second"})])
+
+        upload = batch.uploads.get()
+        assert upload.content_hash == hashlib.sha256(b"second").hexdigest()
+        assert upload.file_size == 6
+
+    def test_zip_bomb(self, settings):
+        settings.TIKI_BATCH_MAX_BYTES = 10_000
+        archive = _zip_file({"a.txt": b"a", "bomb.bin": b"\0" * 1_000_000})
+        assert archive.size < 10_000
+
+        def stored():
+            return {
+                os.path.join(root, name)
+                for root, _, names in os.walk(settings.MEDIA_ROOT)
+                for name in names
+            }
+
+        before = stored()
+        with pytest.raises(BatchError, match="at most 10000 bytes"):
+            create_batch([archive])
+
+        assert not UploadedFile.objects.exists()
+        assert stored() == before
+
+    def test_too_many_files(self, settings):
+        settings.TIKI_BATCH_MAX_FILES = 1
+        with pytest.raises(BatchError):
+            create_batch([
+                SimpleUploadedFile("a.txt", b"a"),
+                SimpleUploadedFile("b.txt", b"b"),
+            ])
+
+
+@pytest.mark.django_db
+class TestBatchProgress:
+    def test_progress(self):
+        batch = create_batch([
+            SimpleUploadedFile("a.txt", b"a"),
+            SimpleUploadedFile("b.txt", b"b"),
+        ])
+        batch.uploads.get(original_filename="a.txt").mark_completed()
+
+        progress = batch_progress(batch)
+
+        assert progress["total"] == 2
+        assert progress["counts"] == {"completed": 1, "pending": 1}
+        assert progress["progress"] == 0.5
+        assert progress["done"] is False
+        assert len(progress["files"]) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestProcessUpload:
+    def test_runs_pipeline_for_pending_upload(self):
+        batch = create_batch([SimpleUploadedFile("a.txt", b"a")])
+        upload = batch.uploads.get()
+        pipeline = MagicMock()
+
+        with patch("tiki.services.batch._pipeline", pipeline):
+            process_upload(upload.id)
+
+        pipeline.run.assert_called_once()
+        upload.refresh_from_db()
+        assert upload.status == UploadedFile.Status.EXTRACTING
+
+    def test_skips_claimed_upload(self):
+        batch = create_batch([SimpleUploadedFile("a.txt", b"a")])
+        upload = batch.uploads.get()
+        upload.mark_extracting()
+        pipeline = MagicMock()
+
+        with patch("tiki.services.batch._pipeline", pipeline):
+            process_upload(upload.id)
+
+        pipeline.run.assert_not_called()
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSubmitBatch:
+    def test_processes_batch_in_bulk(self, settings):
+        settings.ANTHROPIC_API_KEY = ""
+        batch = create_batch(
+            [SimpleUploadedFile("a.txt", b"a"), SimpleUploadedFile("b.txt", b"b")]
+        )
+        pipeline = EnrichmentPipeline()
+        pipeline.tika_service = MagicMock()
+        pipeline.tika_service.extract.side_effect = [
+            TikaResult(mime_type="text/plain"),
+            RuntimeError("Tika down"),
+        ]
+
+        with (
+            patch("tiki.services.batch._pipeline", pipeline),
+            patch("tiki.services.batch._get_executor", _InlineExecutor),
+        ):
+            submit_batch(batch)
+
+        progress = batch_progress(batch)
+        assert progress["counts"] == {"completed": 1, "failed": 1}
+        assert progress["done"] is True
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRecoverUploads:
+    def test_resubmits_orphaned_uploads(self, settings):
+        settings.TIKI_WORKER_STALE_AFTER = 60
+        batch = create_batch([
+            SimpleUploadedFile("orphaned.txt", b"a"),
+            SimpleUploadedFile("stuck.txt", b"b"),
+            SimpleUploadedFile("new.txt", b"c"),
+        ])
+        old = timezone.now() - timedelta(minutes=5)
+        batch.uploads.exclude(original_filename="new.txt").update(
+            created_at=old, updated_at=old
+        )
+        batch.uploads.filter(original_filename="stuck.txt").update(
+            status=UploadedFile.Status.ENRICHING
+        )
+        pipeline = MagicMock()
+
+        with (
+            patch("tiki.services.batch._pipeline", pipeline),
+            patch("tiki.services.batch._get_executor", _InlineExecutor),
+        ):
+            assert recover_uploads() == 2
+
+        ran = {call.args[0].original_filename for call in pipeline.run.call_args_list}
+        assert ran == {"orphaned.txt", "stuck.txt"}
+        new = batch.uploads.get(original_filename="new.txt")
+        assert new.status == UploadedFile.Status.PENDING
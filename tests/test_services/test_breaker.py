@@ -0,0 +1,179 @@
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import anthropic
+import httpx
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from tiki.models import CircuitBreaker, ClaudeEnrichment, UploadedFile
+from tiki.services.breaker import Breaker, CircuitOpenError
+from tiki.services.claude import is_outage as claude_outage
+from tiki.services.jobs import Worker
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.tika import TikaError, TikaResult
+from tiki.services.tika import is_outage as tika_outage
+
+
+def _breaker(**kwargs):
+    return Breaker(
+        "tika",
+        is_failure=tika_outage,
+        failure_threshold=kwargs.pop("failure_threshold", 2),
+        reset_after=kwargs.pop("reset_after", 60),
+        refresh_interval=0,
+    )
+
+
+def _fail():
+    raise TikaError("Tika request failed: connection refused")
+
+
+def _open(name, failures=5):
+    CircuitBreaker.objects.create(
+        name=name,
+        state=CircuitBreaker.State.OPEN,
+        failures=failures,
+        opened_at=timezone.now(),
+    )
+
+
+@pytest.mark.django_db
+class TestBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = _breaker()
+        func = MagicMock(side_effect=_fail)
+
+        for _ in range(2):
+            with pytest.raises(TikaError):
+                breaker.call(func)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(func)
+
+        assert func.call_count == 2
+        assert not breaker.available()
+        assert CircuitBreaker.objects.get(name="tika").state == "open"
+
+    def test_success_resets_failures(self):
+        breaker = _breaker()
+        with pytest.raises(TikaError):
+            breaker.call(_fail)
+
+        assert breaker.call(lambda: "ok") == "ok"
+
+        assert CircuitBreaker.objects.get(name="tika").failures == 0
+
+    def test_ignores_errors_that_are_not_outages(self):
+        breaker = _breaker(failure_threshold=1)
+
+        def unparseable():
+            raise TikaError("Tika returned HTTP 422: encrypted", status=422)
+
+        for _ in range(3):
+            with pytest.raises(TikaError):
+                breaker.call(unparseable)
+        assert breaker.available()
+
+    def test_state_is_shared(self):
+        with pytest.raises(TikaError):
+            _breaker(failure_threshold=1).call(_fail)
+
+        with pytest.raises(CircuitOpenError):
+            _breaker(failure_threshold=1).call(lambda: "ok")
+
+    def test_one_trial_call_after_reset(self):
+        _open("tika")
+        CircuitBreaker.objects.update(opened_at=timezone.now() - timedelta(hours=1))
+        first, second = _breaker(), _breaker()
+
+        first.before_call()
+        with pytest.raises(CircuitOpenError):
+            second.before_call()
+
+        first.record_success()
+        assert CircuitBreaker.objects.get(name="tika").state == "closed"
+        assert second.call(lambda: "ok") == "ok"
+
+    def test_failed_trial_reopens(self):
+        _open("tika", failures=1)
+        breaker = _breaker(failure_threshold=5, reset_after=0)
+
+        with pytest.raises(TikaError):
+            breaker.call(_fail)
+
+        row = CircuitBreaker.objects.get(name="tika")
+        assert row.state == "open"
+        assert row.failures == 2
+
+    def test_disabled(self):
+        breaker = _breaker(failure_threshold=0)
+        for _ in range(3):
+            with pytest.raises(TikaError):
+                breaker.call(_fail)
+        assert not CircuitBreaker.objects.exists()
+
+
+def test_outage_errors():
+    assert tika_outage(TikaError("refused"))
+    assert tika_outage(TikaError("HTTP 503", status=503))
+    assert not tika_outage(TikaError("HTTP 422", status=422))
+    assert not tika_outage(FileNotFoundError())
+
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    assert claude_outage(anthropic.APIConnectionError(request=request))
+    overloaded = httpx.Response(529, request=request)
+    assert claude_outage(anthropic.APIStatusError("", response=overloaded, body={}))
+    bad_request = httpx.Response(400, request=request)
+    assert not claude_outage(
+        anthropic.BadRequestError("", response=bad_request, body={})
+    )
+
+
+@pytest.mark.django_db
+class TestClaudeOutage:
+    @pytest.fixture
+    def pipeline(self, settings):
+        settings.ANTHROPIC_API_KEY = "sk-ant-" + "0" * 32
+        pipeline = EnrichmentPipeline()
+        pipeline.tika_service = MagicMock()
+        pipeline.tika_service.extract.return_value = TikaResult(
+            mime_type="text/plain", title="Report", full_text="Water quality"
+        )
+        _open("claude")
+        return pipeline
+
+    def test_degrades_to_tika_only_record(self, pipeline, uploaded_file):
+        output = pipeline.run(uploaded_file)
+
+        uploaded_file.refresh_from_db()
+        assert uploaded_file.status == UploadedFile.Status.COMPLETED
+        assert uploaded_file.needs_enrichment
+        assert '"dct:title": "Report"' in json.dumps(output.jsonld)
+        assert not ClaudeEnrichment.objects.exists()
+
+    def test_fails_fast(self, pipeline, uploaded_file, settings):
+        settings.TIKI_CLAUDE_OUTAGE = "fail"
+
+        with pytest.raises(CircuitOpenError):
+            pipeline.run(uploaded_file)
+
+        uploaded_file.refresh_from_db()
+        assert uploaded_file.status == UploadedFile.Status.FAILED
+        assert "circuit open" in uploaded_file.error_message
+
+
+@pytest.mark.django_db
+def test_worker_leaves_uploads_queued_while_tika_is_down(settings):
+    settings.ANTHROPIC_API_KEY = ""
+    upload = UploadedFile.objects.create(
+        file=SimpleUploadedFile("a.txt", b"a"), original_filename="a.txt", file_size=1
+    )
+    _open("tika")
+    pipeline = EnrichmentPipeline()
+
+    assert Worker(pipeline=pipeline, poll_interval=0).run_once() is False
+
+    upload.refresh_from_db()
+    assert upload.status == UploadedFile.Status.PENDING
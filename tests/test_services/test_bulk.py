@@ -0,0 +1,169 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tiki.models import (
+    ClaudeEnrichment,
+    DCATOutput,
+    ExtractedText,
+    TikaMetadata,
+    UploadedFile,
+)
+from tiki.services.bulk import BulkWriter
+from tiki.services.claude import ClaudeResult
+from tiki.services.pipeline import EnrichmentPipeline, PipelineJob
+from tiki.services.tika import TikaResult
+
+
+def _make_upload(name="test.txt"):
+    return UploadedFile.objects.create(
+        file=SimpleUploadedFile(name, b"Hello, Tiki!"),
+        original_filename=name,
+        file_size=12,
+        status=UploadedFile.Status.EXTRACTING,
+    )
+
+
+@pytest.fixture
+def pipeline(settings):
+    settings.ANTHROPIC_API_KEY = ""
+    pipeline = EnrichmentPipeline()
+    pipeline.tika_service = MagicMock()
+    pipeline.tika_service.extract.return_value = TikaResult(
+        mime_type="text/plain", title="Bulk", full_text="Hello, Tiki!"
+    )
+    return pipeline
+
+
+@pytest.mark.django_db
+class TestBulkWriter:
+    def test_flush_writes_results_and_statuses(self, pipeline):
+        uploads = [_make_upload(f"doc{i}.txt") for i in range(3)]
+        writer = BulkWriter(pipeline, flush_size=10)
+        for upload in uploads:
+            writer.add(pipeline.compute(PipelineJob(upload=upload)))
+
+        assert not TikaMetadata.objects.exists()
+        assert writer.flush() == 3
+
+        for upload in uploads:
+            upload.refresh_from_db()
+            assert upload.status == UploadedFile.Status.COMPLETED
+        assert TikaMetadata.objects.count() == 3
+        assert ExtractedText.objects.get(upload=uploads[0]).get_text() == (
+            "Hello, Tiki!"
+        )
+        assert DCATOutput.objects.count() == 3
+
+    def test_queries_do_not_grow_with_batch_size(self, pipeline):
+        def flush_queries(count):
+            writer = BulkWriter(pipeline, flush_size=count + 1)
+            for i in range(count):
+                job = PipelineJob(upload=_make_upload(f"doc{i}.txt"))
+                writer.add(pipeline.compute(job))
+            with CaptureQueriesContext(connection) as queries:
+                writer.flush()
+            return len(queries)
+
+        assert flush_queries(2) == flush_queries(20)
+
+    def test_stores_claude_results(self, pipeline):
+        upload = _make_upload()
+        job = pipeline.compute(PipelineJob(upload=upload))
+        job.claude_result = ClaudeResult(generated_description="Bulk enriched")
+        writer = BulkWriter(pipeline)
+        writer.add(job)
+        writer.flush()
+
+        enrichment = ClaudeEnrichment.objects.get(upload=upload)
+        assert enrichment.generated_description == "Bulk enriched"
+
+    def test_failures_store_only_the_status(self, pipeline):
+        upload = _make_upload()
+        writer = BulkWriter(pipeline)
+        writer.add_failure(PipelineJob(upload=upload), RuntimeError("Tika down"))
+        writer.flush()
+
+        upload.refresh_from_db()
+        assert upload.status == UploadedFile.Status.FAILED
+        assert upload.error_message == "Tika down"
+        assert not TikaMetadata.objects.filter(upload=upload).exists()
+
+    def test_flushes_when_full_or_all_expected_added(self, pipeline):
+        uploads = [_make_upload(f"doc{i}.txt") for i in range(3)]
+        writer = BulkWriter(pipeline, flush_size=2, expected=3)
+
+        writer.add(pipeline.compute(PipelineJob(upload=uploads[0])))
+        assert not DCATOutput.objects.exists()
+        writer.add(pipeline.compute(PipelineJob(upload=uploads[1])))
+        assert DCATOutput.objects.count() == 2
+        writer.add(pipeline.compute(PipelineJob(upload=uploads[2])))
+        assert DCATOutput.objects.count() == 3
+
+    def test_falls_back_to_one_by_one(self, pipeline):
+        good, bad = _make_upload("good.txt"), _make_upload("bad.txt")
+        # Results already stored make the bulk insert fail
+        TikaMetadata.objects.create(upload=bad)
+        writer = BulkWriter(pipeline)
+        for upload in (good, bad):
+            writer.add(pipeline.compute(PipelineJob(upload=upload)))
+        writer.flush()
+
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        assert good.status == UploadedFile.Status.COMPLETED
+        assert bad.status == UploadedFile.Status.FAILED
+
+    def test_drops_uploads_claimed_elsewhere(self, pipeline):
+        completed, reclaimed = _make_upload("done.txt"), _make_upload("again.txt")
+        writer = BulkWriter(pipeline)
+        for upload in (completed, reclaimed):
+            writer.add(pipeline.compute(PipelineJob(upload=upload)))
+        # Another process finished one copy and claimed the other again
+        TikaMetadata.objects.create(upload=completed)
+        UploadedFile.objects.filter(pk=completed.pk).update(
+            status=UploadedFile.Status.COMPLETED
+        )
+        UploadedFile.objects.filter(pk=reclaimed.pk).update(updated_at=timezone.now())
+
+        writer.flush()
+
+        completed.refresh_from_db()
+        reclaimed.refresh_from_db()
+        assert completed.status == UploadedFile.Status.COMPLETED
+        assert reclaimed.status == UploadedFile.Status.EXTRACTING
+        assert not DCATOutput.objects.exists()
+
+    def test_conflict_does_not_fail_upload_completed_elsewhere(self, pipeline):
+        upload = _make_upload()
+        writer = BulkWriter(pipeline)
+        writer.add(pipeline.compute(PipelineJob(upload=upload)))
+
+        # Another process stored its copy first
+        def conflict(buffered):
+            UploadedFile.objects.filter(pk=upload.pk).update(
+                status=UploadedFile.Status.COMPLETED
+            )
+            raise IntegrityError("duplicate key")
+
+        with patch.object(writer, "_write", conflict):
+            writer.flush()
+
+        upload.refresh_from_db()
+        assert upload.status == UploadedFile.Status.COMPLETED
+
+    def test_publishes_statuses(self, pipeline):
+        upload = _make_upload()
+        writer = BulkWriter(pipeline)
+        writer.add(pipeline.compute(PipelineJob(upload=upload)))
+
+        with patch("tiki.services.bulk.publish_statuses") as publish:
+            writer.flush()
+
+        assert list(publish.call_args.args[0]) == [
+            (upload.pk, UploadedFile.Status.COMPLETED)
+        ]
@@ -1,4 +1,24 @@
-from tiki.services.claude import ClaudeService
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anthropic
+import pytest
+
+from tiki.services.breaker import Breaker
+from tiki.services.claude import (
+    DATA_THEMES,
+    MIN_CACHEABLE_TOKENS,
+    SYSTEM_PROMPT,
+    THEME_BASE_URI,
+    THEME_VOCABULARY,
+    ClaudeScheduler,
+    ClaudeService,
+    RateLimitBudget,
+    estimate_tokens,
+)
 
 
 class TestClaudeServiceParsing:
@@ -34,3 +54,245 @@ class TestClaudeServiceParsing:
         assert "Author Name" in prompt
         assert "application/pdf" in prompt
         assert "en" in prompt
+
+    def test_valid_themes(self):
+        themes = self.service._valid_themes([
+            THEME_BASE_URI + "GOVE",
+            "envi",
+            THEME_BASE_URI + "GOVE",
+            "http://example.org/theme/FAKE",
+            "XXXX",
+        ])
+        assert themes == [THEME_BASE_URI + "GOVE", THEME_BASE_URI + "ENVI"]
+
+    def test_valid_themes_not_a_list(self):
+        assert self.service._valid_themes("GOVE") == []
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimitBudget:
+    def test_requests_per_minute(self):
+        clock = FakeClock()
+        budget = RateLimitBudget(2, 0, clock=clock.time, sleep=clock.sleep)
+
+        budget.acquire(10)
+        budget.acquire(10)
+        budget.acquire(10)
+
+        assert clock.sleeps == [60.0]
+
+    def test_tokens_per_minute_uses_actual_usage(self):
+        clock = FakeClock()
+        budget = RateLimitBudget(0, 1000, clock=clock.time, sleep=clock.sleep)
+
+        reservation = budget.acquire(900)
+        budget.settle(reservation, 100)
+        budget.acquire(800)
+
+        assert clock.sleeps == []
+
+    def test_headers_block_until_reset(self):
+        clock = FakeClock()
+        budget = RateLimitBudget(0, 0, clock=clock.time, sleep=clock.sleep)
+        reset = datetime.fromtimestamp(clock.now + 30, tz=timezone.utc).isoformat()
+
+        budget.update_from_headers({
+            "anthropic-ratelimit-requests-remaining": "0",
+            "anthropic-ratelimit-requests-reset": reset,
+        })
+        budget.acquire(10)
+
+        assert clock.sleeps == [pytest.approx(30.0)]
+
+    def test_pause(self):
+        clock = FakeClock()
+        budget = RateLimitBudget(0, 0, clock=clock.time, sleep=clock.sleep)
+
+        budget.pause(5)
+        budget.acquire(10)
+
+        assert clock.sleeps == [5.0]
+
+
+MESSAGE = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-test",
+    "content": [{
+        "type": "text",
+        "text": '{"themes": [], "description": "A doc.", "keywords": ["x"]}',
+    }],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {
+        "input_tokens": 120,
+        "output_tokens": 30,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 900,
+    },
+}
+
+
+class _FakeAnthropicHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        server.requests += 1
+        server.last_body = json.loads(body)
+        if server.responses:
+            status, headers = server.responses.pop(0)
+        else:
+            status, headers = 200, {}
+        if status == 200:
+            body = json.dumps(MESSAGE).encode()
+        else:
+            body = json.dumps({
+                "type": "error",
+                "error": {"type": "rate_limit_error", "message": "slow down"},
+            }).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def anthropic_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeAnthropicHandler)
+    server.requests = 0
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def claude_service(anthropic_server):
+    host, port = anthropic_server.server_address
+    scheduler = ClaudeScheduler(
+        budget=RateLimitBudget(0, 0),
+        max_concurrency=2,
+        max_retries=2,
+        backoff=0.01,
+        backoff_max=0.01,
+    )
+    return ClaudeService(
+        api_key="sk-ant-test",
+        model="claude-test",
+        base_url=f"http://{host}:{port}",
+        scheduler=scheduler,
+        # Breakers have their own tests (test_breaker.py)
+        breaker=Breaker("claude", failure_threshold=0),
+    )
+
+
+class TestClaudeScheduler:
+    def test_enrich(self, claude_service, anthropic_server):
+        result = claude_service.enrich("Some text", title="Doc")
+
+        assert result.generated_description == "A doc."
+        assert result.raw_response["usage"]["input_tokens"] == 120
+        assert result.raw_response["usage"]["cache_read_input_tokens"] == 900
+        assert result.model_requested == "claude-test"
+        assert anthropic_server.requests == 1
+
+    def test_caches_system_prompt(self, claude_service, anthropic_server):
+        claude_service.enrich("Some text", title="Doc")
+
+        system = anthropic_server.last_body["system"]
+        assert system[0]["text"] == SYSTEM_PROMPT
+        assert system[-1]["text"] == THEME_VOCABULARY
+        assert system[-1]["cache_control"] == {"type": "ephemeral"}
+        assert "Some text" not in json.dumps(system)
+
+
+    def test_retries_rate_limit(self, claude_service, anthropic_server):
+        anthropic_server.responses = [
+            (429, {"retry-after": "0"}),
+            (529, {}),
+        ]
+
+        result = claude_service.enrich("Some text")
+
+        assert result.generated_description == "A doc."
+        assert anthropic_server.requests == 3
+
+    def test_gives_up_after_max_retries(self, claude_service, anthropic_server):
+        anthropic_server.responses = [(429, {"retry-after": "0"})] * 3
+
+        with pytest.raises(anthropic.RateLimitError):
+            claude_service.enrich("Some text")
+        assert anthropic_server.requests == 3
+
+    def test_does_not_retry_client_errors(self, claude_service, anthropic_server):
+        anthropic_server.responses = [(400, {})]
+
+        with pytest.raises(anthropic.BadRequestError):
+            claude_service.enrich("Some text")
+        assert anthropic_server.requests == 1
+
+
+class TestAsyncClaudeScheduler:
+    def test_aenrich(self, claude_service, anthropic_server):
+        result = asyncio.run(claude_service.aenrich("Some text", title="Doc"))
+
+        assert result.generated_description == "A doc."
+        assert result.raw_response["usage"]["cache_read_input_tokens"] == 900
+        assert anthropic_server.last_body["system"][-1]["cache_control"]
+
+    def test_retries_rate_limit(self, claude_service, anthropic_server):
+        anthropic_server.responses = [(429, {"retry-after": "0"}), (503, {})]
+
+        result = asyncio.run(claude_service.aenrich("Some text"))
+
+        assert result.generated_description == "A doc."
+        assert anthropic_server.requests == 3
+
+    def test_does_not_retry_client_errors(self, claude_service, anthropic_server):
+        anthropic_server.responses = [(400, {})]
+
+        with pytest.raises(anthropic.BadRequestError):
+            asyncio.run(claude_service.aenrich("Some text"))
+        assert anthropic_server.requests == 1
+
+    def test_concurrency_limit(self, claude_service, anthropic_server):
+        async def run():
+            return await asyncio.gather(
+                *(claude_service.aenrich(f"Text {i}") for i in range(6))
+            )
+
+        results = asyncio.run(run())
+
+        assert len(results) == 6
+        assert anthropic_server.requests == 6
+
+
+def test_cached_prefix_is_long_enough_to_cache():
+    # With margin, since estimate_tokens only approximates the tokenizer
+    prefix = SYSTEM_PROMPT + THEME_VOCABULARY
+    assert estimate_tokens(prefix) >= MIN_CACHEABLE_TOKENS * 1.25
+    assert len(DATA_THEMES) == 14
+    assert THEME_BASE_URI + "OP_DATPRO" in THEME_VOCABULARY
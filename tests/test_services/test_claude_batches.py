@@ -0,0 +1,149 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from tiki.models import (
+    ClaudeBatch,
+    ClaudeBatchRequest,
+    ClaudeEnrichment,
+    DCATOutput,
+    UploadedFile,
+)
+from tiki.services.claude_batches import ClaudeBatchRunner
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.tika import TikaResult
+
+
+class FakeBatches:
+    """Stand-in for client.messages.batches."""
+
+    def __init__(self):
+        self.created = []
+        self.status = "in_progress"
+        self.outcomes = {}
+
+    def create(self, requests):
+        self.created.append(requests)
+        return SimpleNamespace(id=f"msgbatch_{len(self.created)}")
+
+    def retrieve(self, batch_id):
+        return SimpleNamespace(id=batch_id, processing_status=self.status)
+
+    def results(self, batch_id):
+        for requests in self.created:
+            for request in requests:
+                outcome = self.outcomes.get(request["custom_id"], "succeeded")
+                yield SimpleNamespace(
+                    custom_id=request["custom_id"], result=_result(outcome)
+                )
+
+
+def _result(outcome):
+    if outcome != "succeeded":
+        return SimpleNamespace(type=outcome, error=None)
+    text = json.dumps({"themes": [], "description": "Batched.", "keywords": ["b"]})
+    return SimpleNamespace(
+        type="succeeded",
+        message=SimpleNamespace(
+            content=[SimpleNamespace(text=text)],
+            model="claude-test",
+            usage=SimpleNamespace(input_tokens=100, output_tokens=20),
+        ),
+    )
+
+
+@pytest.fixture
+def batch_pipeline(settings):
+    settings.ANTHROPIC_API_KEY = "sk-ant-" + "x" * 30
+    settings.CLAUDE_ENRICHMENT_MODE = "batch"
+    pipeline = EnrichmentPipeline()
+    pipeline.tika_service = MagicMock()
+    pipeline.tika_service.extract.return_value = TikaResult(
+        mime_type="text/plain", title="Report", full_text="Report text"
+    )
+    return pipeline
+
+
+@pytest.fixture
+def fake_client():
+    return SimpleNamespace(messages=SimpleNamespace(batches=FakeBatches()))
+
+
+@pytest.mark.django_db
+class TestClaudeBatchRunner:
+    def test_pipeline_queues_upload(self, batch_pipeline, uploaded_file):
+        assert batch_pipeline.run(uploaded_file) is None
+
+        uploaded_file.refresh_from_db()
+        assert uploaded_file.status == UploadedFile.Status.ENRICHING
+        request = ClaudeBatchRequest.objects.get(upload=uploaded_file)
+        assert request.batch is None
+        assert "Report text" in request.prompt
+        assert request.params["messages"][0]["content"] == request.prompt
+
+    def test_submit_and_collect(self, batch_pipeline, fake_client, uploaded_file):
+        batch_pipeline.run(uploaded_file)
+        runner = ClaudeBatchRunner(pipeline=batch_pipeline, client=fake_client)
+
+        batch = runner.submit()
+        assert batch.request_count == 1
+        assert runner.submit() is None
+        assert runner.collect() == 0
+
+        fake_client.messages.batches.status = "ended"
+        assert runner.collect() == 1
+
+        uploaded_file.refresh_from_db()
+        assert uploaded_file.status == UploadedFile.Status.COMPLETED
+        enrichment = ClaudeEnrichment.objects.get(upload=uploaded_file)
+        assert enrichment.generated_description == "Batched."
+        dataset = DCATOutput.objects.get(upload=uploaded_file).jsonld["@graph"][0]
+        assert dataset["dct:title"] == "Report"
+        batch.refresh_from_db()
+        assert batch.status == ClaudeBatch.Status.COLLECTED
+
+    def test_collect_is_idempotent(self, batch_pipeline, fake_client, uploaded_file):
+        batch_pipeline.run(uploaded_file)
+        runner = ClaudeBatchRunner(pipeline=batch_pipeline, client=fake_client)
+        batch = runner.submit()
+        fake_client.messages.batches.status = "ended"
+        runner.collect()
+
+        # Simulate a crash before the batch was marked collected
+        ClaudeBatch.objects.filter(pk=batch.pk).update(
+            status=ClaudeBatch.Status.IN_PROGRESS
+        )
+        runner.collect()
+
+        assert ClaudeEnrichment.objects.filter(upload=uploaded_file).count() == 1
+
+    def test_expired_requests_are_requeued(
+        self, batch_pipeline, fake_client, uploaded_file
+    ):
+        batch_pipeline.run(uploaded_file)
+        runner = ClaudeBatchRunner(pipeline=batch_pipeline, client=fake_client)
+        runner.submit()
+        fake_client.messages.batches.status = "ended"
+        fake_client.messages.batches.outcomes[str(uploaded_file.id)] = "expired"
+
+        runner.collect()
+
+        request = ClaudeBatchRequest.objects.get(upload=uploaded_file)
+        assert request.batch is None
+        assert runner.submit() is not None
+
+    def test_errored_requests_fail_upload(
+        self, batch_pipeline, fake_client, uploaded_file
+    ):
+        batch_pipeline.run(uploaded_file)
+        runner = ClaudeBatchRunner(pipeline=batch_pipeline, client=fake_client)
+        runner.submit()
+        fake_client.messages.batches.status = "ended"
+        fake_client.messages.batches.outcomes[str(uploaded_file.id)] = "errored"
+
+        runner.collect()
+
+        uploaded_file.refresh_from_db()
+        assert uploaded_file.status == UploadedFile.Status.FAILED
@@ -0,0 +1,116 @@
+import hashlib
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from tiki.models import ClaudeEnrichment, ExtractedText, TikaMetadata, UploadedFile
+from tiki.services.dedup import ResultCache, compute_content_hash
+
+CONTENT_HASH = hashlib.sha256(b"Hello, Tiki!").hexdigest()
+
+
+def _make_upload(content_hash=CONTENT_HASH, **kwargs):
+    return UploadedFile.objects.create(
+        file=SimpleUploadedFile("test.txt", b"Hello, Tiki!"),
+        original_filename="test.txt",
+        file_size=12,
+        content_hash=content_hash,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def completed_source(db):
+    source = _make_upload(status=UploadedFile.Status.COMPLETED)
+    TikaMetadata.objects.create(upload=source, mime_type="text/plain", title="Greeting")
+    ExtractedText.from_text("Hello", upload=source).save()
+    ClaudeEnrichment.objects.create(
+        upload=source,
+        generated_description="A greeting.",
+        suggested_keywords=["hello"],
+        model_used="claude-test",
+        model_requested="claude-test",
+    )
+    return source
+
+
+def test_compute_content_hash():
+    assert compute_content_hash(SimpleUploadedFile("a.txt", b"Hello, Tiki!")) == (
+        CONTENT_HASH
+    )
+
+
+@pytest.mark.django_db
+class TestResultCache:
+    def test_hit(self, completed_source):
+        cached = ResultCache(ttl=3600, model="claude-test").lookup(_make_upload())
+
+        assert cached.source_id == str(completed_source.id)
+        assert cached.tika_result.title == "Greeting"
+        assert cached.tika_result.full_text == "Hello"
+        assert cached.claude_result.generated_description == "A greeting."
+
+    def test_other_model_reuses_tika_only(self, completed_source):
+        cached = ResultCache(ttl=3600, model="claude-other").lookup(_make_upload())
+
+        assert cached.tika_result.title == "Greeting"
+        assert cached.claude_result is None
+
+    def test_matches_the_configured_model_alias(self, completed_source):
+        ClaudeEnrichment.objects.filter(upload=completed_source).update(
+            model_used="claude-test-20260101", model_requested="claude-test-latest"
+        )
+
+        cached = ResultCache(ttl=3600, model="claude-test-latest").lookup(
+            _make_upload()
+        )
+
+        assert cached.claude_result.model_used == "claude-test-20260101"
+
+    def test_expired(self, completed_source):
+        UploadedFile.objects.filter(pk=completed_source.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        assert ResultCache(ttl=3600, model="claude-test").lookup(_make_upload()) is None
+
+    def test_disabled(self, completed_source):
+        assert ResultCache(ttl=0, model="claude-test").lookup(_make_upload()) is None
+
+    def test_bypass(self, completed_source):
+        upload = _make_upload(skip_cache=True)
+        assert ResultCache(ttl=3600, model="claude-test").lookup(upload) is None
+
+    def test_ignores_failed_uploads(self, completed_source):
+        completed_source.mark_failed("boom")
+        assert ResultCache(ttl=3600, model="claude-test").lookup(_make_upload()) is None
+
+    def test_lookup_many(self, completed_source):
+        duplicate = _make_upload()
+        unique = _make_upload(content_hash="0" * 64)
+        bypass = _make_upload(skip_cache=True)
+        cache = ResultCache(ttl=3600, model="claude-test")
+
+        cached = cache.lookup_many([duplicate, unique, bypass])
+
+        assert list(cached) == [str(duplicate.id)]
+        assert cached[str(duplicate.id)].source_id == str(completed_source.id)
+        assert cached[str(duplicate.id)].tika_result.full_text == "Hello"
+
+    def test_lookup_many_loads_only_the_newest_source(
+        self, completed_source, django_assert_num_queries
+    ):
+        older = _make_upload(status=UploadedFile.Status.COMPLETED)
+        UploadedFile.objects.filter(pk=older.pk).update(
+            created_at=timezone.now() - timedelta(minutes=5)
+        )
+        TikaMetadata.objects.create(upload=older, mime_type="text/plain")
+        duplicate = _make_upload()
+        cache = ResultCache(ttl=3600, model="claude-test")
+
+        with django_assert_num_queries(1) as captured:
+            cached = cache.lookup_many([duplicate])
+
+        assert cached[str(duplicate.id)].source_id == str(completed_source.id)
+        assert "LIMIT 1" in captured.captured_queries[0]["sql"]
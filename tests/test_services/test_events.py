@@ -0,0 +1,60 @@
+import queue
+
+import pytest
+
+from tiki.models import UploadedFile
+from tiki.services.events import StatusHub
+
+
+@pytest.mark.django_db
+class TestStatusHub:
+    def test_delivers_after_commit(
+        self, uploaded_file, django_capture_on_commit_callbacks
+    ):
+        hub = StatusHub()
+        events = hub.subscribe(uploaded_file.id)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            hub.publish(uploaded_file.id, UploadedFile.Status.ENRICHING)
+        assert events.empty()
+
+        callbacks[0]()
+        assert events.get_nowait() == {
+            "id": str(uploaded_file.id),
+            "status": "enriching",
+        }
+
+    def test_only_subscribed_upload(self, uploaded_file):
+        hub = StatusHub()
+        events = hub.subscribe(uploaded_file.id)
+
+        hub.dispatch({"id": "other", "status": "completed"})
+
+        with pytest.raises(queue.Empty):
+            events.get_nowait()
+
+    def test_unsubscribe(self, uploaded_file):
+        hub = StatusHub()
+        events = hub.subscribe(uploaded_file.id)
+        hub.unsubscribe(uploaded_file.id, events)
+
+        hub.dispatch({"id": str(uploaded_file.id), "status": "completed"})
+
+        assert events.empty()
+
+    def test_status_changes_are_published(
+        self, uploaded_file, django_capture_on_commit_callbacks
+    ):
+        from tiki.services.events import hub
+
+        events = hub.subscribe(uploaded_file.id)
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                uploaded_file.mark_completed()
+                # Saves that don't touch the status are not announced
+                uploaded_file.save(update_fields=["error_message"])
+        finally:
+            hub.unsubscribe(uploaded_file.id, events)
+
+        assert events.get_nowait()["status"] == "completed"
+        assert events.empty()
@@ -0,0 +1,121 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from tiki.models import DCATOutput, UploadedFile
+from tiki.services.export import (
+    ExportError,
+    decode_cursor,
+    encode_cursor,
+    export_chunks,
+    finalized_outputs,
+    next_cursor,
+)
+
+
+def _make_output(title, is_finalized=True):
+    upload = UploadedFile.objects.create(
+        file=SimpleUploadedFile("test.txt", b"Hello, Tiki!"),
+        original_filename="test.txt",
+        file_size=12,
+        status=UploadedFile.Status.COMPLETED,
+    )
+    return DCATOutput.objects.create(
+        upload=upload,
+        jsonld={
+            "@context": {"dct": "http://purl.org/dc/terms/"},
+            "@graph": [{"@type": "dcat:Dataset", "dct:title": title}],
+        },
+        is_finalized=is_finalized,
+    )
+
+
+def test_cursor_round_trip():
+    now = timezone.now()
+    assert decode_cursor(encode_cursor(now, 42)) == (now, 42)
+    with pytest.raises(ExportError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.django_db
+class TestFinalizedOutputs:
+    def test_only_finalized_in_keyset_order(self):
+        first, second = _make_output("First"), _make_output("Second")
+        _make_output("Draft", is_finalized=False)
+
+        assert list(finalized_outputs()) == [first, second]
+
+    def test_updated_since(self):
+        old, recent = _make_output("Old"), _make_output("Recent")
+        DCATOutput.objects.filter(pk=old.pk).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+
+        since = timezone.now() - timedelta(days=1)
+        assert list(finalized_outputs(updated_since=since)) == [recent]
+
+    def test_pages_with_cursor(self):
+        outputs = [_make_output(f"Doc {i}") for i in range(5)]
+        # Same timestamp for all: the id breaks ties
+        DCATOutput.objects.update(updated_at=timezone.now())
+
+        pages, cursor = [], None
+        while True:
+            queryset = finalized_outputs(after=cursor)
+            cursor = next_cursor(queryset, 2)
+            pages.append(list(queryset[:2]))
+            if cursor is None:
+                break
+
+        assert pages == [outputs[0:2], outputs[2:4], outputs[4:5]]
+
+
+@pytest.mark.django_db
+class TestExportChunks:
+    def test_jsonld_graph(self):
+        _make_output("First")
+        _make_output("Second")
+
+        body = b"".join(export_chunks(finalized_outputs(), "jsonld", chunk_size=1))
+        document = json.loads(body)
+
+        assert "dcat" in document["@context"]
+        assert [node["dct:title"] for node in document["@graph"]] == [
+            "First",
+            "Second",
+        ]
+
+    def test_edited_records_in_one_query(self, django_assert_num_queries):
+        for title in ["First", "Second", "Third"]:
+            output = _make_output(title)
+            output.apply_edits([("replace", "/dct:license", "CC-BY")])
+            output.save()
+
+        with django_assert_num_queries(1):
+            body = b"".join(export_chunks(finalized_outputs(), "jsonld", chunk_size=2))
+
+        graph = json.loads(body)["@graph"]
+        assert [node["dct:license"] for node in graph] == ["CC-BY"] * 3
+
+    def test_empty_jsonld(self):
+        body = b"".join(export_chunks(finalized_outputs(), "jsonld"))
+        assert json.loads(body)["@graph"] == []
+
+    def test_ndjson(self):
+        output = _make_output("First")
+        output.user_edits = {"dct:license": "CC-BY"}
+        output.save()
+
+        lines = b"".join(export_chunks(finalized_outputs(), "ndjson")).splitlines()
+
+        record = json.loads(lines[0])
+        assert record["id"] == str(output.upload_id)
+        assert record["jsonld"]["@graph"][0]["dct:license"] == "CC-BY"
+
+    def test_ntriples(self):
+        _make_output("First")
+        body = b"".join(export_chunks(finalized_outputs(), "ntriples"))
+        assert b'<http://purl.org/dc/terms/title> "First" .' in body
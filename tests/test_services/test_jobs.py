@@ -0,0 +1,207 @@
+import threading
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.utils import timezone
+
+from tiki.models import TikaMetadata, UploadBatch, UploadedFile
+from tiki.services.jobs import (
+    StagedWorker,
+    Worker,
+    claim_batch,
+    claim_next,
+    heartbeat,
+    requeue_stale,
+)
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.tika import TikaResult
+
+
+def _make_upload(name="test.txt", **kwargs):
+    return UploadedFile.objects.create(
+        file=SimpleUploadedFile(name, b"Hello, Tiki!"),
+        original_filename=name,
+        file_size=12,
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+class TestClaimNext:
+    def test_claims_oldest_pending(self):
+        first = _make_upload("first.txt")
+        _make_upload("second.txt")
+
+        claimed = claim_next()
+
+        assert claimed.id == first.id
+        assert claimed.status == UploadedFile.Status.EXTRACTING
+        first.refresh_from_db()
+        assert first.status == UploadedFile.Status.EXTRACTING
+
+    def test_skips_non_pending(self):
+        _make_upload(status=UploadedFile.Status.COMPLETED)
+        assert claim_next() is None
+
+    def test_empty_queue(self):
+        assert claim_next() is None
+
+
+@pytest.mark.django_db
+class TestClaimBatch:
+    def test_claims_pending_uploads_of_the_batch(self):
+        batch = UploadBatch.objects.create(total_files=3)
+        first = _make_upload("first.txt", batch=batch)
+        second = _make_upload("second.txt", batch=batch)
+        _make_upload("done.txt", batch=batch, status=UploadedFile.Status.COMPLETED)
+        other = _make_upload("other.txt")
+
+        claimed = claim_batch(batch.id)
+
+        assert [upload.id for upload in claimed] == [first.id, second.id]
+        assert all(u.status == UploadedFile.Status.EXTRACTING for u in claimed)
+        second.refresh_from_db()
+        other.refresh_from_db()
+        assert second.status == UploadedFile.Status.EXTRACTING
+        assert other.status == UploadedFile.Status.PENDING
+
+    def test_nothing_pending(self):
+        batch = UploadBatch.objects.create(total_files=0)
+        assert claim_batch(batch.id) == []
+
+
+@pytest.mark.django_db
+class TestRequeueStale:
+    def test_requeues_and_clears_partial_results(self, uploaded_file):
+        uploaded_file.mark_extracting()
+        TikaMetadata.objects.create(upload=uploaded_file)
+        UploadedFile.objects.filter(pk=uploaded_file.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        assert requeue_stale(timedelta(minutes=30)) == 1
+
+        uploaded_file.refresh_from_db()
+        assert uploaded_file.status == UploadedFile.Status.PENDING
+        assert not TikaMetadata.objects.filter(upload=uploaded_file).exists()
+
+    def test_leaves_recent_uploads(self, uploaded_file):
+        uploaded_file.mark_extracting()
+        assert requeue_stale(timedelta(minutes=30)) == 0
+
+    def test_leaves_uploads_with_a_recent_heartbeat(self, uploaded_file):
+        uploaded_file.mark_extracting()
+        UploadedFile.objects.filter(pk=uploaded_file.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now(),
+        )
+        assert requeue_stale(timedelta(minutes=30)) == 0
+
+
+@pytest.mark.django_db
+class TestHeartbeat:
+    def test_refreshes_claimed_uploads_in_progress(self, monkeypatch):
+        monkeypatch.setattr("tiki.services.jobs._heartbeat", object())
+        monkeypatch.setattr("tiki.services.jobs._owned", set())
+        batch = UploadBatch.objects.create(total_files=2)
+        first = _make_upload("first.txt", batch=batch)
+        second = _make_upload("second.txt", batch=batch)
+        claim_batch(batch.id)
+        second.mark_completed()
+
+        assert heartbeat() == 1
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.heartbeat_at is not None
+        assert second.heartbeat_at is None
+        assert heartbeat() == 1
+
+
+@pytest.mark.django_db
+class TestWorker:
+    def test_run_once_runs_pipeline(self, uploaded_file):
+        pipeline = MagicMock()
+        worker = Worker(pipeline=pipeline, poll_interval=0)
+
+        assert worker.run_once() is True
+        pipeline.run.assert_called_once()
+        assert pipeline.run.call_args.args[0].id == uploaded_file.id
+
+    def test_run_once_empty_queue(self):
+        pipeline = MagicMock()
+        worker = Worker(pipeline=pipeline, poll_interval=0)
+
+        assert worker.run_once() is False
+        pipeline.run.assert_not_called()
+
+    def test_run_once_swallows_pipeline_errors(self, uploaded_file):
+        pipeline = MagicMock()
+        pipeline.run.side_effect = RuntimeError("Tika down")
+        worker = Worker(pipeline=pipeline, poll_interval=0)
+
+        assert worker.run_once() is True
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor == "sqlite",
+    reason="stage threads write concurrently; sqlite's shared-cache test "
+    "database raises 'table is locked'",
+)
+class TestStagedWorker:
+    def test_run_once(self, settings):
+        settings.ANTHROPIC_API_KEY = ""
+        uploads = [_make_upload(f"doc{i}.txt") for i in range(3)]
+        pipeline = EnrichmentPipeline()
+        pipeline.tika_service = MagicMock()
+        pipeline.tika_service.extract.return_value = TikaResult(
+            mime_type="text/plain", title="Staged"
+        )
+
+        worker = StagedWorker(
+            pipeline=pipeline, concurrency={"extract": 2, "persist_extraction": 1}
+        )
+        assert worker.run_once() == 3
+
+        for upload in uploads:
+            upload.refresh_from_db()
+            assert upload.status == UploadedFile.Status.COMPLETED
+        stats = {stage["stage"]: stage for stage in worker.staged.stats()}
+        assert stats["extract"]["processed"] == 3
+        assert stats["persist_output"]["processed"] == 3
+
+    def test_failures_mark_upload_failed(self, settings):
+        settings.ANTHROPIC_API_KEY = ""
+        upload = _make_upload()
+        pipeline = EnrichmentPipeline()
+        pipeline.tika_service = MagicMock()
+        pipeline.tika_service.extract.side_effect = RuntimeError("Tika down")
+
+        StagedWorker(pipeline=pipeline).run_once()
+
+        upload.refresh_from_db()
+        assert upload.status == UploadedFile.Status.FAILED
+        assert "Tika down" in upload.error_message
+
+
+def test_staged_worker_claims_only_when_there_is_room(monkeypatch):
+    claim = MagicMock()
+    monkeypatch.setattr("tiki.services.jobs.claim_next", claim)
+    worker = StagedWorker(pipeline=MagicMock(), poll_interval=0)
+    worker.staged = MagicMock()
+    stop_event = threading.Event()
+
+    def full(timeout):
+        stop_event.set()
+        return False
+
+    worker.staged.wait_for_room.side_effect = full
+
+    worker.run_forever(stop_event)
+
+    claim.assert_not_called()
+    worker.staged.put.assert_not_called()
@@ -0,0 +1,61 @@
+import pytest
+
+from tiki.services import metrics
+
+
+@pytest.mark.parametrize(
+    ("file_size", "expected"),
+    [
+        (0, "<100KB"),
+        (500 * 1024, "<1MB"),
+        (5 * 1024**2, "<10MB"),
+        (2 * 1024**3, ">=100MB"),
+    ],
+)
+def test_size_bucket(file_size, expected):
+    assert metrics.size_bucket(file_size) == expected
+
+
+def test_document_labels():
+    assert metrics.document_labels("text/plain; charset=UTF-8", 12) == {
+        "mime_type": "text/plain",
+        "size": "<100KB",
+    }
+    assert metrics.document_labels("", 12)["mime_type"] == "unknown"
+
+
+def test_recording_without_prometheus_client(monkeypatch):
+    monkeypatch.setattr(metrics, "prometheus_client", None)
+    metrics.observe_extract(1.0, "text/plain", 12)
+    metrics.count_transitions(["completed"])
+    assert not metrics.enabled()
+
+
+class TestExposition:
+    @pytest.fixture(autouse=True)
+    def _prometheus_client(self):
+        pytest.importorskip("prometheus_client")
+
+    def _sample(self, name, **labels):
+        return metrics.registry().get_sample_value(name, labels) or 0
+
+    def test_claude_tokens(self):
+        labels = {"mime_type": "application/pdf", "size": "<1MB"}
+        before = self._sample("tiki_claude_input_tokens_sum", **labels)
+
+        metrics.observe_claude(
+            2.0,
+            {"usage": {"input_tokens": 100, "cache_read_input_tokens": 900}},
+            "application/pdf",
+            200 * 1024,
+        )
+
+        assert self._sample("tiki_claude_input_tokens_sum", **labels) == before + 1000
+        assert b"tiki_claude_seconds_bucket" in metrics.exposition()
+
+    def test_transitions(self):
+        before = self._sample("tiki_upload_transitions_total", status="failed")
+        metrics.count_transitions(["failed", "failed"])
+        assert self._sample("tiki_upload_transitions_total", status="failed") == (
+            before + 2
+        )
@@ -0,0 +1,91 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from tiki.benchmarks.fakes import FakeTika
+from tiki.models import UploadedFile
+from tiki.services import pipeline, readiness
+
+
+@pytest.fixture(autouse=True)
+def fresh_readiness(settings):
+    settings.ANTHROPIC_API_KEY = "sk-ant-" + "0" * 32
+    settings.TIKI_READY_CACHE_TTL = 60
+    readiness.reset()
+    yield
+    readiness.reset()
+
+
+@pytest.fixture
+def tika(settings):
+    with FakeTika() as server:
+        settings.TIKA_SERVER_URL = server.url
+        yield server
+
+
+@pytest.mark.django_db
+class TestReadiness:
+    def test_ready(self, tika):
+        ready, report = readiness.readiness()
+
+        assert ready
+        assert report["status"] == "ready"
+        assert report["checks"]["tika"]["version"].startswith("Apache Tika")
+        assert report["checks"]["claude"]["configured"]
+        assert report["saturation"] == {
+            "queue_depth": 0,
+            "in_flight": 0,
+            "process_in_flight": 0,
+        }
+
+    def test_results_are_cached(self, tika):
+        readiness.readiness()
+        readiness.readiness()
+        assert tika.requests == 1
+
+    def test_tika_down(self, settings):
+        settings.TIKA_SERVER_URL = "http://127.0.0.1:9"
+
+        ready, report = readiness.readiness()
+
+        assert not ready
+        assert report["status"] == "unavailable"
+        assert not report["checks"]["tika"]["ok"]
+        assert "error" in report["checks"]["tika"]
+
+    def test_claude_required(self, tika, settings):
+        settings.ANTHROPIC_API_KEY = ""
+        assert readiness.readiness()[0]
+
+        readiness.reset()
+        settings.TIKI_READY_REQUIRE_CLAUDE = True
+        ready, report = readiness.readiness()
+        assert not ready
+        assert not report["checks"]["claude"]["configured"]
+
+    def test_saturated(self, tika, settings, monkeypatch):
+        for status in ["pending", "pending", "extracting", "completed"]:
+            UploadedFile.objects.create(
+                file=SimpleUploadedFile("a.txt", b"a"),
+                original_filename="a.txt",
+                file_size=1,
+                status=status,
+            )
+        monkeypatch.setattr(pipeline, "_in_flight", 3)
+        settings.TIKI_READY_MAX_QUEUE_DEPTH = 2
+        settings.TIKI_READY_MAX_IN_FLIGHT = 4
+
+        ready, report = readiness.readiness()
+
+        assert not ready
+        assert report["saturation"] == {
+            "queue_depth": 2,
+            "in_flight": 1,
+            "process_in_flight": 3,
+        }
+        assert report["saturated"] == ["queue_depth"]
+
+
+def test_in_flight_tracks_running_pipelines():
+    with pipeline._tracked():
+        assert pipeline.in_flight() == 1
+    assert pipeline.in_flight() == 0
@@ -0,0 +1,213 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from tiki.models import (
+    ClaudeEnrichment,
+    DCATOutput,
+    ExtractedText,
+    ReenrichmentRun,
+    TikaMetadata,
+    UploadedFile,
+)
+from tiki.services.breaker import CircuitOpenError
+from tiki.services.claude import ClaudeResult
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.reenrich import (
+    Reenricher,
+    ReenrichError,
+    ReenrichFilter,
+    _pages,
+)
+
+
+def _upload(name="a.txt", model="old-model", text="Water quality", **kwargs):
+    kwargs.setdefault("status", UploadedFile.Status.COMPLETED)
+    upload = UploadedFile.objects.create(
+        file=SimpleUploadedFile(name, b"a"),
+        original_filename=name,
+        file_size=1,
+        **kwargs,
+    )
+    TikaMetadata.objects.create(upload=upload, mime_type="text/plain", title=name)
+    if text is not None:
+        ExtractedText.from_text(text, upload=upload).save()
+    if model:
+        ClaudeEnrichment.objects.create(
+            upload=upload, model_used=model, model_requested=model
+        )
+    DCATOutput.objects.create(
+        upload=upload,
+        jsonld={"@graph": [{"dct:title": name, "dct:description": ""}]},
+        empty_fields=["dct:description"],
+    )
+    return upload
+
+
+@pytest.fixture
+def pipeline(settings):
+    settings.ANTHROPIC_API_KEY = "sk-ant-" + "0" * 32
+    settings.CLAUDE_MODEL = "new-model"
+    pipeline = EnrichmentPipeline()
+    pipeline.claude_service = MagicMock()
+    pipeline.claude_service.enrich.return_value = ClaudeResult(
+        generated_description="About water",
+        suggested_keywords=["water"],
+        model_used="new-model",
+        model_requested="new-model",
+    )
+    return pipeline
+
+
+def _run(filters=None):
+    return ReenrichmentRun.objects.create(
+        name="test", filters=(filters or ReenrichFilter()).as_dict()
+    )
+
+
+@pytest.mark.django_db
+class TestReenrichFilter:
+    def test_filters(self, settings):
+        settings.CLAUDE_MODEL = "new-model"
+        old = _upload("old.txt")
+        current = _upload("current.txt", model="new-model")
+        missing = _upload("missing.txt", model=None, needs_enrichment=True)
+        failed = _upload("failed.txt", status=UploadedFile.Status.FAILED)
+        finalized = _upload("final.txt")
+        DCATOutput.objects.filter(upload=finalized).update(is_finalized=True)
+
+        def matching(**kwargs):
+            return set(ReenrichFilter(**kwargs).queryset())
+
+        assert matching() == {old, current, missing}
+        assert matching(models=["old-model"]) == {old}
+        assert matching(outdated=True) == {old, missing}
+        assert matching(needs_enrichment=True) == {missing}
+        assert matching(statuses=["failed"]) == {failed}
+        assert finalized in matching(include_finalized=True)
+        assert matching(since=timezone.now() + timedelta(days=1)) == set()
+        assert matching(until=timezone.now() + timedelta(days=1)) == {
+            old,
+            current,
+            missing,
+        }
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReenricher:
+    def test_reenriches_and_keeps_user_edits(self, pipeline):
+        upload = _upload(needs_enrichment=True)
+        output = upload.dcat_output
+        output.apply_edits([("replace", "/dct:title", "Edited")])
+        output.save()
+
+        report = Reenricher(pipeline, workers=2).run(_run(), ReenrichFilter())
+
+        assert (report.processed, report.skipped, report.failed) == (1, 0, 0)
+        call = pipeline.claude_service.enrich.call_args.kwargs
+        assert call["text"] == "Water quality"
+        assert call["title"] == "a.txt"
+        upload.refresh_from_db()
+        assert not upload.needs_enrichment
+        assert upload.claude_enrichment.model_used == "new-model"
+        output = upload.dcat_output
+        assert output.version == 3
+        dataset = output.get_merged_jsonld()["@graph"][0]
+        assert dataset["dct:title"] == "Edited"
+        assert "About water" in str(output.jsonld)
+        run = ReenrichmentRun.objects.get()
+        assert run.processed == 1
+        assert run.finished_at is not None
+
+    def test_keeps_changes_made_after_the_page_was_loaded(self, pipeline):
+        _upload()
+        (upload,) = next(_pages(ReenrichFilter().queryset(), None, 10))
+        output = DCATOutput.objects.get(upload=upload)
+        output.apply_edits([("replace", "/dct:title", "Edited")])
+        output.is_finalized = True
+        output.save()
+
+        Reenricher(pipeline).reenrich(upload)
+
+        output.refresh_from_db()
+        assert output.version == 3
+        assert output.is_finalized
+        assert output.get_merged_jsonld()["@graph"][0]["dct:title"] == "Edited"
+
+    def test_resumes_from_checkpoint(self, pipeline):
+        uploads = sorted((_upload(f"{i}.txt") for i in range(3)), key=lambda u: u.id)
+        run = _run()
+
+        reenricher = Reenricher(pipeline, workers=1, batch_size=2)
+        reenricher.run(run, ReenrichFilter(), max_batches=1)
+
+        run.refresh_from_db()
+        assert run.last_upload_id == uploads[1].id
+        assert run.finished_at is None
+
+        reenricher.run(run, ReenrichFilter())
+
+        run.refresh_from_db()
+        assert run.processed == 3
+        assert run.last_upload_id == uploads[2].id
+        assert run.finished_at is not None
+        assert pipeline.claude_service.enrich.call_count == 3
+
+    def test_skips_uploads_without_text_and_counts_failures(self, pipeline):
+        _upload("no-text.txt", text=None)
+        _upload("bad.txt")
+        pipeline.claude_service.enrich.side_effect = ValueError("bad response")
+
+        report = Reenricher(pipeline, workers=2).run(_run(), ReenrichFilter())
+
+        assert (report.processed, report.skipped, report.failed) == (0, 1, 1)
+        assert ReenrichmentRun.objects.get().failed == 1
+
+    def test_stops_without_checkpoint_while_claude_is_down(self, pipeline):
+        _upload()
+        pipeline.claude_service.enrich.side_effect = CircuitOpenError("claude")
+        run = _run()
+
+        with pytest.raises(ReenrichError):
+            Reenricher(pipeline).run(run, ReenrichFilter())
+
+        run.refresh_from_db()
+        assert run.last_upload_id is None
+        assert run.finished_at is None
+
+    def test_requires_claude(self, settings):
+        settings.ANTHROPIC_API_KEY = ""
+        with pytest.raises(ReenrichError):
+            Reenricher()
+
+
+@pytest.mark.django_db
+class TestReenrichCommand:
+    def test_dry_run(self, settings):
+        settings.CLAUDE_MODEL = "new-model"
+        _upload("old.txt")
+        _upload("current.txt", model="new-model")
+        out = StringIO()
+
+        call_command("reenrich", "--outdated", "--dry-run", stdout=out)
+
+        assert "1 uploads match" in out.getvalue()
+
+    def test_refuses_other_filters_without_restart(self, settings):
+        settings.ANTHROPIC_API_KEY = "sk-ant-" + "0" * 32
+        ReenrichmentRun.objects.create(
+            name="nightly", filters=ReenrichFilter(outdated=True).as_dict()
+        )
+
+        with pytest.raises(CommandError, match="--restart"):
+            call_command("reenrich", "--run", "nightly", stdout=StringIO())
+
+    def test_requires_claude(self, settings):
+        settings.ANTHROPIC_API_KEY = ""
+        with pytest.raises(CommandError, match="not configured"):
+            call_command("reenrich", stdout=StringIO())
@@ -0,0 +1,123 @@
+import gzip
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from tiki.models import DCATOutput, UploadedFile
+from tiki.services.retention import (
+    RetentionPolicy,
+    apply_retention,
+    compress_file,
+)
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _make_upload(status=UploadedFile.Status.COMPLETED, age_days=0):
+    upload = UploadedFile.objects.create(
+        file=SimpleUploadedFile("test.txt", b"Hello, Tiki! " * 100),
+        original_filename="test.txt",
+        file_size=1300,
+        status=status,
+    )
+    if age_days:
+        UploadedFile.objects.filter(pk=upload.pk).update(
+            updated_at=timezone.now() - timedelta(days=age_days)
+        )
+    return upload
+
+
+def _state(upload):
+    upload.refresh_from_db()
+    return upload.file_state
+
+
+@pytest.mark.django_db
+class TestRetentionPolicy:
+    def test_nothing_due_by_default(self):
+        _make_upload(age_days=1000)
+        policy = RetentionPolicy()
+        assert not policy.deletable().exists()
+        assert not policy.compressible().exists()
+
+    def test_delete_after_skips_unfinished_uploads(self):
+        old = _make_upload(age_days=40)
+        _make_upload(age_days=10)
+        _make_upload(status=UploadedFile.Status.PENDING, age_days=40)
+
+        policy = RetentionPolicy(delete_after=timedelta(days=30))
+        assert list(policy.deletable()) == [old]
+
+    def test_delete_on_finalized(self):
+        upload = _make_upload()
+        _make_upload()
+        DCATOutput.objects.create(upload=upload, is_finalized=True)
+
+        assert list(RetentionPolicy(delete_on="finalized").deletable()) == [upload]
+
+    def test_invalid_delete_on(self):
+        with pytest.raises(ValueError):
+            RetentionPolicy(delete_on="never")
+
+
+@pytest.mark.django_db
+class TestApplyRetention:
+    def test_deletes_files_and_records_state(self):
+        uploads = [_make_upload() for _ in range(3)]
+        kept = _make_upload(status=UploadedFile.Status.FAILED)
+        storage = uploads[0].file.storage
+
+        report = apply_retention(RetentionPolicy(delete_on="completed"), batch_size=2)
+
+        assert report.deleted == 3
+        for upload in uploads:
+            assert not storage.exists(upload.file.name)
+            assert _state(upload) == UploadedFile.FileState.DELETED
+        assert storage.exists(kept.file.name)
+
+    def test_max_batches_bounds_a_run(self):
+        for _ in range(3):
+            _make_upload()
+        policy = RetentionPolicy(delete_on="completed")
+
+        assert apply_retention(policy, batch_size=2, max_batches=1).deleted == 2
+        assert apply_retention(policy, batch_size=2).deleted == 1
+
+    def test_compresses_cold_files(self):
+        cold, recent = _make_upload(age_days=10), _make_upload()
+        original_name = cold.file.name
+
+        report = apply_retention(RetentionPolicy(compress_after=timedelta(days=7)))
+
+        assert report.compressed == 1
+        assert _state(cold) == UploadedFile.FileState.COMPRESSED
+        assert cold.file.name == original_name + ".gz"
+        assert not cold.file.storage.exists(original_name)
+        with cold.file.open("rb") as f:
+            assert gzip.decompress(f.read()) == b"Hello, Tiki! " * 100
+        assert _state(recent) == UploadedFile.FileState.PRESENT
+
+    def test_compression_keeps_age(self):
+        upload = _make_upload(age_days=10)
+        updated_at = UploadedFile.objects.get(pk=upload.pk).updated_at
+
+        compress_file(upload)
+
+        upload.refresh_from_db()
+        assert upload.updated_at == updated_at
+
+    def test_command(self, settings):
+        settings.TIKI_RETENTION_DELETE_ON = "completed"
+        upload = _make_upload()
+
+        call_command("apply_retention", "--dry-run")
+        assert _state(upload) == UploadedFile.FileState.PRESENT
+
+        call_command("apply_retention")
+        assert _state(upload) == UploadedFile.FileState.DELETED
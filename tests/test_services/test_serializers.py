@@ -0,0 +1,168 @@
+import json
+from datetime import datetime, timezone
+from xml.etree import ElementTree
+
+import pytest
+from django.test import RequestFactory
+
+from tiki.models import DCATOutput
+from tiki.services.claude import ClaudeResult
+from tiki.services.dcat_builder import DCATBuilder
+from tiki.services.serializers import (
+    IRI,
+    BNode,
+    FormatError,
+    Literal,
+    dumps,
+    dumps_with,
+    negotiate,
+    render,
+    serialize,
+    triples,
+)
+from tiki.services.tika import TikaResult
+
+DCT = "http://purl.org/dc/terms/"
+DCAT = "http://www.w3.org/ns/dcat#"
+
+
+@pytest.fixture
+def jsonld():
+    return DCATBuilder().build(
+        tika_result=TikaResult(
+            mime_type="text/plain",
+            title='A "quoted" title',
+            author="Ann",
+            created_date=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        ),
+        claude_result=ClaudeResult(
+            generated_description="Line one\nLine two",
+            suggested_keywords=["water", "quality"],
+        ),
+        filename="report.txt",
+        file_size=12,
+    ).jsonld
+
+
+def test_dumps_with_embeds_encoded_values():
+    body = dumps_with({"id": "1"}, jsonld=dumps({"a": [1, "é"]}))
+    assert json.loads(body) == {"id": "1", "jsonld": {"a": [1, "é"]}}
+    assert json.loads(dumps_with({}, jsonld=b"{}")) == {"jsonld": {}}
+
+
+class TestTriples:
+    def test_dataset(self, jsonld):
+        found = set(triples(jsonld))
+        dataset = BNode("b0")
+
+        assert (dataset, IRI(DCT + "title"), Literal('A "quoted" title')) in found
+        assert (dataset, IRI(DCAT + "keyword"), Literal("water")) in found
+        assert (
+            dataset,
+            IRI(DCT + "issued"),
+            Literal(
+                "2024-01-02T00:00:00+00:00",
+                "http://www.w3.org/2001/XMLSchema#dateTime",
+            ),
+        ) in found
+
+    def test_skips_empty_placeholders(self, jsonld):
+        predicates = {p for _, p, _ in triples(jsonld)}
+        assert IRI(DCT + "license") not in predicates
+        assert IRI(DCT + "publisher") not in predicates
+
+    def test_nested_nodes(self, jsonld):
+        found = list(triples(jsonld))
+        creator = next(o for _, p, o in found if p == DCT + "creator")
+        assert isinstance(creator, BNode)
+        assert (creator, IRI("http://xmlns.com/foaf/0.1/name"), Literal("Ann")) in found
+
+
+class TestSerialize:
+    def _render(self, jsonld, fmt):
+        return b"".join(serialize([("doc-1", jsonld)], fmt)).decode()
+
+    def test_jsonld(self, jsonld):
+        assert json.loads(self._render(jsonld, "jsonld")) == jsonld
+
+    def test_jsonld_many(self, jsonld):
+        documents = [("a", jsonld), ("b", jsonld)]
+        assert json.loads(b"".join(serialize(documents, "jsonld"))) == [
+            jsonld,
+            jsonld,
+        ]
+
+    def test_ntriples(self, jsonld):
+        lines = self._render(jsonld, "ntriples").splitlines()
+        assert len(lines) == len(list(triples(jsonld)))
+        assert (
+            f'_:udoc1_b0 <{DCT}description> "Line one\\nLine two" .' in lines
+        )
+
+    def test_turtle(self, jsonld):
+        turtle = self._render(jsonld, "turtle")
+        assert "@prefix dct: <http://purl.org/dc/terms/> ." in turtle
+        assert "a dcat:Dataset" in turtle
+        assert 'dct:title "A \\"quoted\\" title"' in turtle
+        assert 'dcat:keyword "water", "quality"' in turtle
+        assert '"12"^^xsd:integer' in turtle
+
+    def test_rdfxml(self, jsonld):
+        root = ElementTree.fromstring(self._render(jsonld, "rdfxml").encode())
+        titles = [element.text for element in root.iter(f"{{{DCT}}}title")]
+        assert titles == ['A "quoted" title', "report.txt"]
+        description = root.find(f".//{{{DCT}}}description")
+        assert description.text == "Line one\nLine two"
+
+
+@pytest.mark.django_db
+class TestRender:
+    def test_cached_per_version(self, uploaded_file):
+        dcat_output = DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Old"}]}
+        )
+        assert b"Old" in render(dcat_output)
+
+        # Changed without a version bump: still served from the cache
+        dcat_output.jsonld = {"@graph": [{"dct:title": "New"}]}
+        assert b"Old" in render(dcat_output)
+
+        dcat_output.version += 1
+        assert b"New" in render(dcat_output)
+
+
+class TestNegotiate:
+    @pytest.mark.parametrize(
+        ("accept", "expected"),
+        [
+            ("", None),
+            ("*/*", None),
+            ("application/json", None),
+            ("text/turtle", "turtle"),
+            ("application/rdf+xml;q=0.9, text/turtle;q=0.5", "rdfxml"),
+            ("application/n-triples", "ntriples"),
+            ("application/ld+json", "jsonld"),
+            ("text/html, */*;q=0.8", None),
+        ],
+    )
+    def test_accept_header(self, accept, expected):
+        request = RequestFactory().get("/", HTTP_ACCEPT=accept)
+        assert negotiate(request) == expected
+
+    def test_format_parameter(self):
+        request = RequestFactory().get("/", {"format": "ttl"})
+        assert negotiate(request) == "turtle"
+        request = RequestFactory().get("/", {"format": "json"})
+        assert negotiate(request) is None
+
+    def test_unknown_format_parameter(self):
+        request = RequestFactory().get("/", {"format": "xls"})
+        with pytest.raises(FormatError) as error:
+            negotiate(request)
+        assert error.value.status == 400
+
+    def test_unsatisfiable_accept_header(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT="text/html")
+        with pytest.raises(FormatError) as error:
+            negotiate(request)
+        assert error.value.status == 406
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from tiki.services.stages import Stage, StagedPipeline
+
+
+class TestStagedPipeline:
+    def test_runs_items_through_stages(self):
+        results = []
+        pipeline = StagedPipeline([
+            Stage("double", lambda n: n * 2, concurrency=2),
+            Stage("add", lambda n: n + 1, concurrency=3),
+            Stage("collect", results.append),
+        ])
+
+        pipeline.run(range(10))
+
+        assert sorted(results) == [n * 2 + 1 for n in range(10)]
+        stats = {stage["stage"]: stage for stage in pipeline.stats()}
+        assert stats["double"]["processed"] == 10
+        assert stats["collect"]["processed"] == 10
+        assert stats["add"]["queue_depth"] == 0
+
+    def test_none_stops_an_item(self):
+        results = []
+        pipeline = StagedPipeline([
+            Stage("odd", lambda n: n if n % 2 else None),
+            Stage("collect", results.append),
+        ])
+
+        pipeline.run(range(6))
+
+        assert sorted(results) == [1, 3, 5]
+
+    def test_errors_are_reported_and_dropped(self):
+        failures = []
+        results = []
+
+        def explode(n):
+            if n == 3:
+                raise ValueError("bad item")
+            return n
+
+        pipeline = StagedPipeline(
+            [Stage("explode", explode), Stage("collect", results.append)],
+            on_error=lambda item, error: failures.append((item, str(error))),
+        )
+
+        pipeline.run(range(5))
+
+        assert failures == [(3, "bad item")]
+        assert sorted(results) == [0, 1, 2, 4]
+        assert pipeline.stats()[0]["failed"] == 1
+
+    def test_stages_overlap(self):
+        # A slow stage with two threads halves the wall time of four items
+        pipeline = StagedPipeline([
+            Stage("slow", lambda n: time.sleep(0.1) or n, concurrency=4),
+            Stage("fast", lambda n: n),
+        ])
+
+        started = time.monotonic()
+        pipeline.run(range(4))
+
+        assert time.monotonic() - started < 0.3
+
+    def test_backpressure(self):
+        release = threading.Event()
+        pipeline = StagedPipeline([
+            Stage("blocked", lambda n: release.wait() and n, queue_size=1),
+        ])
+        pipeline.start()
+        pipeline.put(1)  # taken by the worker thread
+        pipeline.put(2)  # fills the queue
+
+        with pytest.raises(queue.Full):
+            pipeline.put(3, timeout=0.05)
+
+        release.set()
+        pipeline.close()
+        assert pipeline.stats()[0]["processed"] == 2
+
+    def test_wait_for_room(self):
+        release = threading.Event()
+        pipeline = StagedPipeline([
+            Stage("blocked", lambda n: release.wait() and n, queue_size=1),
+        ])
+        pipeline.start()
+        pipeline.put(1)  # taken by the worker thread
+        assert pipeline.wait_for_room(timeout=1)
+        pipeline.put(2)  # fills the queue
+
+        assert not pipeline.wait_for_room(timeout=0.05)
+
+        release.set()
+        assert pipeline.wait_for_room(timeout=1)
+        pipeline.close()
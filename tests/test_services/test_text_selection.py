@@ -0,0 +1,67 @@
+from tiki.services.text_selection import select_text
+
+TOPICS = ["energy", "hospital", "railway", "farming", "courts"]
+
+
+def _report(paragraphs=40):
+    lines = [
+        "NATIONAL REPORT 2024",
+        "Contents",
+        "1 Introduction .......... 3",
+        "2 Energy ............... 9",
+        "",
+    ]
+    for number, topic in enumerate(TOPICS, start=1):
+        lines.append(f"{number}. {topic.title()} Policy")
+        for paragraph in range(paragraphs):
+            lines.append(
+                f"The {topic} programme covers {topic} funding in year {paragraph}. "
+                f"Public service data about {topic} was collected and reported."
+            )
+            lines.append("")
+    return "\n".join(lines)
+
+
+class TestSelectText:
+    def test_short_text_unchanged(self):
+        assert select_text("A short document.", 4000) == "A short document."
+
+    def test_respects_budget(self):
+        text = _report()
+        assert len(text) > 4000
+
+        selected = select_text(text, 4000)
+
+        assert len(selected) <= 4000
+
+    def test_samples_every_section(self):
+        selected = select_text(_report(), 2000)
+
+        for number, topic in enumerate(TOPICS, start=1):
+            assert f"{number}. {topic.title()} Policy" in selected
+            assert f"{topic} funding" in selected
+
+    def test_skips_table_of_contents(self):
+        selected = select_text(_report(), 2000)
+
+        assert "......" not in selected
+
+    def test_unstructured_text_is_sampled_throughout(self):
+        text = " ".join(
+            f"Sentence number {i} talks about topic{i // 100}." for i in range(1000)
+        )
+
+        selected = select_text(text, 1500)
+
+        assert len(selected) <= 1500
+        assert "topic0" in selected
+        assert "topic9" in selected
+
+    def test_skips_repeated_sentences(self):
+        selected = select_text(_report(), 2000)
+
+        sentence = "Public service data about energy was collected and reported."
+        assert selected.count(sentence) == 1
+
+    def test_text_without_sentences(self):
+        assert select_text("x" * 5000, 100) == "x" * 100
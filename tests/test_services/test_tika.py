@@ -1,6 +1,26 @@
+import asyncio
+import io
+import json
+import threading
+import time
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-from tiki.services.tika import _first_match, _parse_date
+import pytest
+
+from tiki.services.breaker import Breaker
+from tiki.services.tika import (
+    AsyncTikaClient,
+    TikaClient,
+    TikaError,
+    TikaService,
+    _first_match,
+    _parse_date,
+    result_from_rmeta,
+)
+
+# Breakers have their own tests (test_breaker.py)
+NO_BREAKER = Breaker("tika", failure_threshold=0)
 
 
 class TestTikaHelpers:
@@ -12,6 +32,9 @@ class TestTikaHelpers:
         metadata = {"dc:creator": "Alice"}
         assert _first_match(metadata, ["Author", "dc:creator"]) == "Alice"
 
+    def test_first_match_list_value(self):
+        assert _first_match({"dc:creator": ["Alice", "Bob"]}, ["dc:creator"]) == "Alice"
+
     def test_first_match_not_found(self):
         assert _first_match({}, ["Author", "dc:creator"]) == ""
 
@@ -29,3 +52,186 @@ class TestTikaHelpers:
 
     def test_parse_date_invalid(self):
         assert _parse_date("not-a-date") is None
+
+    def test_result_includes_embedded_documents_text(self):
+        result = result_from_rmeta([
+            {
+                "Content-Type": "application/zip",
+                "dc:title": "Archive",
+                "X-TIKA:content": "\nContainer text\n",
+            },
+            {
+                "Content-Type": "text/plain",
+                "dc:title": "Member",
+                "X-TIKA:content": "Member text\n",
+            },
+        ])
+
+        assert result.mime_type == "application/zip"
+        assert result.title == "Archive"
+        assert result.full_text == "Container text\nMember text"
+        assert "X-TIKA:content" not in result.raw_metadata
+
+
+class _FakeTikaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server.bodies.append(body)
+        time.sleep(server.delay)
+        if server.failures > 0:
+            server.failures -= 1
+            self._respond(server.failure_status, b"busy")
+            return
+        payload = json.dumps([{
+            "Content-Type": "application/pdf",
+            "dc:title": ["Annual Report", "Ignored"],
+            "dc:creator": "Jane Doe",
+            "dcterms:created": "2024-01-15T10:30:00Z",
+            "X-TIKA:content": "\n  Report body  \n",
+        }]).encode()
+        self._respond(200, payload)
+
+    def do_GET(self):
+        self._respond(200, b"Apache Tika 3.0.0\n")
+
+    def _respond(self, status, payload):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def tika_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeTikaHandler)
+    server.connections = set()
+    server.bodies = []
+    server.failures = 0
+    server.failure_status = 503
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tika_client(tika_server, settings):
+    host, port = tika_server.server_address
+    return TikaClient(f"http://{host}:{port}", retries=2, backoff=0)
+
+
+class TestTikaClient:
+    def test_extract(self, tika_client, tika_server, tmp_path):
+        path = tmp_path / "report.pdf"
+        path.write_bytes(b"%PDF-1.4 fake")
+
+        result = TikaService(client=tika_client, breaker=NO_BREAKER).extract(str(path))
+
+        assert tika_server.bodies == [b"%PDF-1.4 fake"]
+        assert result.mime_type == "application/pdf"
+        assert result.title == "Annual Report"
+        assert result.author == "Jane Doe"
+        assert result.created_date.year == 2024
+        assert result.full_text == "Report body"
+        assert "X-TIKA:content" not in result.raw_metadata
+
+    def test_reuses_connection(self, tika_client, tika_server):
+        for _ in range(3):
+            tika_client.rmeta(io.BytesIO(b"data"))
+        assert len(tika_server.connections) == 1
+
+    def test_retries_with_rewound_body(self, tika_client, tika_server, tmp_path):
+        tika_server.failures = 1
+        path = tmp_path / "report.pdf"
+        path.write_bytes(b"payload")
+
+        with open(path, "rb") as f:
+            documents = tika_client.rmeta(f)
+
+        assert documents[0]["Content-Type"] == "application/pdf"
+        assert tika_server.bodies == [b"payload", b"payload"]
+
+    def test_error_status(self, tika_client, tika_server):
+        tika_server.failures = 10
+        with pytest.raises(TikaError):
+            tika_client.rmeta(io.BytesIO(b"data"))
+
+    def test_does_not_retry_gateway_timeout(self, tika_client, tika_server):
+        tika_server.failures = 1
+        tika_server.failure_status = 504
+
+        with pytest.raises(TikaError):
+            tika_client.rmeta(io.BytesIO(b"data"))
+
+        assert len(tika_server.bodies) == 1
+
+    def test_does_not_retry_read_timeout(self, tika_server):
+        host, port = tika_server.server_address
+        client = TikaClient(
+            f"http://{host}:{port}", read_timeout=0.1, retries=2, backoff=0
+        )
+        tika_server.delay = 0.5
+
+        with pytest.raises(TikaError):
+            client.rmeta(io.BytesIO(b"data"))
+
+        assert len(tika_server.bodies) == 1
+
+    def test_version(self, tika_client):
+        assert tika_client.version() == "Apache Tika 3.0.0"
+
+
+@pytest.fixture
+def async_tika_client(tika_server, settings):
+    host, port = tika_server.server_address
+    return AsyncTikaClient(f"http://{host}:{port}", retries=2, backoff=0)
+
+
+class TestAsyncTikaClient:
+    def test_aextract(self, async_tika_client, tika_server, tmp_path):
+        path = tmp_path / "report.pdf"
+        path.write_bytes(b"%PDF-1.4 fake")
+        service = TikaService(async_client=async_tika_client, breaker=NO_BREAKER)
+
+        result = asyncio.run(service.aextract(str(path)))
+
+        assert tika_server.bodies == [b"%PDF-1.4 fake"]
+        assert result.title == "Annual Report"
+        assert result.full_text == "Report body"
+
+    def test_concurrent_requests_share_pool(self, async_tika_client, tika_server):
+        async def run():
+            await asyncio.gather(
+                *(async_tika_client.rmeta(b"data") for _ in range(20))
+            )
+            await async_tika_client.aclose()
+
+        asyncio.run(run())
+
+        assert len(tika_server.bodies) == 20
+        assert len(tika_server.connections) <= 10
+
+    def test_retries_in_memory_body(self, async_tika_client, tika_server):
+        tika_server.failures = 1
+
+        documents = asyncio.run(async_tika_client.rmeta(b"payload"))
+
+        assert documents[0]["Content-Type"] == "application/pdf"
+        assert tika_server.bodies == [b"payload", b"payload"]
+
+    def test_error_status(self, async_tika_client, tika_server):
+        tika_server.failures = 10
+        with pytest.raises(TikaError):
+            asyncio.run(async_tika_client.rmeta(b"data"))
+
+    def test_version(self, async_tika_client):
+        assert asyncio.run(async_tika_client.version()) == "Apache Tika 3.0.0"
@@ -0,0 +1,206 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.http import UnreadablePostError
+from django.test import Client, RequestFactory
+
+from tiki.models import UploadedFile
+from tiki.uploadhandler import StreamingStorageUploadHandler
+from tiki.views import api
+
+
+class FakeTikaClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.received = b""
+
+    def rmeta(self, body, filename=""):
+        for chunk in body:
+            self.received += chunk
+            if self.fail:
+                raise ConnectionError("Tika down")
+        text = self.received.decode()
+        return [{"Content-Type": "text/plain", "X-TIKA:content": text}]
+
+
+def _stream(handler, chunks):
+    with pytest.raises(StopFutureHandlers):
+        handler.new_file("file", "notes.txt", "text/plain", None)
+    start = 0
+    for chunk in chunks:
+        handler.receive_data_chunk(chunk, start)
+        start += len(chunk)
+    return handler.file_complete(start)
+
+
+class TestStreamingStorageUploadHandler:
+    def test_stores_file_with_hash(self):
+        stored = _stream(StreamingStorageUploadHandler(), [b"Hello, ", b"Tiki!"])
+
+        assert stored.name == "notes.txt"
+        assert stored.storage_name.startswith("uploads/")
+        assert stored.size == 12
+        assert stored.content_hash == hashlib.sha256(b"Hello, Tiki!").hexdigest()
+        assert stored.read() == b"Hello, Tiki!"
+        stored.delete()
+
+    def test_tees_chunks_to_tika(self, monkeypatch):
+        fake = FakeTikaClient()
+        monkeypatch.setattr("tiki.uploadhandler.get_client", lambda: fake)
+
+        stored = _stream(StreamingStorageUploadHandler(tee_tika=True), [b"ab", b"cd"])
+
+        result = stored.tika_future.result(timeout=5)
+        assert result.full_text == "abcd"
+        assert result.mime_type == "text/plain"
+        stored.delete()
+
+    def test_tee_failure_does_not_block_upload(self, monkeypatch):
+        monkeypatch.setattr(
+            "tiki.uploadhandler.get_client", lambda: FakeTikaClient(fail=True)
+        )
+
+        chunks = [b"x" * 1024] * 200
+        stored = _stream(StreamingStorageUploadHandler(tee_tika=True), chunks)
+
+        with pytest.raises(ConnectionError):
+            stored.tika_future.result(timeout=5)
+        assert stored.size == 200 * 1024
+        stored.delete()
+
+    def test_interrupted_upload_is_removed(self):
+        handler = StreamingStorageUploadHandler()
+        with pytest.raises(StopFutureHandlers):
+            handler.new_file("file", "partial.txt", "text/plain", None)
+        handler.receive_data_chunk(b"part", 0)
+
+        handler.upload_interrupted()
+
+        assert not handler.storage.exists(handler.storage_name)
+
+    def test_discard_removes_file_cut_off_mid_body(self, monkeypatch):
+        fake = FakeTikaClient()
+        monkeypatch.setattr("tiki.uploadhandler.get_client", lambda: fake)
+        handler = StreamingStorageUploadHandler(tee_tika=True)
+        with pytest.raises(StopFutureHandlers):
+            handler.new_file("file", "partial.txt", "text/plain", None)
+        handler.receive_data_chunk(b"part", 0)
+
+        handler.discard_unattached()
+
+        assert not handler.storage.exists(handler.storage_name)
+        # The Tika stream is ended rather than left waiting for more chunks
+        handler._tee_future.result(timeout=5)
+        assert fake.received == b"part"
+
+    def test_ignores_unexpected_fields(self):
+        handler = StreamingStorageUploadHandler(fields={"file"})
+        with pytest.raises(StopFutureHandlers):
+            handler.new_file("other", "extra.txt", "text/plain", None)
+        assert handler.receive_data_chunk(b"extra", 0) is None
+
+        assert handler.file_complete(5) is None
+        assert handler.stored == []
+
+    def test_discards_unattached_files(self):
+        handler = StreamingStorageUploadHandler()
+        kept = _stream(handler, [b"kept"])
+        dropped = _stream(handler, [b"dropped"])
+        kept.attached = True
+
+        handler.discard_unattached()
+
+        assert handler.storage.exists(kept.storage_name)
+        assert not handler.storage.exists(dropped.storage_name)
+        kept.delete()
+
+
+@pytest.mark.django_db
+def test_enrich_stores_streamed_upload(settings):
+    settings.TIKI_ASYNC_ENRICH = True
+    response = Client().post(
+        "/api/enrich/", {"file": SimpleUploadedFile("doc.txt", b"Some content")}
+    )
+
+    upload = UploadedFile.objects.get(id=response.json()["id"])
+    assert upload.file.name.startswith("uploads/")
+    assert upload.content_hash == hashlib.sha256(b"Some content").hexdigest()
+    with upload.file.open("rb") as f:
+        assert f.read() == b"Some content"
+
+
+def _media_files():
+    root = Path(UploadedFile._meta.get_field("file").storage.path(""))
+    return {str(p.relative_to(root)) for p in root.rglob("*") if p.is_file()}
+
+
+@pytest.mark.django_db
+def test_enrich_stores_only_the_file_field(settings):
+    settings.TIKI_ASYNC_ENRICH = True
+    before = _media_files()
+
+    response = Client().post(
+        "/api/enrich/",
+        {
+            "file": SimpleUploadedFile("doc.txt", b"Some content"),
+            "extra": SimpleUploadedFile("extra.txt", b"Not wanted"),
+        },
+    )
+
+    upload = UploadedFile.objects.get(id=response.json()["id"])
+    assert _media_files() - before == {upload.file.name}
+
+
+@pytest.mark.django_db
+def test_rejected_batch_leaves_no_files(settings):
+    settings.TIKI_BATCH_MAX_FILES = 1
+    before = _media_files()
+
+    response = Client().post(
+        "/api/batch/",
+        {
+            "files": [
+                SimpleUploadedFile("a.txt", b"a"),
+                SimpleUploadedFile("b.txt", b"b"),
+            ]
+        },
+    )
+
+    assert response.status_code == 400
+    assert _media_files() == before
+
+
+class _CutOffStream:
+    """A request body whose client disconnects after ``limit`` bytes."""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            raise UnreadablePostError("client disconnected")
+        data = self.stream.read(
+            min(size, self.remaining) if size > 0 else self.remaining
+        )
+        self.remaining -= len(data)
+        return data
+
+
+@pytest.mark.django_db
+def test_enrich_removes_body_cut_off_mid_stream(settings):
+    settings.TIKI_ASYNC_ENRICH = True
+    request = RequestFactory().post(
+        "/api/enrich/", {"file": SimpleUploadedFile("doc.txt", b"x" * 200_000)}
+    )
+    request._stream = _CutOffStream(request._stream, 100_000)
+    before = _media_files()
+
+    with pytest.raises(UnreadablePostError):
+        api.enrich(request)
+
+    assert _media_files() == before
+    assert not UploadedFile.objects.exists()
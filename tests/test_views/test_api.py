@@ -1,9 +1,15 @@
 import json
+from unittest.mock import AsyncMock
 
 import pytest
-from django.test import Client
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, RequestFactory
 
-from tiki.models import DCATOutput, UploadedFile
+from tiki.models import DCATOutput, ExtractedText, UploadedFile
+from tiki.services.pipeline import EnrichmentPipeline
+from tiki.services.tika import TikaResult
+from tiki.views import api
 
 
 @pytest.mark.django_db
@@ -15,6 +21,36 @@ class TestHealthView:
         assert response.json() == {"status": "ok"}
 
 
+class TestReadyView:
+    def test_ready(self, monkeypatch):
+        monkeypatch.setattr(
+            api.readiness, "readiness", lambda: (True, {"status": "ready"})
+        )
+        response = Client().get("/ready/")
+        assert response.status_code == 200
+        assert "no-store" in response["Cache-Control"]
+
+    def test_unavailable(self, monkeypatch):
+        monkeypatch.setattr(
+            api.readiness, "readiness", lambda: (False, {"status": "unavailable"})
+        )
+        response = Client().get("/ready/")
+        assert response.status_code == 503
+        assert response.json() == {"status": "unavailable"}
+
+
+class TestMetricsView:
+    def test_metrics(self):
+        pytest.importorskip("prometheus_client")
+        response = Client().get("/metrics/")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+
+    def test_without_prometheus_client(self, monkeypatch):
+        monkeypatch.setattr(api.pipeline_metrics, "prometheus_client", None)
+        assert Client().get("/metrics/").status_code == 503
+
+
 @pytest.mark.django_db
 class TestEnrichView:
     def test_no_file(self):
@@ -23,6 +59,81 @@ class TestEnrichView:
         assert response.status_code == 400
         assert response.json()["error"] == "No file provided"
 
+    def test_async_mode_queues_upload(self, settings):
+        settings.TIKI_ASYNC_ENRICH = True
+        client = Client()
+        response = client.post(
+            "/api/enrich/",
+            {"file": SimpleUploadedFile("doc.txt", b"Some content")},
+        )
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "pending"
+        assert data["result_url"] == f"/api/result/{data['id']}/"
+        # Under WSGI streams would hold worker threads, so clients poll
+        assert "events_url" not in data
+        upload = UploadedFile.objects.get(id=data["id"])
+        assert upload.status == UploadedFile.Status.PENDING
+
+    def test_async_mode_offers_events_under_asgi(self, settings):
+        settings.TIKI_ASYNC_ENRICH = True
+        settings.TIKI_ASYNC_VIEWS = True
+        response = Client().post(
+            "/api/enrich/",
+            {"file": SimpleUploadedFile("doc.txt", b"Some content")},
+        )
+        data = response.json()
+        assert data["events_url"] == f"/api/result/{data['id']}/events/"
+
+    def test_async_request_runs_in_background(self, settings, monkeypatch):
+        submitted = []
+        monkeypatch.setattr(
+            "tiki.views.api.submit_upload",
+            lambda upload, tika_future=None: submitted.append(upload.id),
+        )
+        client = Client()
+        response = client.post(
+            "/api/enrich/",
+            {"file": SimpleUploadedFile("doc.txt", b"Some content"), "async": "1"},
+        )
+        assert response.status_code == 202
+        assert submitted == [UploadedFile.objects.get().id]
+
+
+@pytest.mark.django_db
+class TestBatchViews:
+    def test_no_files(self):
+        client = Client()
+        response = client.post("/api/batch/")
+        assert response.status_code == 400
+
+    def test_batch_queued(self, settings):
+        settings.TIKI_ASYNC_ENRICH = True
+        client = Client()
+        response = client.post(
+            "/api/batch/",
+            {
+                "files": [
+                    SimpleUploadedFile("a.txt", b"first"),
+                    SimpleUploadedFile("b.txt", b"second"),
+                ]
+            },
+        )
+        assert response.status_code == 202
+        data = response.json()
+        assert data["total"] == 2
+
+        response = client.get(data["status_url"])
+        assert response.status_code == 200
+        status = response.json()
+        assert status["counts"] == {"pending": 2}
+        assert len(status["files"]) == 2
+
+    def test_batch_not_found(self):
+        client = Client()
+        response = client.get("/api/batch/00000000-0000-0000-0000-000000000000/")
+        assert response.status_code == 404
+
 
 @pytest.mark.django_db
 class TestResultView:
@@ -46,6 +157,17 @@ class TestResultView:
         assert data["status"] == "completed"
         assert "jsonld" in data
 
+    def test_result_single_query(self, uploaded_file, django_assert_num_queries):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Test"}]}
+        )
+
+        client = Client()
+        with django_assert_num_queries(1):
+            response = client.get(f"/api/result/{uploaded_file.id}/")
+        assert response.json()["jsonld"]["@graph"] == [{"dct:title": "Test"}]
+
     def test_result_failed(self, uploaded_file):
         uploaded_file.mark_failed("Something broke")
 
@@ -55,6 +177,239 @@ class TestResultView:
         assert data["status"] == "failed"
         assert data["error"] == "Something broke"
 
+    def test_result_negotiates_rdf_formats(self, uploaded_file):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={
+                "@context": {"dct": "http://purl.org/dc/terms/"},
+                "@graph": [{"dct:title": "Test"}],
+            },
+        )
+        client = Client()
+        url = f"/api/result/{uploaded_file.id}/"
+
+        response = client.get(url, HTTP_ACCEPT="text/turtle")
+        assert response["Content-Type"] == "text/turtle; charset=utf-8"
+        assert 'dct:title "Test"' in response.content.decode()
+        assert "Accept" in response["Vary"]
+
+        response = client.get(url, {"format": "nt"})
+        assert response["Content-Type"].startswith("application/n-triples")
+        assert b'<http://purl.org/dc/terms/title> "Test" .' in response.content
+
+        response = client.get(url, HTTP_ACCEPT="application/ld+json")
+        assert response.json()["@graph"] == [{"dct:title": "Test"}]
+
+        assert client.get(url, {"format": "xls"}).status_code == 400
+        assert client.get(url, HTTP_ACCEPT="image/png").status_code == 406
+
+    def test_result_cache_follows_edits(self, uploaded_file):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dct:title": "Test", "dct:license": ""}]},
+            empty_fields=["dct:license"],
+        )
+        client = Client()
+        url = f"/api/result/{uploaded_file.id}/"
+        assert client.get(url).json()["jsonld"]["@graph"][0]["dct:license"] == ""
+
+        client.post(
+            f"/api/result/{uploaded_file.id}/edit/",
+            data=json.dumps({"field": "dct:license", "value": "CC-BY"}),
+            content_type="application/json",
+        )
+
+        data = client.get(url).json()
+        assert data["jsonld"]["@graph"][0]["dct:license"] == "CC-BY"
+        assert data["empty_fields"] == []
+
+
+    def test_result_etag(self, uploaded_file):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Test"}]}
+        )
+        client = Client()
+        url = f"/api/result/{uploaded_file.id}/"
+
+        etag = client.get(url)["ETag"]
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+        edited = client.post(
+            f"/api/result/{uploaded_file.id}/edit/",
+            data=json.dumps({"field": "dct:license", "value": "CC-BY"}),
+            content_type="application/json",
+        )
+        assert edited["ETag"] != etag
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+        assert client.get(url, HTTP_IF_NONE_MATCH=edited["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db
+class TestExportView:
+    def _finalize(self, upload, title):
+        upload.mark_completed()
+        DCATOutput.objects.create(
+            upload=upload,
+            jsonld={
+                "@context": {"dct": "http://purl.org/dc/terms/"},
+                "@graph": [{"dct:title": title}],
+            },
+            is_finalized=True,
+        )
+
+    def test_streams_finalized_records(self, uploaded_file):
+        self._finalize(uploaded_file, "Exported")
+
+        response = Client().get("/api/export/")
+
+        assert response.streaming
+        assert response["Content-Type"].startswith("application/ld+json")
+        body = json.loads(b"".join(response.streaming_content))
+        assert body["@graph"] == [{"dct:title": "Exported"}]
+
+    def test_pages_with_link_header(self, uploaded_file):
+        self._finalize(uploaded_file, "First")
+        second = UploadedFile.objects.create(
+            file=SimpleUploadedFile("b.txt", b"b"),
+            original_filename="b.txt",
+            file_size=1,
+        )
+        self._finalize(second, "Second")
+        client = Client()
+
+        response = client.get("/api/export/", {"format": "ndjson", "limit": 1})
+        lines = b"".join(response.streaming_content).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [str(uploaded_file.id)]
+        next_url = response["Link"].split(">")[0][1:]
+
+        response = client.get(next_url)
+        lines = b"".join(response.streaming_content).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [str(second.id)]
+        assert "Link" not in response
+
+    def test_invalid_parameters(self):
+        client = Client()
+        assert client.get("/api/export/", {"format": "xls"}).status_code == 400
+        assert client.get("/api/export/", {"updated_since": "x"}).status_code == 400
+        assert client.get("/api/export/", {"cursor": "x"}).status_code == 400
+
+    def test_aexport(self, uploaded_file):
+        self._finalize(uploaded_file, "Async")
+        request = RequestFactory().get(
+            "/api/export/", HTTP_ACCEPT="application/n-triples"
+        )
+
+        async def read():
+            response = await api.aexport(request)
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        body = async_to_sync(read)()
+        assert b'<http://purl.org/dc/terms/title> "Async" .' in body
+
+
+def _parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith(":"):
+            continue
+        event, data = text.strip().split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+@pytest.mark.django_db
+class TestEventsView:
+    def test_not_found(self):
+        client = Client()
+        response = client.get(
+            "/api/result/00000000-0000-0000-0000-000000000000/events/"
+        )
+        assert response.status_code == 404
+
+    def test_completed_upload(self, uploaded_file):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Test"}]}
+        )
+
+        client = Client()
+        response = client.get(f"/api/result/{uploaded_file.id}/events/")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        events = _parse_events(response.streaming_content)
+        assert [event for event, _ in events] == ["status", "result"]
+        assert events[1][1]["jsonld"] == {"@graph": [{"dct:title": "Test"}]}
+        assert api._sync_streams == 0
+
+    def test_caps_sync_streams(self, uploaded_file, settings):
+        settings.TIKI_EVENTS_MAX_SYNC_STREAMS = 1
+        client = Client()
+        first = client.get(f"/api/result/{uploaded_file.id}/events/")
+
+        second = client.get(f"/api/result/{uploaded_file.id}/events/")
+        assert second.status_code == 503
+        assert second["Retry-After"]
+
+        first.close()
+        third = client.get(f"/api/result/{uploaded_file.id}/events/")
+        assert third.status_code == 200
+        third.close()
+
+    def test_streams_transitions(
+        self, uploaded_file, django_capture_on_commit_callbacks
+    ):
+        uploaded_file.mark_extracting()
+        client = Client()
+        response = client.get(f"/api/result/{uploaded_file.id}/events/")
+        stream = iter(response.streaming_content)
+        assert _parse_events([next(stream)]) == [
+            ("status", {"id": str(uploaded_file.id), "status": "extracting"})
+        ]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            uploaded_file.mark_enriching()
+            uploaded_file.mark_failed("Tika is down")
+
+        events = _parse_events(stream)
+        assert [data["status"] for _, data in events] == [
+            "enriching",
+            "failed",
+            "failed",
+        ]
+        assert events[-1] == (
+            "result",
+            {
+                "id": str(uploaded_file.id),
+                "status": "failed",
+                "original_filename": "test.txt",
+                "error": "Tika is down",
+            },
+        )
+
+
+@pytest.mark.django_db
+class TestFullTextView:
+    def test_streams_text(self, uploaded_file):
+        ExtractedText.from_text("Full document text", upload=uploaded_file).save()
+
+        client = Client()
+        response = client.get(f"/api/result/{uploaded_file.id}/text/")
+        assert response.status_code == 200
+        assert response.streaming
+        assert b"".join(response.streaming_content) == b"Full document text"
+        assert "attachment" in response["Content-Disposition"]
+
+    def test_not_found(self, uploaded_file):
+        client = Client()
+        response = client.get(f"/api/result/{uploaded_file.id}/text/")
+        assert response.status_code == 404
+
 
 @pytest.mark.django_db
 class TestEditFieldView:
@@ -77,6 +432,65 @@ class TestEditFieldView:
         data = response.json()
         assert "dct:license" not in data["empty_fields"]
 
+    def test_json_patch(self, uploaded_file):
+        DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dct:title": "Test", "dct:publisher": ""}]},
+            empty_fields=["dct:publisher"],
+        )
+
+        response = Client().post(
+            f"/api/result/{uploaded_file.id}/edit/",
+            data=json.dumps([
+                {"op": "add", "path": "/dct:publisher/foaf:name", "value": "Agency"},
+                {"op": "remove", "path": "/dct:title"},
+            ]),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        dataset = response.json()["jsonld"]["@graph"][0]
+        assert dataset == {"dct:publisher": {"foaf:name": "Agency"}}
+        assert response.json()["empty_fields"] == []
+
+    def test_edit_if_match(self, uploaded_file):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Test"}]}
+        )
+        client = Client()
+        etag = client.get(f"/api/result/{uploaded_file.id}/", {"format": "ttl"})[
+            "ETag"
+        ]
+
+        def edit(title):
+            return client.post(
+                f"/api/result/{uploaded_file.id}/edit/",
+                data=json.dumps({"field": "dct:title", "value": title}),
+                content_type="application/json",
+                HTTP_IF_MATCH=etag,
+            )
+
+        first = edit("First")
+        assert first.status_code == 200
+        second = edit("Second")
+        assert second.status_code == 412
+        assert second["ETag"] == first["ETag"]
+        dcat = DCATOutput.objects.get(upload=uploaded_file)
+        assert dcat.get_merged_jsonld()["@graph"][0]["dct:title"] == "First"
+        assert dcat.version == 2
+
+    def test_json_patch_invalid_path(self, uploaded_file):
+        DCATOutput.objects.create(
+            upload=uploaded_file, jsonld={"@graph": [{"dct:title": "Test"}]}
+        )
+        response = Client().post(
+            f"/api/result/{uploaded_file.id}/edit/",
+            data=json.dumps({"op": "remove", "path": "/dct:missing"}),
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+
     def test_edit_field_missing_params(self, uploaded_file):
         DCATOutput.objects.create(upload=uploaded_file, jsonld={})
 
@@ -89,6 +503,76 @@ class TestEditFieldView:
         assert response.status_code == 400
 
 
+@pytest.mark.django_db
+class TestAsyncViews:
+    def test_aenrich(self, settings, monkeypatch):
+        settings.ANTHROPIC_API_KEY = ""
+        pipeline = EnrichmentPipeline()
+        pipeline.tika_service.aextract = AsyncMock(
+            return_value=TikaResult(mime_type="text/plain", title="Async doc")
+        )
+        monkeypatch.setattr(api, "_async_pipeline", pipeline)
+        request = RequestFactory().post(
+            "/api/enrich/", {"file": SimpleUploadedFile("doc.txt", b"Some content")}
+        )
+
+        response = async_to_sync(api.aenrich)(request)
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        assert data["status"] == "completed"
+        assert data["jsonld"]["@graph"][0]["dct:title"] == "Async doc"
+        pipeline.tika_service.aextract.assert_awaited_once()
+
+    def test_aenrich_no_file(self):
+        request = RequestFactory().post("/api/enrich/")
+        response = async_to_sync(api.aenrich)(request)
+        assert response.status_code == 400
+
+    def test_aresult(self, uploaded_file):
+        uploaded_file.mark_completed()
+        DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dct:title": "Test"}]},
+            user_edits={"dct:license": "CC-BY"},
+        )
+        request = RequestFactory().get(f"/api/result/{uploaded_file.id}/")
+
+        response = async_to_sync(api.aresult)(request, upload_id=uploaded_file.id)
+
+        data = json.loads(response.content)
+        assert data["status"] == "completed"
+        assert data["jsonld"]["@graph"][0]["dct:license"] == "CC-BY"
+
+    def test_aresult_not_found(self, db):
+        request = RequestFactory().get("/")
+        response = async_to_sync(api.aresult)(
+            request, upload_id="00000000-0000-0000-0000-000000000000"
+        )
+        assert response.status_code == 404
+
+    def test_aedit_field(self, uploaded_file):
+        DCATOutput.objects.create(
+            upload=uploaded_file,
+            jsonld={"@graph": [{"dct:title": "Test"}]},
+            empty_fields=["dct:license"],
+        )
+        request = RequestFactory().post(
+            "/",
+            data=json.dumps({"field": "dct:license", "value": "CC-BY"}),
+            content_type="application/json",
+        )
+
+        response = async_to_sync(api.aedit_field)(request, upload_id=uploaded_file.id)
+
+        data = json.loads(response.content)
+        assert data["empty_fields"] == []
+        dcat = DCATOutput.objects.get(upload=uploaded_file)
+        assert dcat.user_edits == [
+            {"op": "replace", "path": "dct:license", "value": "CC-BY"}
+        ]
+
+
 @pytest.mark.django_db
 class TestHomeView:
     def test_home_page(self):